@@ -1,13 +1,94 @@
 # app/main.py
-from fastapi import FastAPI
+import logging
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import auth, rooms, messages, academics, quizzes
-from app.utils.database import create_tables
+from app.routes import auth, rooms, messages, attachments, notifications, academics, quizzes
+from app.utils.database import engine, get_async_engine, missing_columns, missing_tables
+from app.services.connection_manager import manager
+from app.services.message_service import message_writer
+from app.services.email_service import email_dispatcher, EMAIL_DELIVERY
+from app.services.notification_service import notification_coalescer
+from app.services.quiz_grading import submission_grader
+from app.services.leaderboard import leaderboards
+from app.services.presence import presence
+from app.services.reaction_feed import reaction_feed
+from app.services.attachment_service import thumbnailer
+from app.services.archive_service import message_compactor, MESSAGE_COMPACTION
+from app.utils.rate_limit import rate_limiter, API_RATE
+from app.utils.instrumentation import (
+    InstrumentationMiddleware, check_database, collect_pool_metrics, instrument_engine, loop_lag_monitor
+)
+from app.utils.metrics import REGISTRY
+from app.utils.security import password_hasher
+from app.utils.serialization import FastJSONResponse
+
+logger = logging.getLogger(__name__)
+
+async def start_realtime():
+    await loop_lag_monitor.start()
+    await message_writer.start()
+    await manager.start()
+    await notification_coalescer.start()
+    await submission_grader.start()
+    await leaderboards.start()
+    await presence.start()
+    await reaction_feed.start()
+    if EMAIL_DELIVERY == "inprocess":
+        await email_dispatcher.start()
+    if MESSAGE_COMPACTION == "inprocess":
+        await message_compactor.start()
+
+async def stop_realtime():
+    await message_compactor.stop()
+    await email_dispatcher.stop()
+    await submission_grader.stop()
+    await leaderboards.stop()
+    await message_writer.stop()
+    await notification_coalescer.stop()
+    await presence.stop()
+    await reaction_feed.stop()
+    await thumbnailer.stop()
+    await password_hasher.stop()
+    await manager.stop()
+    await rate_limiter.close()
+    await loop_lag_monitor.stop()
+    await get_async_engine().dispose()
+
+async def check_schema():
+    """Log, without failing startup, a database that is down or not migrated yet"""
+    databases = await check_database(DATABASE_ENGINES)
+    for name, status in databases.items():
+        if not status["ok"]:
+            logger.warning("%s database not ready at startup (%s)", name, status.get("error"))
+    if databases["sync"]["ok"]:
+        missing = await run_in_threadpool(missing_tables)
+        if missing:
+            logger.error("Missing tables %s; run `python -m scripts.manage_db create`", ", ".join(missing))
+        columns = await run_in_threadpool(missing_columns)
+        if columns:
+            logger.error("Missing columns %s; see `python -m scripts.manage_db check`", ", ".join(columns))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The schema is created by scripts.manage_db, not on import; connecting
+    # here warms one pooled connection and reports problems early
+    await check_schema()
+    await start_realtime()
+    try:
+        yield
+    finally:
+        await stop_realtime()
 
 app = FastAPI(
     title="Swastik University Chat Platform API",
     description="Backend API for university student social platform",
-    version="1.0.0"
+    version="1.0.0",
+    # orjson for every route; list endpoints also return it directly to skip re-validation
+    default_response_class=FastJSONResponse,
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -18,16 +99,22 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so latency includes every other middleware
+app.add_middleware(InstrumentationMiddleware)
 
-# Create database tables
-create_tables()
+DATABASE_ENGINES = {"sync": engine, "async": get_async_engine()}
+for instrumented in DATABASE_ENGINES.values():
+    instrument_engine(instrumented)
 
-# Include routers
-app.include_router(auth.router)
-app.include_router(rooms.router)
-app.include_router(messages.router)
-app.include_router(academics.router)
-app.include_router(quizzes.router)
+# Include routers; every HTTP route counts against its client IP's API budget
+api_limit = [Depends(rate_limiter.by_ip("api", API_RATE))]
+app.include_router(auth.router, dependencies=api_limit)
+app.include_router(rooms.router, dependencies=api_limit)
+app.include_router(messages.router, dependencies=api_limit)
+app.include_router(attachments.router, dependencies=api_limit)
+app.include_router(notifications.router, dependencies=api_limit)
+app.include_router(academics.router, dependencies=api_limit)
+app.include_router(quizzes.router, dependencies=api_limit)
 
 @app.get("/")
 async def root():
@@ -39,6 +126,7 @@ async def root():
             "User Authentication",
             "Chat Rooms",
             "Real-time Messaging",
+            "Notifications",
             "Academic Resources",
             "Quizzes & Assessments",
             "University Integration"
@@ -46,8 +134,23 @@ async def root():
     }
 
 @app.get("/health")
-async def health_check():
-    return {"status": "healthy", "service": "swastik-backend"}
+async def health_check(ready: bool = False):
+    """Liveness; with ?ready=true also readiness (database reachable, pool not exhausted)"""
+    if not ready:
+        return {"status": "healthy", "service": "swastik-backend"}
+
+    databases = await check_database(DATABASE_ENGINES)
+    is_ready = all(status["ok"] for status in databases.values())
+    return JSONResponse(
+        status_code=200 if is_ready else 503,
+        content={"status": "ready" if is_ready else "unavailable", "service": "swastik-backend", "databases": databases}
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of every metric in this worker"""
+    collect_pool_metrics(DATABASE_ENGINES)
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
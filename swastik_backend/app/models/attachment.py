@@ -0,0 +1,21 @@
+# app/models/attachment.py
+from sqlalchemy import BigInteger, Column, Integer, String, ForeignKey
+from sqlalchemy.sql import func
+from app.utils.database import Base, Timestamp
+
+class Attachment(Base):
+    """One upload to a room; its bytes live in the content store under `sha256`.
+
+    Uploads of identical content (the same slides in several rooms) get a
+    row each, for access control and filenames, but share one stored file.
+    """
+    __tablename__ = "attachments"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size = Column(BigInteger, nullable=False)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100), nullable=False)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False, index=True)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=False)
+    created_at = Column(Timestamp, server_default=func.now())
@@ -0,0 +1,23 @@
+# app/models/email_outbox.py
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from sqlalchemy.sql import func
+from app.utils.database import Base
+
+class OutboxEmail(Base):
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Dispatcher scan: WHERE status = 'pending' AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(100), nullable=False)
+    subject = Column(String(200), nullable=False)
+    html_body = Column(Text)
+    text_body = Column(Text)
+    status = Column(String(20), default="pending")  # pending, sent, failed
+    attempts = Column(Integer, default=0)
+    last_error = Column(Text)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
@@ -1,33 +1,85 @@
 # app/models/message.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Index, LargeBinary, UniqueConstraint, event, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.utils.database import Base
+from app.utils.database import Base, Timestamp
 
 class Message(Base):
     __tablename__ = "messages"
+    __table_args__ = (
+        # Keyset pagination of room history: WHERE room_id = ? ORDER BY created_at, id
+        Index("ix_messages_room_created_id", "room_id", "created_at", "id"),
+        # Paging forward in commit order: WHERE room_id = ? AND room_seq > ? ORDER BY room_seq
+        Index("ix_messages_room_seq", "room_id", "room_seq"),
+        # Walking reply trees: WHERE parent_id = ? (recursive thread query)
+        Index("ix_messages_parent_created_id", "parent_id", "created_at", "id"),
+        # Whole threads at once: WHERE thread_id IN (...) (archival, purge)
+        Index("ix_messages_thread_id", "thread_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     content = Column(Text, nullable=False)
     message_type = Column(String(20), default="text")  # text, image, file, poll, quiz
     file_url = Column(String(255))
-    metadata = Column(JSON)  # for storing additional data
+    message_metadata = Column("metadata", JSON)  # additional data; "metadata" is reserved by SQLAlchemy
     user_id = Column(Integer, ForeignKey("users.id"))
     room_id = Column(Integer, ForeignKey("rooms.id"))
+    room_seq = Column(Integer)  # position in the room, from rooms.message_seq
     parent_id = Column(Integer, ForeignKey("messages.id"))  # for replies/threads
+    thread_id = Column(Integer, ForeignKey("messages.id"))  # root message of the thread, for replies
+    reply_count = Column(Integer, default=0, server_default="0", nullable=False)  # replies in the thread, on roots
+    last_reply_at = Column(Timestamp)
     is_edited = Column(Boolean, default=False)
     is_deleted = Column(Boolean, default=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(Timestamp, server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Relationships
     author = relationship("User", back_populates="messages")
     room = relationship("Room", back_populates="messages")
-    replies = relationship("Message", remote_side=[id])
+    parent = relationship("Message", remote_side=[id], foreign_keys=[parent_id], back_populates="replies")
+    replies = relationship("Message", foreign_keys=[parent_id], back_populates="parent")
     reactions = relationship("MessageReaction", back_populates="message")
 
+# Full-text index over messages.content, kept outside the ORM because its
+# shape depends on the database (see app.services.search_service)
+SEARCH_TABLE = "message_search"
+
+@event.listens_for(Base.metadata, "after_create")
+def create_search_index(target, connection, **kw):
+    """Create the message search index if missing; runs after every create_all"""
+    if connection.dialect.name == "sqlite":
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE name = :name"), {"name": SEARCH_TABLE}
+        ).first()
+        if exists:
+            return
+        # External content: the index stores postings only, text stays in messages
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+            "content, content='messages', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        ))
+        connection.execute(text(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, content) SELECT id, content FROM messages WHERE is_deleted = 0"
+        ))
+    elif connection.dialect.name == "postgresql":
+        # Adding the column rewrites an existing messages table once
+        connection.execute(text(
+            "ALTER TABLE messages ADD COLUMN IF NOT EXISTS search_vector tsvector "
+            "GENERATED ALWAYS AS (to_tsvector('simple', content)) STORED"
+        ))
+        connection.execute(text(
+            "CREATE INDEX IF NOT EXISTS ix_messages_search ON messages "
+            "USING gin (search_vector) WHERE is_deleted = false"
+        ))
+
 class MessageReaction(Base):
     __tablename__ = "message_reactions"
+    __table_args__ = (
+        # One reaction per user and emoji; also serves toggles and "reacted by me"
+        UniqueConstraint("message_id", "user_id", "emoji", name="uq_message_reactions_message_user_emoji"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     message_id = Column(Integer, ForeignKey("messages.id"))
@@ -37,3 +89,37 @@ class MessageReaction(Base):
     
     # Relationships
     message = relationship("Message", back_populates="reactions")
+
+class MessageReactionCount(Base):
+    """Reactions per emoji on a message, kept in step with message_reactions"""
+    __tablename__ = "message_reaction_counts"
+    
+    message_id = Column(Integer, ForeignKey("messages.id"), primary_key=True)
+    emoji = Column(String(10), primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+
+class MessageArchiveSegment(Base):
+    """A compressed run of a room's archived messages (see app.services.archive_service).
+
+    Written once and never updated: `payload` is zlib-compressed JSON of
+    the messages, in (created_at, id) order, with their reactions. The
+    bounds let history find the segments covering a position without
+    opening them.
+    """
+    __tablename__ = "message_archive_segments"
+    __table_args__ = (
+        # Walking back through history: WHERE room_id = ? ORDER BY last_created_at DESC, last_id DESC
+        Index("ix_message_archive_segments_room_last", "room_id", "last_created_at", "last_id"),
+        # Walking forward: WHERE room_id = ? ORDER BY first_created_at, first_id
+        Index("ix_message_archive_segments_room_first", "room_id", "first_created_at", "first_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    room_id = Column(Integer, ForeignKey("rooms.id"), nullable=False)
+    first_created_at = Column(Timestamp, nullable=False)
+    first_id = Column(Integer, nullable=False)
+    last_created_at = Column(Timestamp, nullable=False)
+    last_id = Column(Integer, nullable=False)
+    message_count = Column(Integer, nullable=False)
+    payload = Column(LargeBinary, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
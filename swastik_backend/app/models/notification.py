@@ -1,11 +1,17 @@
 # app/models/notification.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, Text, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
-from app.utils.database import Base
+from app.utils.database import Base, Timestamp
 
 class Notification(Base):
     __tablename__ = "notifications"
+    __table_args__ = (
+        # Inbox: WHERE user_id = ? [AND is_read = false] ORDER BY created_at DESC
+        Index("ix_notifications_user_read_created", "user_id", "is_read", "created_at"),
+        # Coalescing: find a user's open notification for the same group
+        Index("ix_notifications_group_user", "group_key", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"))
@@ -16,7 +22,9 @@ class Notification(Base):
     related_type = Column(String(50))  # type of related entity
     is_read = Column(Boolean, default=False)
     priority = Column(String(20), default="normal")  # low, normal, high, urgent
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    group_key = Column(String(100))  # notifications with the same key are coalesced, e.g. "room:12:message"
+    count = Column(Integer, default=1, server_default="1", nullable=False)  # events merged into this notification
+    created_at = Column(Timestamp, server_default=func.now())
     
     # Relationships
     user = relationship("User", back_populates="notifications")
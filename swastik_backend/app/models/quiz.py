@@ -1,5 +1,5 @@
 # app/models/quiz.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, JSON, Float, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.utils.database import Base
@@ -22,11 +22,15 @@ class Quiz(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
-    questions = relationship("QuizQuestion", back_populates="quiz")
+    questions = relationship("QuizQuestion", back_populates="quiz", order_by="QuizQuestion.order_index")
     attempts = relationship("QuizAttempt", back_populates="quiz")
 
 class QuizQuestion(Base):
     __tablename__ = "quiz_questions"
+    __table_args__ = (
+        # Answer key compilation: WHERE quiz_id = ? ORDER BY order_index
+        Index("ix_quiz_questions_quiz_order", "quiz_id", "order_index"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     quiz_id = Column(Integer, ForeignKey("quizzes.id"))
@@ -43,6 +47,10 @@ class QuizQuestion(Base):
 
 class QuizAttempt(Base):
     __tablename__ = "quiz_attempts"
+    __table_args__ = (
+        # Open attempt lookup on submit and per-quiz regrading
+        Index("ix_quiz_attempts_quiz_user", "quiz_id", "user_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     quiz_id = Column(Integer, ForeignKey("quizzes.id"))
@@ -1,11 +1,15 @@
 # app/models/room.py
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.utils.database import Base
 
 class Room(Base):
     __tablename__ = "rooms"
+    __table_args__ = (
+        # Public directory: WHERE room_type = 'public' AND is_active AND university_domain IN (?, NULL)
+        Index("ix_rooms_directory", "room_type", "is_active", "university_domain"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -14,6 +18,9 @@ class Room(Base):
     subject = Column(String(100))  # for academic rooms
     university_domain = Column(String(100))  # restrict to specific university
     max_members = Column(Integer, default=100)
+    member_count = Column(Integer, default=0, server_default="0", nullable=False)  # maintained by RoomService
+    last_activity_at = Column(DateTime(timezone=True))  # last message, maintained by the message writer
+    message_seq = Column(Integer, default=0, server_default="0", nullable=False)  # messages ever posted, maintained by the message writer
     is_active = Column(Boolean, default=True)
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -22,10 +29,17 @@ class Room(Base):
     # Relationships
     creator = relationship("User", back_populates="created_rooms")
     members = relationship("RoomMember", back_populates="room")
-    messages = relationship("Message", back_populates="room")
+    # Never loaded wholesale; page through history with MessageService
+    messages = relationship("Message", back_populates="room", lazy="write_only")
 
 class RoomMember(Base):
     __tablename__ = "room_members"
+    __table_args__ = (
+        # One membership per user and room; also serves membership lookups
+        UniqueConstraint("room_id", "user_id", name="uq_room_members_room_user"),
+        # "Rooms of this user": my rooms, unread counts, message search scope
+        Index("ix_room_members_user_room", "user_id", "room_id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     room_id = Column(Integer, ForeignKey("rooms.id"))
@@ -33,6 +47,9 @@ class RoomMember(Base):
     role = Column(String(20), default="member")  # admin, moderator, member
     joined_at = Column(DateTime(timezone=True), server_default=func.now())
     is_muted = Column(Boolean, default=False)
+    # Read cursor: unread count is rooms.message_seq - last_read_seq
+    last_read_seq = Column(Integer, default=0, server_default="0", nullable=False)
+    last_read_message_id = Column(Integer, ForeignKey("messages.id"))
     
     # Relationships
     room = relationship("Room", back_populates="members")
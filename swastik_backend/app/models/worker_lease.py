@@ -0,0 +1,12 @@
+# app/models/worker_lease.py
+from sqlalchemy import Column, String, DateTime
+from app.utils.database import Base
+
+class WorkerLease(Base):
+    __tablename__ = "worker_leases"
+
+    # One row per background pass (compaction, outbox delivery); the holder
+    # owns the pass until it releases the row or expires_at passes
+    name = Column(String(50), primary_key=True)
+    holder = Column(String(100), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False)
@@ -0,0 +1,6 @@
+# app/routes/academics.py
+# Academic resource endpoints are not implemented yet; the router is
+# registered so the app starts and the prefix is reserved
+from fastapi import APIRouter
+
+router = APIRouter(prefix="/academics", tags=["Academics"])
@@ -0,0 +1,139 @@
+# app/routes/attachments.py
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.utils.database import get_async_db
+from app.schemas.message import AttachmentResponse
+from app.services.attachment_service import AttachmentService, attachment_store, thumbnailer, IMAGE_TYPES
+from app.services.room_service import RoomService
+from app.routes.auth import get_current_user
+from app.utils.http import FileRangeResponse, digest_etag, etag_matches, parse_range
+from app.utils.storage import AttachmentTooLarge
+
+router = APIRouter(tags=["Attachments"])
+
+# Stored content never changes under an attachment id
+CACHE_HEADERS = {"Cache-Control": "private, max-age=31536000, immutable", "X-Content-Type-Options": "nosniff"}
+
+async def _member_attachment(attachment_id: int, user_id: int, db: AsyncSession):
+    attachment = await AttachmentService.get_for_member(db, attachment_id, user_id)
+    if attachment is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Attachment not found"
+        )
+    # End the read transaction: a download or thumbnail may take a while
+    await db.commit()
+    return attachment
+
+@router.post("/rooms/{room_id}/attachments", response_model=AttachmentResponse)
+async def upload_attachment(
+    room_id: int,
+    request: Request,
+    filename: str = Query(..., min_length=1, max_length=255),
+    content_length: Optional[int] = Header(None),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Upload a file to a room.
+
+    The file is the raw request body (not a multipart form) with its own
+    Content-Type; it is streamed to disk as it arrives. Send a message with
+    the returned `url` as its file_url to post it.
+    """
+    if not await RoomService.is_member_async(db, room_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this room"
+        )
+    # End the read transaction so no pooled connection is held while the body streams in
+    await db.commit()
+    if content_length is not None and content_length > attachment_store.max_bytes:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Attachments are limited to {attachment_store.max_bytes} bytes"
+        )
+
+    try:
+        filename = AttachmentService.clean_filename(filename)
+        digest, size = await attachment_store.save(request.stream())
+    except AttachmentTooLarge as e:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    content_type = AttachmentService.normalize_content_type(request.headers.get("content-type"))
+    attachment = await AttachmentService.create_attachment(
+        db, room_id, current_user.id, filename, content_type, digest, size
+    )
+    if content_type in IMAGE_TYPES:
+        thumbnailer.schedule(digest)
+    return AttachmentService.to_dict(attachment)
+
+# status_code: FileRangeResponse takes no default status for the OpenAPI schema to read
+@router.get("/attachments/{attachment_id}", response_class=FileRangeResponse, status_code=status.HTTP_200_OK)
+async def download_attachment(
+    attachment_id: int,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_range: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Download an attachment; supports single byte ranges and If-None-Match"""
+    attachment = await _member_attachment(attachment_id, current_user.id, db)
+    etag = digest_etag(attachment.sha256)
+    headers = dict(CACHE_HEADERS, ETag=etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    byte_range = None
+    # An If-Range that does not match means the client's partial copy is stale: send everything
+    if if_range is None or if_range.strip() == etag:
+        try:
+            byte_range = parse_range(range_header, attachment.size)
+        except ValueError:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={"Content-Range": f"bytes */{attachment.size}"}
+            )
+
+    return FileRangeResponse(
+        attachment_store.blob_path(attachment.sha256),
+        attachment.size,
+        byte_range,
+        headers=headers,
+        media_type=attachment.content_type,
+        filename=attachment.filename,
+        # Only images render inline; anything else (HTML included) is a download
+        content_disposition_type="inline" if attachment.content_type in IMAGE_TYPES else "attachment"
+    )
+
+@router.get("/attachments/{attachment_id}/thumbnail", response_class=FileRangeResponse, status_code=status.HTTP_200_OK)
+async def get_thumbnail(
+    attachment_id: int,
+    if_none_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """A JPEG thumbnail of an image attachment, made on first request if needed"""
+    attachment = await _member_attachment(attachment_id, current_user.id, db)
+    path = await thumbnailer.get(attachment.sha256) if attachment.content_type in IMAGE_TYPES else None
+    if path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No thumbnail for this attachment"
+        )
+
+    etag = digest_etag(attachment.sha256)[:-1] + f'-{thumbnailer.size}"'
+    headers = dict(CACHE_HEADERS, ETag=etag)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return FileRangeResponse(path, path.stat().st_size, headers=headers, media_type="image/jpeg")
@@ -8,14 +8,28 @@ from app.utils.database import get_db
 from app.schemas.auth import (
     UserCreate, UserResponse, Token, EmailVerification
 )
+from app.schemas.views import UserInfoView, UserView
 from app.services.auth_service import AuthService
-from app.utils.security import create_access_token, verify_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from app.services.user_cache import user_cache
+from app.services.presence import presence
+from app.utils.rate_limit import rate_limiter, LOGIN_RATE, LOGIN_ACCOUNT_RATE, REGISTER_RATE
+from app.utils.serialization import FastJSONResponse
+from app.utils.security import (
+    create_access_token, verify_token, PasswordHasherBusy, ACCESS_TOKEN_EXPIRE_MINUTES
+)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login")
 
+def _hasher_busy(e: PasswordHasherBusy) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=str(e),
+        headers={"Retry-After": "1"},
+    )
+
 async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    """Get current authenticated user"""
+    """Get current authenticated user (a cached UserPrincipal, not an ORM row)"""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -26,29 +40,34 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if username is None:
         raise credentials_exception
     
-    user = AuthService.get_user_by_username(db, username)
+    user = await user_cache.resolve(db, username)
     if user is None:
         raise credentials_exception
     
+    presence.touch(user.id)
     return user
 
-@router.post("/register", response_model=dict)
+@router.post("/register", response_model=dict, dependencies=[Depends(rate_limiter.by_ip("register", REGISTER_RATE))])
 async def register(user_data: UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     try:
-        result = AuthService.register_user(db, user_data)
+        result = await AuthService.register_user(db, user_data)
         return result
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.post("/login", response_model=Token)
+@router.post("/login", response_model=Token, dependencies=[Depends(rate_limiter.by_ip("login", LOGIN_RATE))])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """User login"""
+    # Per account as well, so guessing one user's password from many IPs is slow too
+    await rate_limiter.enforce("login_account", form_data.username.casefold(), LOGIN_ACCOUNT_RATE)
     try:
-        user = AuthService.authenticate_user(db, form_data.username, form_data.password)
+        user = await AuthService.authenticate_user(db, form_data.username, form_data.password)
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
@@ -61,27 +80,21 @@ async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session =
             data={"sub": user.username}, expires_delta=access_token_expires
         )
         
-        return {
+        return FastJSONResponse({
             "access_token": access_token,
             "token_type": "bearer",
-            "user_info": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-                "first_name": user.first_name,
-                "last_name": user.last_name,
-                "university_badge": user.university_badge,
-                "is_verified": user.is_verified
-            }
-        }
+            "user_info": UserInfoView.of(user)
+        })
         
+    except PasswordHasherBusy as e:
+        raise _hasher_busy(e)
     except ValueError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e)
         )
 
-@router.post("/verify-email")
+@router.post("/verify-email", dependencies=[Depends(rate_limiter.by_ip("verify_email", LOGIN_RATE))])
 async def verify_email(verification_data: EmailVerification, db: Session = Depends(get_db)):
     """Verify user email"""
     try:
@@ -96,16 +109,7 @@ async def verify_email(verification_data: EmailVerification, db: Session = Depen
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user = Depends(get_current_user)):
     """Get current user information"""
-    return UserResponse(
-        id=current_user.id,
-        username=current_user.username,
-        email=current_user.email,
-        first_name=current_user.first_name,
-        last_name=current_user.last_name,
-        university_badge=current_user.university_badge,
-        is_verified=current_user.is_verified,
-        created_at=current_user.created_at.isoformat()
-    )
+    return FastJSONResponse(UserView.of(current_user))
 
 @router.post("/logout")
 async def logout():
@@ -0,0 +1,281 @@
+# app/routes/messages.py
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.websockets import WebSocketState
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.utils.database import get_db, get_async_db, SessionLocal
+from app.schemas.message import (
+    MessageCreate, MessageUpdate, MessageResponse, MessageHistoryResponse, MessageSearchPage,
+    MessageThread, ReactionToggle, ReactionToggleResponse
+)
+from app.services.auth_service import AuthService
+from app.services.message_service import (
+    MessageService, NotRoomMember, message_writer, HISTORY_PAGE_SIZE, MAX_HISTORY_PAGE_SIZE,
+    SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE_SIZE, MAX_SEARCH_PAGE,
+    THREAD_PAGE_SIZE, MAX_THREAD_PAGE_SIZE, MAX_THREAD_DEPTH
+)
+from app.services.room_service import RoomService
+from app.services.connection_manager import manager, room_channel
+from app.services.notification_service import notification_coalescer
+from app.services.presence import presence
+from app.services.reaction_feed import reaction_feed
+from app.utils.rate_limit import rate_limiter, too_many_requests, MESSAGE_RATE, ROOM_MESSAGE_RATE, REACTION_RATE
+from app.utils.security import verify_token
+from app.utils.serialization import FastJSONResponse
+from app.routes.auth import get_current_user
+
+router = APIRouter(tags=["Messages"])
+
+def _authorize_room_socket(token: str, room_id: int) -> Optional[int]:
+    """Resolve a socket token to a user id if that user may join the room"""
+    username = verify_token(token)
+    if username is None:
+        return None
+
+    with SessionLocal() as db:
+        user = AuthService.get_user_by_username(db, username)
+        if user is None or not RoomService.is_member(db, room_id, user.id):
+            return None
+        return user.id
+
+async def _message_wait(room_id: int, user_id: int) -> float:
+    """Seconds until the user may send to the room again; 0 if they may now"""
+    # The sender's own bucket first, so one flooder does not drain the room's
+    wait = await rate_limiter.check("messages", f"{room_id}:{user_id}", MESSAGE_RATE)
+    if not wait:
+        wait = await rate_limiter.check("room_messages", room_id, ROOM_MESSAGE_RATE)
+    return wait
+
+async def broadcast_message(message: dict) -> None:
+    """Deliver a stored message to every socket subscribed to its room"""
+    await manager.publish(
+        room_channel(message["room_id"]),
+        MessageService.encode_event("message", message)
+    )
+    notification_coalescer.record(message)
+
+@router.get("/rooms/{room_id}/messages", response_model=MessageHistoryResponse)
+async def get_messages(
+    room_id: int,
+    limit: int = Query(HISTORY_PAGE_SIZE, ge=1, le=MAX_HISTORY_PAGE_SIZE),
+    before: Optional[str] = None,
+    after: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get a page of room history, newest first unless `after` is given"""
+    if not await RoomService.is_member_async(db, room_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this room"
+        )
+
+    try:
+        return FastJSONResponse(await MessageService.get_message_history_async(
+            db, room_id, limit, before=before, after=after, viewer_id=current_user.id
+        ))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/rooms/{room_id}/messages", response_model=MessageResponse)
+async def send_message(
+    room_id: int,
+    message_data: MessageCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Send a message to a room"""
+    if not RoomService.is_member(db, room_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this room"
+        )
+    # The writer stores the message on its own session: end this read
+    # transaction so no pooled connection is held while the batch flushes
+    db.commit()
+
+    # Only members spend the room's bucket, so outsiders cannot throttle it
+    wait = await _message_wait(room_id, current_user.id)
+    if wait:
+        raise too_many_requests(wait)
+
+    try:
+        message = await message_writer.submit(room_id, current_user.id, message_data)
+    except NotRoomMember as e:
+        # Left the room while the message was queued
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e)
+        )
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await broadcast_message(message)
+    return FastJSONResponse(message)
+
+@router.get("/messages/search", response_model=MessageSearchPage)
+async def search_messages(
+    q: str = Query(..., min_length=1, max_length=200),
+    room_id: Optional[int] = None,
+    page: int = Query(1, ge=1, le=MAX_SEARCH_PAGE),
+    page_size: int = Query(SEARCH_PAGE_SIZE, ge=1, le=MAX_SEARCH_PAGE_SIZE),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Search messages in the current user's rooms, best matches first"""
+    if room_id is not None and not RoomService.is_member(db, room_id, current_user.id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this room"
+        )
+
+    try:
+        return FastJSONResponse(MessageService.search_messages(db, current_user.id, q, room_id, page, page_size))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/messages/{message_id}/thread", response_model=MessageThread)
+async def get_thread(
+    message_id: int,
+    max_depth: int = Query(MAX_THREAD_DEPTH, ge=1, le=MAX_THREAD_DEPTH),
+    limit: int = Query(THREAD_PAGE_SIZE, ge=1, le=MAX_THREAD_PAGE_SIZE),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """A message and its reply tree, oldest reply first"""
+    try:
+        return FastJSONResponse(MessageService.get_thread(db, message_id, current_user.id, max_depth, limit))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+@router.put("/messages/{message_id}", response_model=MessageResponse)
+async def edit_message(
+    message_id: int,
+    message_data: MessageUpdate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Edit one of your own messages"""
+    try:
+        message = MessageService.edit_message(db, message_id, current_user.id, message_data.content)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await manager.publish(room_channel(message["room_id"]), MessageService.encode_event("message_edited", message))
+    return message
+
+@router.delete("/messages/{message_id}", response_model=dict)
+async def delete_message(
+    message_id: int,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Delete a message (its author, or a room admin or moderator)"""
+    try:
+        deleted = MessageService.delete_message(db, message_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await manager.publish(room_channel(deleted["room_id"]), MessageService.encode_event("message_deleted", deleted))
+    return {"message": "Message deleted"}
+
+@router.post("/messages/{message_id}/reactions", response_model=ReactionToggleResponse)
+async def toggle_reaction(
+    message_id: int,
+    reaction: ReactionToggle,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Add your reaction to a message, or remove it if you already reacted with that emoji"""
+    await rate_limiter.enforce("reactions", current_user.id, REACTION_RATE)
+    try:
+        toggled = MessageService.toggle_reaction(db, message_id, current_user.id, reaction.emoji)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    reaction_feed.record(toggled)
+    return toggled
+
+@router.websocket("/ws/rooms/{room_id}")
+async def room_socket(websocket: WebSocket, room_id: int, token: str = Query(...)):
+    """Real-time message stream for a room; clients may also send messages on it"""
+    user_id = await run_in_threadpool(_authorize_room_socket, token, room_id)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    channel = room_channel(room_id)
+    connection = await manager.connect(channel, websocket, user_id)
+    await presence.connect(room_id, user_id)
+
+    try:
+        # The manager closes the socket itself for slow consumers and users who left the room
+        while websocket.application_state == WebSocketState.CONNECTED:
+            try:
+                payload = await websocket.receive_json()
+            except (KeyError, ValueError):
+                # Not JSON, or a binary frame: reject the frame, keep the socket
+                connection.offer(MessageService.encode_event("error", {"detail": "Frames must be JSON text"}))
+                continue
+            # Presence frames: {"type": "heartbeat"} and {"type": "typing"}
+            frame_type = payload.get("type") if isinstance(payload, dict) else None
+            if frame_type == "heartbeat":
+                await presence.heartbeat(room_id, user_id)
+                continue
+            if frame_type == "typing":
+                await presence.typing(room_id, user_id)
+                continue
+
+            try:
+                message_data = MessageCreate(**payload)
+            except (TypeError, ValueError) as e:
+                connection.offer(MessageService.encode_event("error", {"detail": str(e)}))
+                continue
+
+            wait = await _message_wait(room_id, user_id)
+            if wait:
+                connection.offer(MessageService.encode_event(
+                    "error", {"detail": "Too many messages, slow down", "retry_after": round(wait, 2)}
+                ))
+                continue
+
+            try:
+                message = await message_writer.submit(room_id, user_id, message_data)
+            except NotRoomMember:
+                # Left or removed since the handshake
+                await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+                break
+            except ValueError as e:
+                connection.offer(MessageService.encode_event("error", {"detail": str(e)}))
+                continue
+            await broadcast_message(message)
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await manager.disconnect(channel, connection)
+        await presence.disconnect(room_id, user_id)
@@ -0,0 +1,69 @@
+# app/routes/notifications.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import Optional
+
+from app.utils.database import get_db
+from app.schemas.notification import NotificationPage, AnnouncementCreate
+from app.services.notification_service import NotificationService, INBOX_PAGE_SIZE, MAX_INBOX_PAGE_SIZE
+from app.routes.auth import get_current_user
+
+router = APIRouter(tags=["Notifications"])
+
+@router.get("/notifications", response_model=NotificationPage)
+async def get_notifications(
+    unread_only: bool = False,
+    limit: int = Query(INBOX_PAGE_SIZE, ge=1, le=MAX_INBOX_PAGE_SIZE),
+    before: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get a page of the current user's notifications, newest first"""
+    try:
+        return NotificationService.get_inbox(db, current_user.id, unread_only, limit, before)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/notifications/unread-count", response_model=dict)
+async def get_unread_count(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Number of unread notifications for the badge"""
+    return {"unread_count": NotificationService.unread_count(db, current_user.id)}
+
+@router.post("/notifications/read-all", response_model=dict)
+async def mark_all_read(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Mark all notifications as read"""
+    return {"updated": NotificationService.mark_all_read(db, current_user.id)}
+
+@router.post("/notifications/{notification_id}/read", response_model=dict)
+async def mark_read(notification_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Mark one notification as read"""
+    try:
+        NotificationService.mark_read(db, current_user.id, notification_id)
+        return {"message": "Notification marked as read"}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+
+@router.post("/rooms/{room_id}/announcements", response_model=dict)
+async def announce(
+    room_id: int,
+    announcement: AnnouncementCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Notify every member of a room (admins and moderators only)"""
+    try:
+        recipients = NotificationService.announce(
+            db, room_id, current_user.id, announcement.title, announcement.message, announcement.priority
+        )
+        return {"message": "Announcement sent", "recipients": recipients}
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=str(e)
+        )
@@ -0,0 +1,156 @@
+# app/routes/quizzes.py
+from datetime import datetime, timezone
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import List, Optional
+
+from app.utils.database import get_db, SessionLocal
+from app.schemas.quiz import (
+    QuizCreate, QuizSummary, QuizPublic, AttemptStarted, AttemptSubmit, AttemptResult, LeaderboardResponse
+)
+from app.services.auth_service import AuthService
+from app.services.quiz_service import QuizService
+from app.services.quiz_grading import submission_grader, as_utc
+from app.services.leaderboard import leaderboards
+from app.services.connection_manager import manager, quiz_channel
+from app.utils.http import etag_matches
+from app.utils.security import verify_token
+from app.utils.serialization import FastJSONResponse
+from app.routes.auth import get_current_user
+
+router = APIRouter(prefix="/quizzes", tags=["Quizzes"])
+
+@router.get("", response_model=List[QuizSummary])
+async def get_quizzes(
+    subject: Optional[str] = None,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get available quizzes"""
+    return FastJSONResponse(QuizService.get_available_quizzes(db, subject))
+
+@router.post("", response_model=QuizSummary)
+async def create_quiz(
+    quiz_data: QuizCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create a quiz with its questions"""
+    try:
+        quiz = QuizService.create_quiz(db, quiz_data, current_user.id)
+        return QuizService.to_dict(quiz)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.get("/{quiz_id}", response_model=QuizPublic)
+async def get_quiz(
+    quiz_id: int,
+    if_none_match: Optional[str] = Header(None),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Quiz questions without answers; supports If-None-Match revalidation"""
+    payload = QuizService.get_public_payload(db, quiz_id)
+    if payload is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Quiz not found"
+        )
+    if payload.start_time and datetime.now(timezone.utc) < as_utc(payload.start_time):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="This quiz has not started yet"
+        )
+
+    # Clients must revalidate, so the start time check above always runs
+    headers = {"ETag": payload.etag, "Cache-Control": "private, no-cache"}
+    if etag_matches(if_none_match, payload.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+@router.post("/{quiz_id}/start", response_model=AttemptStarted)
+async def start_attempt(quiz_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Open an attempt; the time taken is measured from here"""
+    try:
+        return QuizService.start_attempt(db, quiz_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/{quiz_id}/attempt", response_model=AttemptResult)
+async def submit_attempt(
+    quiz_id: int,
+    submission: AttemptSubmit,
+    current_user = Depends(get_current_user)
+):
+    """Submit answers for the open attempt and get the score"""
+    try:
+        result = await submission_grader.submit(quiz_id, current_user.id, submission.answers)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await leaderboards.record(result)
+    return result
+
+@router.get("/{quiz_id}/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    quiz_id: int,
+    limit: int = Query(10, ge=1, le=100),
+    current_user = Depends(get_current_user)
+):
+    """Top of the quiz leaderboard and the caller's own rank and percentile"""
+    return await leaderboards.get(quiz_id, current_user.id, limit)
+
+@router.post("/{quiz_id}/regrade", response_model=dict)
+async def regrade_quiz(quiz_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Re-score every completed attempt (quiz creator only)"""
+    try:
+        regraded = QuizService.regrade(db, quiz_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    await leaderboards.rebuild(quiz_id)
+    return {"regraded": regraded}
+
+def _authorize_quiz_socket(token: str) -> Optional[int]:
+    """Resolve a socket token to a user id"""
+    username = verify_token(token)
+    if username is None:
+        return None
+
+    with SessionLocal() as db:
+        user = AuthService.get_user_by_username(db, username)
+        return user.id if user is not None else None
+
+@router.websocket("/{quiz_id}/leaderboard/ws")
+async def leaderboard_socket(websocket: WebSocket, quiz_id: int, token: str = Query(...)):
+    """Live leaderboard updates for a quiz; the socket is receive-only"""
+    user_id = await run_in_threadpool(_authorize_quiz_socket, token)
+    if user_id is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    channel = quiz_channel(quiz_id)
+    connection = await manager.connect(channel, websocket, user_id)
+
+    try:
+        while True:
+            # Nothing is accepted from the client; this only notices the disconnect
+            await websocket.receive_text()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        await manager.disconnect(channel, connection)
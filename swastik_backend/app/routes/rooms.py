@@ -0,0 +1,131 @@
+# app/routes/rooms.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.utils.database import get_db
+from app.schemas.room import (
+    RoomCreate, RoomResponse, RoomDirectoryPage, ReadCursorUpdate, ReadCursor, UnreadCount, RoomPresence
+)
+from app.services.room_service import RoomService, DIRECTORY_SORTS
+from app.services.connection_manager import manager, room_channel
+from app.services.presence import presence
+from app.routes.auth import get_current_user
+from app.utils.serialization import FastJSONResponse
+
+router = APIRouter(prefix="/rooms", tags=["Chat Rooms"])
+
+@router.get("/public", response_model=RoomDirectoryPage)
+async def get_public_rooms(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    sort: str = Query("popular", pattern=f"^({'|'.join(DIRECTORY_SORTS)})$"),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Browse public rooms open to the current user's university"""
+    return FastJSONResponse(RoomService.get_public_rooms(
+        db, current_user.university_domain, page=page, page_size=page_size, sort=sort
+    ))
+
+@router.get("", response_model=List[RoomResponse])
+async def get_my_rooms(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Get rooms the current user is a member of"""
+    return FastJSONResponse(RoomService.get_user_rooms(db, current_user.id))
+
+@router.get("/unread", response_model=List[UnreadCount])
+async def get_unread_counts(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Unread message counts for every room the current user belongs to"""
+    return FastJSONResponse(RoomService.get_unread_counts(db, current_user.id))
+
+@router.post("", response_model=RoomResponse)
+async def create_room(
+    room_data: RoomCreate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Create a new room with the current user as admin"""
+    try:
+        room = RoomService.create_room(db, room_data, current_user.id)
+        return RoomService.to_dict(room)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/{room_id}/join", response_model=dict)
+async def join_room(room_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Join a room"""
+    try:
+        return RoomService.join_room(db, room_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+@router.post("/{room_id}/leave", response_model=dict)
+async def leave_room(room_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Leave a room"""
+    try:
+        result = RoomService.leave_room(db, room_id, current_user.id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    # Open room sockets were authorized at the handshake: close them now
+    await manager.disconnect_user(room_channel(room_id), current_user.id)
+    return result
+
+@router.post("/{room_id}/read", response_model=ReadCursor)
+async def mark_read(
+    room_id: int,
+    cursor: ReadCursorUpdate,
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Move the current user's read cursor forward"""
+    try:
+        return RoomService.mark_read(db, room_id, current_user.id, cursor.message_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+def _require_member(db: Session, room_id: int, user_id: int) -> None:
+    if not RoomService.is_member(db, room_id, user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not a member of this room"
+        )
+    # Release the connection; the rest is answered from the presence store
+    db.commit()
+
+@router.get("/{room_id}/presence", response_model=RoomPresence)
+async def get_presence(
+    room_id: int,
+    limit: int = Query(100, ge=1, le=1000),
+    current_user = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Who is online and who is typing in a room"""
+    _require_member(db, room_id, current_user.id)
+    return await presence.room_presence(room_id, limit)
+
+@router.post("/{room_id}/presence", response_model=dict)
+async def heartbeat(room_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Stay online in a room (for clients without the room socket)"""
+    _require_member(db, room_id, current_user.id)
+    await presence.heartbeat(room_id, current_user.id)
+    return {"status": "online"}
+
+@router.post("/{room_id}/typing", response_model=dict)
+async def typing(room_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """Show the current user as typing for a few seconds"""
+    _require_member(db, room_id, current_user.id)
+    await presence.typing(room_id, current_user.id)
+    return {"status": "typing"}
@@ -0,0 +1,34 @@
+# app/schemas/auth.py
+from pydantic import BaseModel, Field
+from typing import Optional
+
+class UserCreate(BaseModel):
+    username: str = Field(..., min_length=3, max_length=50, pattern=r"^[A-Za-z0-9_.-]+$")
+    email: str = Field(..., max_length=100, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+    password: str = Field(..., min_length=8, max_length=128)
+    first_name: str = Field(..., min_length=1, max_length=50)
+    last_name: str = Field(..., min_length=1, max_length=50)
+
+class UserLogin(BaseModel):
+    username: str
+    password: str
+
+class UserInfo(BaseModel):
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    university_badge: str
+    is_verified: bool
+
+class UserResponse(UserInfo):
+    created_at: Optional[str] = None
+
+class Token(BaseModel):
+    access_token: str
+    token_type: str
+    user_info: UserInfo
+
+class EmailVerification(BaseModel):
+    token: str = Field(..., min_length=1, max_length=255)
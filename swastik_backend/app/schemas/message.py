@@ -0,0 +1,73 @@
+# app/schemas/message.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class MessageCreate(BaseModel):
+    content: str = Field(..., min_length=1, max_length=4000)
+    message_type: str = Field("text", pattern="^(text|image|file|poll|quiz)$")
+    file_url: Optional[str] = Field(None, max_length=255)
+    parent_id: Optional[int] = None
+
+class MessageUpdate(BaseModel):
+    content: str = Field(..., min_length=1, max_length=4000)
+
+class ReactionToggle(BaseModel):
+    emoji: str = Field(..., min_length=1, max_length=10)
+
+class ReactionSummary(BaseModel):
+    emoji: str
+    count: int
+    reacted: bool = False
+
+class ReactionToggleResponse(BaseModel):
+    message_id: int
+    room_id: int
+    emoji: str
+    added: bool
+    count: int
+
+class MessageResponse(BaseModel):
+    id: int
+    content: str
+    message_type: str
+    file_url: Optional[str] = None
+    user_id: int
+    room_id: int
+    room_seq: Optional[int] = None
+    parent_id: Optional[int] = None
+    thread_id: Optional[int] = None
+    reply_count: int = 0
+    last_reply_at: Optional[str] = None
+    is_edited: bool
+    created_at: str
+    reactions: List[ReactionSummary] = []
+
+class MessageHistoryResponse(BaseModel):
+    messages: List[MessageResponse]
+    older_cursor: Optional[str] = None
+    newer_cursor: Optional[str] = None
+
+class ThreadReply(MessageResponse):
+    depth: int
+
+class MessageThread(BaseModel):
+    root: MessageResponse
+    replies: List[ThreadReply]
+    truncated: bool
+
+class MessageSearchPage(BaseModel):
+    messages: List[MessageResponse]
+    page: int
+    page_size: int
+    has_more: bool
+
+class AttachmentResponse(BaseModel):
+    id: int
+    url: str  # send as a message's file_url
+    thumbnail_url: Optional[str] = None  # images only, when thumbnails are enabled
+    filename: str
+    content_type: str
+    size: int
+    sha256: str
+    room_id: int
+    created_at: Optional[str] = None
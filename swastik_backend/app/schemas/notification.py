@@ -0,0 +1,24 @@
+# app/schemas/notification.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class NotificationResponse(BaseModel):
+    id: int
+    title: Optional[str] = None
+    message: Optional[str] = None
+    notification_type: str
+    related_id: Optional[int] = None
+    related_type: Optional[str] = None
+    priority: str
+    count: int
+    is_read: bool
+    created_at: str
+
+class NotificationPage(BaseModel):
+    notifications: List[NotificationResponse]
+    next_cursor: Optional[str] = None
+
+class AnnouncementCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    message: str = Field(..., min_length=1, max_length=4000)
+    priority: str = Field("high", pattern="^(low|normal|high|urgent)$")
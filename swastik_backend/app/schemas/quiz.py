@@ -0,0 +1,78 @@
+# app/schemas/quiz.py
+from datetime import datetime
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+
+class QuizQuestionCreate(BaseModel):
+    question_text: str = Field(..., min_length=1)
+    question_type: str = Field("mcq", pattern="^(mcq|true_false|short_answer)$")
+    options: Optional[List[str]] = None
+    correct_answer: str = Field(..., min_length=1)
+    explanation: Optional[str] = None
+    points: int = Field(1, ge=0, le=100)
+
+class QuizCreate(BaseModel):
+    title: str = Field(..., min_length=1, max_length=200)
+    description: Optional[str] = None
+    subject: Optional[str] = Field(None, max_length=100)
+    difficulty: str = Field("medium", pattern="^(easy|medium|hard)$")
+    time_limit: Optional[int] = Field(None, ge=1)  # minutes
+    start_time: Optional[datetime] = None
+    end_time: Optional[datetime] = None
+    questions: List[QuizQuestionCreate] = Field(..., min_length=1, max_length=500)
+
+class QuizSummary(BaseModel):
+    id: int
+    title: str
+    description: Optional[str] = None
+    subject: Optional[str] = None
+    difficulty: str
+    time_limit: Optional[int] = None
+    total_questions: int
+    total_points: int
+    start_time: Optional[str] = None
+    end_time: Optional[str] = None
+
+class QuizQuestionPublic(BaseModel):
+    id: int
+    question_text: str
+    question_type: str
+    options: Optional[List[str]] = None
+    points: int
+    order_index: int
+
+class QuizPublic(QuizSummary):
+    """What students see: the quiz and its questions, without answers"""
+    questions: List[QuizQuestionPublic]
+
+class AttemptStarted(BaseModel):
+    attempt_id: int
+    quiz_id: int
+    started_at: str
+
+class AttemptSubmit(BaseModel):
+    answers: Dict[str, Any]  # question id -> answer
+
+class AttemptResult(BaseModel):
+    attempt_id: int
+    quiz_id: int
+    score: float
+    total_points: int
+    time_taken: Optional[int] = None
+    completed_at: str
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: int
+    score: float
+    time_taken: Optional[int] = None
+
+class LeaderboardStanding(LeaderboardEntry):
+    size: int
+    percentile: float
+
+class LeaderboardResponse(BaseModel):
+    quiz_id: int
+    size: int
+    top: List[LeaderboardEntry]
+    me: Optional[LeaderboardStanding] = None
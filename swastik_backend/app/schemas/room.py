@@ -0,0 +1,54 @@
+# app/schemas/room.py
+from pydantic import BaseModel, Field
+from typing import List, Optional
+
+class RoomCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100)
+    description: Optional[str] = None
+    room_type: str = Field("public", pattern="^(public|private|study_group)$")
+    subject: Optional[str] = Field(None, max_length=100)
+    max_members: Optional[int] = Field(100, ge=2, le=10000)
+
+class RoomUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=100)
+    description: Optional[str] = None
+    subject: Optional[str] = Field(None, max_length=100)
+    max_members: Optional[int] = Field(None, ge=2, le=10000)
+
+class RoomResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str] = None
+    room_type: str
+    subject: Optional[str] = None
+    university_domain: Optional[str] = None
+    max_members: int
+    member_count: int
+    last_activity_at: Optional[str] = None
+    created_at: str
+
+class RoomDirectoryPage(BaseModel):
+    rooms: List[RoomResponse]
+    page: int
+    page_size: int
+    total: int
+
+class ReadCursorUpdate(BaseModel):
+    message_id: Optional[int] = None  # omit to mark the whole room as read
+
+class ReadCursor(BaseModel):
+    room_id: int
+    last_read_seq: int
+    last_read_message_id: Optional[int] = None
+
+class UnreadCount(BaseModel):
+    room_id: int
+    unread_count: int
+    last_read_message_id: Optional[int] = None
+    last_activity_at: Optional[str] = None
+
+class RoomPresence(BaseModel):
+    room_id: int
+    online_count: int
+    online: List[int]  # user ids, at most `limit` of them
+    typing: List[int]
@@ -0,0 +1,137 @@
+# app/schemas/views.py
+"""Response views for the read-heavy list endpoints.
+
+Slotted dataclasses filled positionally from column-only SELECTs (the
+services keep the matching column tuples) and serialized by orjson through
+FastJSONResponse, with no Pydantic validation on the way out. Field names
+and order mirror the Pydantic response models, which still document the
+API; datetimes are left to orjson, which writes them as isoformat() does.
+
+__slots__ is written out rather than dataclass(slots=True), which needs
+Python 3.10; a slot cannot have a class-level default, so no field has one.
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Optional
+
+@dataclass
+class ReactionView:
+    __slots__ = ("emoji", "count", "reacted")
+    emoji: str
+    count: int
+    reacted: bool
+
+@dataclass
+class MessageView:
+    __slots__ = (
+        "id", "content", "message_type", "file_url", "user_id", "room_id", "room_seq", "parent_id",
+        "thread_id", "reply_count", "last_reply_at", "is_edited", "created_at", "reactions"
+    )
+    id: int
+    content: str
+    message_type: str
+    file_url: Optional[str]
+    user_id: int
+    room_id: int
+    room_seq: Optional[int]
+    parent_id: Optional[int]
+    thread_id: Optional[int]
+    reply_count: int
+    last_reply_at: Optional[datetime]
+    is_edited: bool
+    created_at: datetime
+    reactions: List[ReactionView]
+
+@dataclass
+class ThreadReplyView(MessageView):
+    __slots__ = ("depth",)
+    depth: int
+
+@dataclass
+class RoomView:
+    __slots__ = (
+        "id", "name", "description", "room_type", "subject", "university_domain", "max_members",
+        "member_count", "last_activity_at", "created_at"
+    )
+    id: int
+    name: str
+    description: Optional[str]
+    room_type: str
+    subject: Optional[str]
+    university_domain: Optional[str]
+    max_members: int
+    member_count: int
+    last_activity_at: Optional[datetime]
+    created_at: datetime
+
+@dataclass
+class UnreadView:
+    __slots__ = ("room_id", "unread_count", "last_read_message_id", "last_activity_at")
+    room_id: int
+    unread_count: int
+    last_read_message_id: Optional[int]
+    last_activity_at: Optional[datetime]
+
+@dataclass
+class UserInfoView:
+    __slots__ = ("id", "username", "email", "first_name", "last_name", "university_badge", "is_verified")
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    university_badge: str
+    is_verified: bool
+
+    @classmethod
+    def of(cls, user):
+        """From a User row or a cached UserPrincipal"""
+        return cls(
+            user.id, user.username, user.email, user.first_name,
+            user.last_name, user.university_badge, bool(user.is_verified)
+        )
+
+@dataclass
+class UserView(UserInfoView):
+    __slots__ = ("created_at",)
+    created_at: Optional[datetime]
+
+    @classmethod
+    def of(cls, user):
+        """From a User row or a cached UserPrincipal"""
+        return cls(
+            user.id, user.username, user.email, user.first_name,
+            user.last_name, user.university_badge, bool(user.is_verified), user.created_at
+        )
+
+@dataclass
+class QuizView:
+    __slots__ = (
+        "id", "title", "description", "subject", "difficulty", "time_limit", "total_questions",
+        "total_points", "start_time", "end_time"
+    )
+    id: int
+    title: str
+    description: Optional[str]
+    subject: Optional[str]
+    difficulty: str
+    time_limit: Optional[int]
+    total_questions: int
+    total_points: int
+    start_time: Optional[datetime]
+    end_time: Optional[datetime]
+
+@dataclass
+class QuizQuestionView:
+    __slots__ = ("id", "question_text", "question_type", "options", "points", "order_index")
+    id: int
+    question_text: str
+    question_type: str
+    options: Optional[List[str]]
+    points: int
+    order_index: int
+
+@dataclass
+class QuizPublicView(QuizView):
+    __slots__ = ("questions",)
+    questions: List[QuizQuestionView]
@@ -0,0 +1,472 @@
+# app/services/archive_service.py
+import asyncio
+import logging
+import time
+import zlib
+from dataclasses import fields
+from datetime import datetime, timedelta, timezone
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, exists, or_, select, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from typing import Dict, List, Optional, Tuple
+
+import orjson
+
+from app.models.message import Message, MessageArchiveSegment, MessageReaction, MessageReactionCount
+from app.models.room import Room, RoomMember
+from app.schemas.views import MessageView, ReactionView
+from app.services.search_service import search_backend_for
+from app.services.worker_lease import worker_lease
+from app.utils.database import SessionLocal, register_models
+from app.utils.metrics import Counter, Histogram
+from app.utils.pagination import decode_cursor, decode_forward_cursor
+
+logger = logging.getLogger(__name__)
+
+# Threads with no activity for this long leave the messages table
+ARCHIVE_AFTER_DAYS = config("MESSAGE_ARCHIVE_AFTER_DAYS", default=180, cast=float)
+# Sooner for rooms that have been closed (everyone left)
+ARCHIVE_INACTIVE_AFTER_DAYS = config("MESSAGE_ARCHIVE_INACTIVE_AFTER_DAYS", default=30, cast=float)
+# Threads per segment; a segment holds their replies too
+ARCHIVE_SEGMENT_SIZE = config("MESSAGE_ARCHIVE_SEGMENT_SIZE", default=1000, cast=int)
+# Soft-deleted messages are kept this long before they are removed for good
+PURGE_AFTER_HOURS = config("MESSAGE_PURGE_AFTER_HOURS", default=24, cast=float)
+PURGE_BATCH_SIZE = config("MESSAGE_PURGE_BATCH_SIZE", default=500, cast=int)
+# Pause between purge batches, so writers are never queued behind the job for long
+PURGE_BATCH_PAUSE = config("MESSAGE_PURGE_BATCH_PAUSE_MS", default=50, cast=int) / 1000
+# inprocess: a periodic task in the API; celery: app.worker beat; off: scripts.manage_db compact.
+# Whichever runs it, a lease lets only one pass run at a time across workers
+MESSAGE_COMPACTION = config("MESSAGE_COMPACTION", default="inprocess")
+COMPACTION_INTERVAL = config("MESSAGE_COMPACTION_INTERVAL", default=3600, cast=float)
+# Longest a pass may hold the lease; if its worker dies, the next pass waits this long
+COMPACTION_LEASE = config("MESSAGE_COMPACTION_LEASE_SECONDS", default=3600, cast=float)
+
+# Nothing newer than this is ever archived, so history pages that stay
+# within it never look at the archive
+ARCHIVE_MIN_AGE = timedelta(days=min(ARCHIVE_AFTER_DAYS, ARCHIVE_INACTIVE_AFTER_DAYS))
+# Segments fetched per query while serving history; two cover a page that straddles a boundary
+SCAN_BATCH = 2
+
+# Archived messages keep exactly what history shows
+VIEW_FIELDS = tuple(f.name for f in fields(MessageView) if f.name != "reactions")
+ARCHIVE_COLUMNS = tuple(getattr(Message, name) for name in VIEW_FIELDS) + (Message.is_deleted,)
+_DATETIME_FIELDS = ("last_reply_at", "created_at")
+
+MESSAGES_ARCHIVED = Counter("messages_archived_total", "Messages moved into archive segments")
+MESSAGES_PURGED = Counter("messages_purged_total", "Deleted messages removed from the database")
+SEGMENTS_WRITTEN = Counter("message_archive_segments_written_total", "Archive segments written")
+ARCHIVE_READS = Counter("message_archive_reads_total", "History pages that read archive segments")
+COMPACTION_DURATION = Histogram(
+    "message_compaction_seconds", "Time for one compaction pass",
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600)
+)
+
+def _utc(value: datetime) -> datetime:
+    """Naive UTC, comparable whichever way the database returned it"""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def _position(message) -> Tuple[datetime, int]:
+    return _utc(message.created_at), message.id
+
+def _room_order(message) -> int:
+    return message.room_seq
+
+def archive_horizon() -> datetime:
+    """Every archived message is older than this (naive UTC)"""
+    return datetime.utcnow() - ARCHIVE_MIN_AGE
+
+def encode_segment(rows: list, reactions: Dict[int, list]) -> bytes:
+    return zlib.compress(orjson.dumps([
+        dict({name: getattr(row, name) for name in VIEW_FIELDS}, reactions=reactions.get(row.id, []))
+        for row in rows
+    ]))
+
+def decode_segment(payload: bytes, viewer_id: Optional[int] = None) -> List[MessageView]:
+    messages = []
+    for item in orjson.loads(zlib.decompress(payload)):
+        for name in _DATETIME_FIELDS:
+            if item[name] is not None:
+                item[name] = datetime.fromisoformat(item[name])
+        reactions = [
+            ReactionView(emoji, count, viewer_id in users) for emoji, count, users in item.pop("reactions")
+        ]
+        messages.append(MessageView(**item, reactions=reactions))
+    return messages
+
+class _ArchiveScan:
+    """Merges archived messages into one history page, a few segments at a time.
+
+    Segments are visited nearest the cursor first (by their last position
+    going back, by their first going forward) and the scan stops as soon as
+    the next segment cannot hold anything closer than the page already has,
+    so a page the messages table fills opens no segment at all.
+    """
+
+    def __init__(
+        self,
+        room_id: int,
+        messages: List[MessageView],
+        limit: int,
+        before: Optional[str],
+        after: Optional[str],
+        viewer_id: Optional[int]
+    ):
+        self.room_id = room_id
+        self.need = limit + 1
+        self.viewer_id = viewer_id
+        self.forward = after is not None
+        # Forward pages follow room_seq; segments are still found by position
+        self.after_seq = None
+        self.cursor = None
+        if after:
+            self.after_seq, created_at, row_id = decode_forward_cursor(after)
+            self.cursor = (created_at, row_id)
+        elif before:
+            self.cursor = decode_cursor(before)
+        self.resume = None
+        self.messages = list(messages)
+        self.archived = 0
+
+    def statement(self):
+        segment = MessageArchiveSegment
+        first = tuple_(segment.first_created_at, segment.first_id)
+        last = tuple_(segment.last_created_at, segment.last_id)
+        statement = select(
+            segment.first_created_at, segment.first_id, segment.last_created_at, segment.last_id, segment.payload
+        ).where(segment.room_id == self.room_id)
+
+        # A full page only takes segments reaching closer than its farthest message
+        farthest = None
+        if len(self.messages) >= self.need:
+            farthest = (self.messages[-1].created_at, self.messages[-1].id)
+
+        if self.forward:
+            if self.cursor:
+                statement = statement.where(last > self.cursor)
+            if self.resume:
+                statement = statement.where(first > self.resume)
+            if farthest:
+                statement = statement.where(first < farthest)
+            statement = statement.order_by(segment.first_created_at, segment.first_id)
+        else:
+            if self.cursor:
+                statement = statement.where(first < self.cursor)
+            if self.resume:
+                statement = statement.where(last < self.resume)
+            if farthest:
+                statement = statement.where(last > farthest)
+            statement = statement.order_by(segment.last_created_at.desc(), segment.last_id.desc())
+        return statement.limit(SCAN_BATCH)
+
+    def add(self, segments) -> bool:
+        """Take the next segments; False once no further segment can matter"""
+        cursor = (_utc(self.cursor[0]), self.cursor[1]) if self.cursor else None
+        for segment in segments:
+            if self.forward:
+                self.resume = (segment.first_created_at, segment.first_id)
+                nearest = (_utc(segment.first_created_at), segment.first_id)
+                if len(self.messages) >= self.need and nearest > _position(self.messages[-1]):
+                    return False
+                found = [
+                    m for m in decode_segment(segment.payload, self.viewer_id)
+                    if m.room_seq is not None and (self.after_seq is None or m.room_seq > self.after_seq)
+                ]
+            else:
+                self.resume = (segment.last_created_at, segment.last_id)
+                nearest = (_utc(segment.last_created_at), segment.last_id)
+                if len(self.messages) >= self.need and nearest < _position(self.messages[-1]):
+                    return False
+                found = [m for m in decode_segment(segment.payload, self.viewer_id) if cursor is None or _position(m) < cursor]
+            self.archived += len(found)
+            key = _room_order if self.forward else _position
+            self.messages = sorted(self.messages + found, key=key, reverse=not self.forward)[:self.need]
+        return len(segments) == SCAN_BATCH
+
+class ArchiveService:
+    """Cold storage for old room history.
+
+    Threads whose last message (deleted ones included) is older than the
+    room's retention move, whole, out of `messages` into append-only
+    `message_archive_segments` rows: zlib-compressed JSON of what history
+    shows, reactions included. A thread is never split, so nothing left in
+    `messages` points into the archive. Archived messages are read-only:
+    history serves them, while threads, search, replies and reactions only
+    cover messages still in the table.
+    """
+
+    @staticmethod
+    def may_hold(messages: List[MessageView], limit: int, before: Optional[str], after: Optional[str]) -> bool:
+        """Whether archived messages could belong on a history page.
+
+        `messages` is the page read from the messages table (limit + 1 rows
+        at most). A page that stays newer than the archive horizon is
+        served without looking at the archive.
+        """
+        horizon = archive_horizon()
+        if after:
+            return _utc(decode_forward_cursor(after)[1]) < horizon
+        return len(messages) <= limit or _utc(messages[limit].created_at) < horizon
+
+    @staticmethod
+    def history(
+        db: Session,
+        room_id: int,
+        messages: List[MessageView],
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        viewer_id: Optional[int] = None
+    ) -> List[MessageView]:
+        """A history page read from the messages table, with archived messages merged in.
+
+        Both `messages` and the result are in the history query's order
+        (newest first, oldest first with `after`) and hold limit + 1 at most.
+        Archived messages come with their reactions.
+        """
+        scan = _ArchiveScan(room_id, messages, limit, before, after, viewer_id)
+        while scan.add(db.execute(scan.statement()).all()):
+            pass
+        if scan.archived:
+            ARCHIVE_READS.inc()
+        return scan.messages
+
+    @staticmethod
+    async def history_async(
+        db: AsyncSession,
+        room_id: int,
+        messages: List[MessageView],
+        limit: int,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        viewer_id: Optional[int] = None
+    ) -> List[MessageView]:
+        """history on an AsyncSession"""
+        scan = _ArchiveScan(room_id, messages, limit, before, after, viewer_id)
+        while scan.add((await db.execute(scan.statement())).all()):
+            pass
+        if scan.archived:
+            ARCHIVE_READS.inc()
+        return scan.messages
+
+    @staticmethod
+    def archive_room(db: Session, room_id: int, cutoff: datetime, segment_size: int = ARCHIVE_SEGMENT_SIZE) -> int:
+        """Move the room's threads last active before `cutoff` into segments; returns messages archived.
+
+        Each segment is written and its messages deleted in one short
+        transaction, oldest threads first.
+        """
+        archived = 0
+        position = None
+        while True:
+            roots = select(Message.created_at, Message.id).where(
+                Message.room_id == room_id,
+                Message.thread_id.is_(None),
+                Message.created_at < cutoff
+            )
+            if position is not None:
+                roots = roots.where(tuple_(Message.created_at, Message.id) > position)
+            roots = db.execute(roots.order_by(Message.created_at, Message.id).limit(segment_size)).all()
+            if not roots:
+                db.commit()
+                return archived
+            position = tuple(roots[-1])
+
+            root_ids = [root.id for root in roots]
+            rows = db.execute(
+                select(*ARCHIVE_COLUMNS).where(or_(Message.id.in_(root_ids), Message.thread_id.in_(root_ids)))
+            ).all()
+            # A reply since the cutoff keeps its whole thread in the table
+            active = {row.thread_id or row.id for row in rows if _utc(row.created_at) >= _utc(cutoff)}
+            rows = [row for row in rows if (row.thread_id or row.id) not in active]
+            if not rows:
+                continue
+
+            moved = ArchiveService._move(db, room_id, rows)
+            if moved is None:
+                # Another worker is archiving this room
+                return archived
+            archived += moved
+
+    @staticmethod
+    def _move(db: Session, room_id: int, rows: list) -> Optional[int]:
+        """Write one segment and delete its rows; None if they were already gone"""
+        ids = [row.id for row in rows]
+        # Deleted messages are dropped rather than archived
+        kept = sorted((row for row in rows if not row.is_deleted), key=_position)
+        if kept:
+            reactions: Dict[int, Dict[str, list]] = {}
+            for reaction in db.execute(
+                select(MessageReaction.message_id, MessageReaction.emoji, MessageReaction.user_id)
+                .where(MessageReaction.message_id.in_([row.id for row in kept]))
+                .order_by(MessageReaction.message_id, MessageReaction.id)
+            ):
+                reactions.setdefault(reaction.message_id, {}).setdefault(reaction.emoji, []).append(reaction.user_id)
+            summaries = {
+                message_id: sorted(
+                    ([emoji, len(users), users] for emoji, users in emojis.items()),
+                    key=lambda summary: (-summary[1], summary[0])
+                )
+                for message_id, emojis in reactions.items()
+            }
+            db.add(MessageArchiveSegment(
+                room_id=room_id,
+                first_created_at=kept[0].created_at,
+                first_id=kept[0].id,
+                last_created_at=kept[-1].created_at,
+                last_id=kept[-1].id,
+                message_count=len(kept),
+                payload=encode_segment(kept, summaries)
+            ))
+            search_backend_for(db).unindex(db, [(row.id, row.content) for row in kept])
+
+        try:
+            ArchiveService._clear_references(db, ids, [room_id])
+            deleted = db.execute(
+                delete(Message).where(Message.id.in_(ids)).execution_options(synchronize_session=False)
+            ).rowcount
+            # SQLite does not enforce foreign keys: check no reply slipped in meanwhile
+            orphaned = deleted == len(ids) and ArchiveService._referenced(db, ids)
+        except IntegrityError:
+            deleted, orphaned = len(ids), True
+        if deleted != len(ids) or orphaned:
+            db.rollback()
+            return 0 if orphaned else None
+        db.commit()
+
+        MESSAGES_ARCHIVED.inc(len(kept))
+        MESSAGES_PURGED.inc(len(ids) - len(kept))
+        if kept:
+            SEGMENTS_WRITTEN.inc()
+        return len(kept)
+
+    @staticmethod
+    def _clear_references(db: Session, ids: List[int], room_ids: List[int]) -> None:
+        """Drop reactions and read cursors pointing at messages about to be deleted"""
+        db.execute(delete(MessageReaction).where(MessageReaction.message_id.in_(ids)))
+        db.execute(delete(MessageReactionCount).where(MessageReactionCount.message_id.in_(ids)))
+        # Unread counts come from last_read_seq; only the message pointer goes
+        db.execute(
+            update(RoomMember)
+            .where(RoomMember.room_id.in_(room_ids), RoomMember.last_read_message_id.in_(ids))
+            .values(last_read_message_id=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def _referenced(db: Session, ids: List[int]) -> bool:
+        return db.execute(
+            select(Message.id).where(or_(Message.parent_id.in_(ids), Message.thread_id.in_(ids))).limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def purge_deleted(
+        db: Session,
+        deleted_before: datetime,
+        after_id: int = 0,
+        batch_size: int = PURGE_BATCH_SIZE
+    ) -> Tuple[int, Optional[int]]:
+        """Remove one batch of soft-deleted messages for good.
+
+        Walks the primary key from `after_id`, so a whole pass reads the
+        table once; returns how many were removed and where to continue
+        (None at the end). A deleted message that still has replies stays
+        until they are gone. Each batch is its own transaction.
+        """
+        replies = aliased(Message)
+        rows = db.execute(
+            select(Message.id, Message.room_id).where(
+                Message.id > after_id,
+                Message.is_deleted == True,
+                or_(
+                    Message.updated_at < deleted_before,
+                    Message.updated_at.is_(None) & (Message.created_at < deleted_before)
+                ),
+                ~exists().where(replies.parent_id == Message.id),
+                ~exists().where(replies.thread_id == Message.id)
+            ).order_by(Message.id).limit(batch_size)
+        ).all()
+        if not rows:
+            db.commit()
+            return 0, None
+
+        ids = [row.id for row in rows]
+        ArchiveService._clear_references(db, ids, list({row.room_id for row in rows}))
+        purged = db.execute(
+            delete(Message)
+            .where(Message.id.in_(ids), Message.is_deleted == True)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+
+        MESSAGES_PURGED.inc(purged)
+        return purged, ids[-1] if len(rows) == batch_size else None
+
+def compact_messages(session_factory=SessionLocal, pause: float = PURGE_BATCH_PAUSE) -> dict:
+    """One compaction pass: purge deleted messages, then archive every room's old threads.
+
+    Skipped, returning zeros, while another worker's pass holds the lease.
+    """
+    # Celery and the CLI load no routes, and with them not every model
+    register_models()
+    with worker_lease("message_compaction", COMPACTION_LEASE, session_factory) as acquired:
+        if not acquired:
+            return {"purged": 0, "archived": 0}
+        return _compact(session_factory, pause)
+
+def _compact(session_factory, pause: float) -> dict:
+    started = time.perf_counter()
+    now = datetime.now(timezone.utc)
+    purged = archived = 0
+    with session_factory() as db:
+        after_id = 0
+        while after_id is not None:
+            count, after_id = ArchiveService.purge_deleted(db, now - timedelta(hours=PURGE_AFTER_HOURS), after_id)
+            purged += count
+            if after_id is not None:
+                time.sleep(pause)
+
+        rooms = db.execute(select(Room.id, Room.is_active).order_by(Room.id)).all()
+        db.commit()
+        for room in rooms:
+            days = ARCHIVE_AFTER_DAYS if room.is_active else ARCHIVE_INACTIVE_AFTER_DAYS
+            archived += ArchiveService.archive_room(db, room.id, now - timedelta(days=days))
+
+    elapsed = time.perf_counter() - started
+    COMPACTION_DURATION.observe(elapsed)
+    if purged or archived:
+        logger.info("Compaction purged %d and archived %d messages in %.1fs", purged, archived, elapsed)
+    return {"purged": purged, "archived": archived}
+
+class MessageCompactor:
+    """In-process compaction for deployments without Celery: one pass every COMPACTION_INTERVAL seconds"""
+
+    def __init__(self, interval: float = COMPACTION_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await run_in_threadpool(compact_messages)
+            except Exception:
+                logger.exception("Message compaction failed")
+
+message_compactor = MessageCompactor()
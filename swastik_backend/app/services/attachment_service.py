@@ -0,0 +1,176 @@
+# app/services/attachment_service.py
+import asyncio
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+from pathlib import Path
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, Optional, Set
+
+from app.models.attachment import Attachment
+from app.models.room import Room, RoomMember
+from app.utils.metrics import Counter
+from app.utils.storage import ContentStore
+from app.utils.thumbnails import make_thumbnail
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = config("THUMBNAIL_SIZE", default=320, cast=int)
+THUMBNAIL_WORKERS = config("THUMBNAIL_WORKERS", default=1, cast=int)
+# Images get a thumbnail and are shown inline; anything else downloads
+IMAGE_TYPES = frozenset({"image/jpeg", "image/png", "image/gif", "image/webp", "image/bmp"})
+
+_CONTENT_TYPE = re.compile(r"^[\w.+-]+/[\w.+-]+$")
+
+ATTACHMENT_BYTES = Counter("attachment_upload_bytes_total", "Bytes received in attachment uploads")
+ATTACHMENT_DEDUPLICATED = Counter(
+    "attachment_deduplicated_total", "Uploads whose content was already stored"
+)
+THUMBNAIL_FAILURES = Counter("attachment_thumbnail_failures_total", "Images a thumbnail could not be made of")
+
+attachment_store = ContentStore()
+
+class AttachmentService:
+    @staticmethod
+    def normalize_content_type(content_type: Optional[str]) -> str:
+        """The media type of a Content-Type header, or application/octet-stream"""
+        media_type = (content_type or "").split(";")[0].strip().lower()
+        if len(media_type) > 100 or not _CONTENT_TYPE.match(media_type):
+            return "application/octet-stream"
+        return media_type
+
+    @staticmethod
+    def clean_filename(filename: str) -> str:
+        """The final component of a client-supplied file name"""
+        name = filename.replace("\\", "/").rsplit("/", 1)[-1].strip()
+        if not name or name in (".", ".."):
+            raise ValueError("Invalid file name")
+        return name
+
+    @staticmethod
+    async def create_attachment(
+        db: AsyncSession,
+        room_id: int,
+        user_id: int,
+        filename: str,
+        content_type: str,
+        digest: str,
+        size: int
+    ) -> Attachment:
+        """Record an upload whose content is already in the store"""
+        deduplicated = (await db.execute(
+            select(Attachment.id).where(Attachment.sha256 == digest).limit(1)
+        )).first() is not None
+
+        attachment = Attachment(
+            sha256=digest,
+            size=size,
+            filename=filename,
+            content_type=content_type,
+            room_id=room_id,
+            uploaded_by=user_id
+        )
+        db.add(attachment)
+        await db.commit()
+
+        ATTACHMENT_BYTES.inc(size)
+        if deduplicated:
+            ATTACHMENT_DEDUPLICATED.inc()
+        return attachment
+
+    @staticmethod
+    async def get_for_member(db: AsyncSession, attachment_id: int, user_id: int) -> Optional[Attachment]:
+        """An attachment, if the user belongs to the (active) room it was posted in"""
+
+        return (await db.execute(
+            select(Attachment)
+            .join(RoomMember, (RoomMember.room_id == Attachment.room_id) & (RoomMember.user_id == user_id))
+            .join(Room, (Room.id == Attachment.room_id) & (Room.is_active == True))
+            .where(Attachment.id == attachment_id)
+        )).scalars().first()
+
+    @staticmethod
+    def to_dict(attachment: Attachment) -> dict:
+        """Plain representation of an attachment for API responses"""
+        has_thumbnail = thumbnailer.enabled and attachment.content_type in IMAGE_TYPES
+        return {
+            "id": attachment.id,
+            "url": f"/attachments/{attachment.id}",
+            "thumbnail_url": f"/attachments/{attachment.id}/thumbnail" if has_thumbnail else None,
+            "filename": attachment.filename,
+            "content_type": attachment.content_type,
+            "size": attachment.size,
+            "sha256": attachment.sha256,
+            "room_id": attachment.room_id,
+            "created_at": attachment.created_at.isoformat() if attachment.created_at else None
+        }
+
+class Thumbnailer:
+    """Image thumbnails, made in a process pool off the event loop.
+
+    Decoding and resizing hold the GIL, so they run in worker processes
+    rather than threads. Pillow is optional: without it there are no
+    thumbnails and images are served at full size only. The pool starts on
+    the first thumbnail, not with the app, and each image is processed at
+    most once at a time however many requests ask for it.
+    """
+
+    def __init__(self, store: ContentStore = attachment_store, size: int = THUMBNAIL_SIZE, workers: int = THUMBNAIL_WORKERS):
+        self.store = store
+        self.size = size
+        self.workers = workers
+        # find_spec locates Pillow without importing it into the API process
+        self.enabled = find_spec("PIL") is not None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Content that is not a decodable image is not tried again
+        self._failed: Set[str] = set()
+
+    def schedule(self, digest: str) -> None:
+        """Start making a thumbnail in the background, right after an upload"""
+        if self.enabled and digest not in self._pending:
+            task = asyncio.ensure_future(self.get(digest))
+            # Failures are logged by get(); nothing awaits this task
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+
+    async def get(self, digest: str) -> Optional[Path]:
+        """Path of the image's thumbnail, made now if needed; None if there can be none"""
+        if not self.enabled or digest in self._failed:
+            return None
+        target = self.store.thumbnail_path(digest, self.size)
+        if await run_in_threadpool(target.exists):
+            return target
+
+        pending = self._pending.get(digest)
+        if pending is None:
+            pending = asyncio.ensure_future(self._make(digest, target))
+            self._pending[digest] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(digest, None))
+        return await asyncio.shield(pending)
+
+    async def _make(self, digest: str, target: Path) -> Optional[Path]:
+        if self._pool is None:
+            # spawn, not fork: forking a process that runs threads and an event loop is unsafe
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._pool, make_thumbnail, str(self.store.blob_path(digest)), str(target), self.size
+            )
+        except Exception:
+            THUMBNAIL_FAILURES.inc()
+            self._failed.add(digest)
+            logger.warning("Could not make a thumbnail of %s", digest, exc_info=True)
+            return None
+        return target
+
+    async def stop(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+thumbnailer = Thumbnailer()
@@ -1,35 +1,33 @@
 # app/services/auth_service.py
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from app.models.user import User
 from app.schemas.auth import UserCreate, UserLogin
 from app.utils.security import (
-    get_password_hash, 
-    verify_password, 
+    password_hasher,
     create_access_token,
     generate_verification_token,
     extract_university_info
 )
-from app.services.email_service import send_verification_email
+from app.services.email_service import send_verification_email, notify_outbox
+from app.services.presence import presence
 from typing import Optional
 import re
 
 class AuthService:
     
     @staticmethod
-    def register_user(db: Session, user_data: UserCreate) -> dict:
+    async def register_user(db: Session, user_data: UserCreate) -> dict:
         """Register a new user with university email verification"""
         
         # Validate university email
         if not AuthService.is_university_email(user_data.email):
             raise ValueError("Please use a valid university email address")
         
-        # Check if username already exists
-        if db.query(User).filter(User.username == user_data.username).first():
-            raise ValueError("Username already taken")
-        
-        # Check if email already exists
-        if db.query(User).filter(User.email == user_data.email).first():
-            raise ValueError("Email already registered")
+        # Check if username or email already exists
+        taken = AuthService._already_registered(db, user_data)
+        if taken:
+            raise ValueError(taken)
         
         # Extract university information
         university_domain, university_badge = extract_university_info(user_data.email)
@@ -37,11 +35,15 @@ class AuthService:
         # Generate verification token
         verification_token = generate_verification_token()
         
+        # Hash off the event loop, without holding a pooled connection meanwhile
+        db.commit()
+        password_hash = await password_hasher.hash(user_data.password)
+        
         # Create new user
         new_user = User(
             username=user_data.username,
             email=user_data.email,
-            password_hash=get_password_hash(user_data.password),
+            password_hash=password_hash,
             first_name=user_data.first_name,
             last_name=user_data.last_name,
             university_domain=university_domain,
@@ -51,32 +53,58 @@ class AuthService:
         )
         
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
         
-        # Send verification email
-        email_sent = send_verification_email(
+        # Queue the verification email in the same transaction; it is
+        # delivered in the background so SMTP never delays registration
+        send_verification_email(
+            db,
             user_data.email, 
             user_data.first_name, 
             verification_token
         )
         
+        try:
+            db.commit()
+        except IntegrityError:
+            # A concurrent registration for the same name or email committed
+            # while the password was being hashed
+            db.rollback()
+            taken = AuthService._already_registered(db, user_data)
+            if not taken:
+                raise
+            raise ValueError(taken)
+        db.refresh(new_user)
+        notify_outbox()
+        
         return {
             "user_id": new_user.id,
             "message": "Registration successful! Please check your email to verify your account.",
             "verification_required": True,
-            "email_sent": email_sent
+            "email_queued": True
         }
     
     @staticmethod
-    def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
+    def _already_registered(db: Session, user_data: UserCreate) -> Optional[str]:
+        """Why the username or email cannot be registered, if it cannot"""
+        if db.query(User).filter(User.username == user_data.username).first():
+            return "Username already taken"
+        if db.query(User).filter(User.email == user_data.email).first():
+            return "Email already registered"
+        return None
+    
+    @staticmethod
+    async def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
         """Authenticate user login"""
         user = db.query(User).filter(User.username == username).first()
         
         if not user:
             return None
         
-        if not verify_password(password, user.password_hash):
+        # Hash off the event loop, without holding a pooled connection meanwhile
+        password_hash = user.password_hash
+        db.commit()
+        is_valid, new_hash = await password_hasher.verify(password, password_hash)
+        if not is_valid:
             return None
         
         if not user.is_verified:
@@ -85,10 +113,13 @@ class AuthService:
         if not user.is_active:
             raise ValueError("Account is deactivated")
         
-        # Update last seen
-        from datetime import datetime
-        user.last_seen = datetime.utcnow()
-        db.commit()
+        # Transparently rehash when BCRYPT_ROUNDS has changed
+        if new_hash:
+            user.password_hash = new_hash
+            db.commit()
+        
+        # last_seen is written in bulk by the presence service, not per login
+        presence.touch(user.id)
         
         return user
     
@@ -0,0 +1,165 @@
+# app/services/connection_manager.py
+import asyncio
+import logging
+from typing import Dict, Optional, Set
+from fastapi import WebSocket
+from decouple import config
+
+import orjson
+
+from app.utils.broker import Broker, get_broker
+
+logger = logging.getLogger(__name__)
+
+SEND_QUEUE_SIZE = config("WS_SEND_QUEUE_SIZE", default=256, cast=int)
+
+# Close code sent to consumers that cannot keep up ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+# Close code sent to users who lost access to the channel ("Policy Violation")
+REVOKED_CLOSE_CODE = 1008
+
+# Broker channel on which workers ask each other to close a user's sockets
+CONTROL_CHANNEL = "connections"
+
+def room_channel(room_id: int) -> str:
+    """Broker channel carrying a room's real-time events"""
+    return f"room:{room_id}"
+
+def quiz_channel(quiz_id: int) -> str:
+    """Broker channel carrying a quiz's leaderboard updates"""
+    return f"quiz:{quiz_id}"
+
+class Connection:
+    """One WebSocket and its bounded outbound queue"""
+
+    __slots__ = ("websocket", "user_id", "queue", "sender")
+
+    def __init__(self, websocket: WebSocket, user_id: int, queue_size: int):
+        self.websocket = websocket
+        self.user_id = user_id
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.sender: Optional[asyncio.Task] = None
+
+    def offer(self, payload: str) -> bool:
+        """Queue a payload without waiting; False if the consumer is too slow"""
+        try:
+            self.queue.put_nowait(payload)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    async def run_sender(self) -> None:
+        try:
+            while True:
+                await self.websocket.send_text(await self.queue.get())
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The socket went away; the receive loop handles cleanup
+            pass
+
+class ConnectionManager:
+    """Per-process registry of WebSocket connections grouped by channel.
+
+    Every event is published to the broker once, and each worker fans it out
+    to its own local connections, so delivery never touches the database.
+    """
+
+    def __init__(self, broker: Optional[Broker] = None, queue_size: int = SEND_QUEUE_SIZE):
+        self.broker = broker
+        self.queue_size = queue_size
+        self._channels: Dict[str, Set[Connection]] = {}
+
+    async def start(self) -> None:
+        if self.broker is None:
+            self.broker = get_broker()
+        await self.broker.start(self.dispatch)
+        await self.broker.subscribe(CONTROL_CHANNEL)
+
+    async def stop(self) -> None:
+        for connections in list(self._channels.values()):
+            for connection in list(connections):
+                self._drop(connection)
+        self._channels.clear()
+        if self.broker is not None:
+            await self.broker.stop()
+
+    async def connect(self, channel: str, websocket: WebSocket, user_id: int) -> Connection:
+        """Register an accepted WebSocket on a channel"""
+        connection = Connection(websocket, user_id, self.queue_size)
+        connection.sender = asyncio.create_task(connection.run_sender())
+
+        connections = self._channels.get(channel)
+        if connections is None:
+            connections = self._channels[channel] = set()
+            connections.add(connection)
+            await self.broker.subscribe(channel)
+        else:
+            connections.add(connection)
+
+        return connection
+
+    async def disconnect(self, channel: str, connection: Connection) -> None:
+        """Remove a connection, unsubscribing once the channel has no local listeners"""
+        connection.sender.cancel()
+
+        connections = self._channels.get(channel)
+        if connections is None:
+            return
+
+        connections.discard(connection)
+        if not connections:
+            del self._channels[channel]
+            await self.broker.unsubscribe(channel)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        """Send an already-encoded event to every subscriber on every worker"""
+        await self.broker.publish(channel, payload)
+
+    async def disconnect_user(self, channel: str, user_id: int) -> None:
+        """Close a user's sockets on a channel on every worker, e.g. once they leave the room"""
+        await self.broker.publish(CONTROL_CHANNEL, orjson.dumps({"channel": channel, "user_id": user_id}).decode())
+
+    def dispatch(self, channel: str, payload: str) -> None:
+        """Fan a broker message out to the local connections of a channel"""
+        if channel == CONTROL_CHANNEL:
+            request = orjson.loads(payload)
+            self._revoke(request["channel"], request["user_id"])
+            return
+
+        connections = self._channels.get(channel)
+        if not connections:
+            return
+
+        slow = [connection for connection in connections if not connection.offer(payload)]
+        for connection in slow:
+            logger.warning("Dropping slow consumer user=%s on %s", connection.user_id, channel)
+            connections.discard(connection)
+            self._drop(connection)
+
+    def connection_count(self, channel: Optional[str] = None) -> int:
+        if channel is not None:
+            return len(self._channels.get(channel, ()))
+        return sum(len(connections) for connections in self._channels.values())
+
+    def _revoke(self, channel: str, user_id: int) -> None:
+        connections = self._channels.get(channel)
+        if not connections:
+            return
+
+        for connection in [connection for connection in connections if connection.user_id == user_id]:
+            connections.discard(connection)
+            self._drop(connection, REVOKED_CLOSE_CODE)
+
+    def _drop(self, connection: Connection, code: int = SLOW_CONSUMER_CLOSE_CODE) -> None:
+        connection.sender.cancel()
+        asyncio.create_task(self._close(connection.websocket, code))
+
+    @staticmethod
+    async def _close(websocket: WebSocket, code: int) -> None:
+        try:
+            await websocket.close(code=code)
+        except Exception:
+            pass
+
+manager = ConnectionManager()
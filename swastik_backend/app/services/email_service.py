@@ -0,0 +1,224 @@
+# app/services/email_service.py
+import asyncio
+import html
+import logging
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import TYPE_CHECKING, Optional
+
+from app.models.email_outbox import OutboxEmail
+from app.services.worker_lease import worker_lease
+from app.utils.database import SessionLocal
+
+if TYPE_CHECKING:
+    import smtplib
+
+logger = logging.getLogger(__name__)
+
+EMAIL_HOST = config("EMAIL_HOST", default="localhost")
+EMAIL_PORT = config("EMAIL_PORT", default=587, cast=int)
+EMAIL_USERNAME = config("EMAIL_USERNAME", default="")
+EMAIL_PASSWORD = config("EMAIL_PASSWORD", default="")
+EMAIL_FROM = config("EMAIL_FROM", default=EMAIL_USERNAME or "no-reply@swastik.local")
+EMAIL_USE_TLS = config("EMAIL_USE_TLS", default=True, cast=bool)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=10, cast=float)
+FRONTEND_URL = config("FRONTEND_URL", default="http://localhost:3000")
+
+# inprocess: asyncio dispatcher inside each API worker; celery: app.worker tasks.
+# Either way a lease lets one process at a time send a batch
+EMAIL_DELIVERY = config("EMAIL_DELIVERY", default="inprocess")
+EMAIL_BATCH_SIZE = config("EMAIL_BATCH_SIZE", default=50, cast=int)
+EMAIL_MAX_ATTEMPTS = config("EMAIL_MAX_ATTEMPTS", default=8, cast=int)
+EMAIL_RETRY_BASE = config("EMAIL_RETRY_BASE_SECONDS", default=30, cast=float)
+EMAIL_RETRY_MAX = config("EMAIL_RETRY_MAX_SECONDS", default=3600, cast=float)
+EMAIL_POLL_INTERVAL = config("EMAIL_POLL_INTERVAL", default=15, cast=float)
+# Longest one batch may hold the lease: every send timing out, plus connect and quit
+EMAIL_LEASE = config("EMAIL_LEASE_SECONDS", default=EMAIL_TIMEOUT * (EMAIL_BATCH_SIZE + 4), cast=float)
+
+def enqueue_email(db: Session, recipient: str, subject: str, html_body: str, text_body: str) -> OutboxEmail:
+    """Add an email to the outbox as part of the caller's transaction"""
+    email = OutboxEmail(
+        recipient=recipient,
+        subject=subject,
+        html_body=html_body,
+        text_body=text_body,
+        status="pending",
+        attempts=0
+    )
+    db.add(email)
+    return email
+
+def send_verification_email(db: Session, email: str, first_name: str, token: str) -> OutboxEmail:
+    """Queue the account verification email; it is sent once the caller commits"""
+    link = f"{FRONTEND_URL}/verify-email?token={token}"
+    # first_name is user input; the HTML part must not render it as markup
+    return enqueue_email(
+        db,
+        recipient=email,
+        subject="Verify your Swastik account",
+        html_body=(
+            f"<p>Hi {html.escape(first_name)},</p>"
+            f"<p>Welcome to Swastik! Please verify your university email by clicking "
+            f"<a href=\"{html.escape(link)}\">this link</a>.</p>"
+        ),
+        text_body=f"Hi {first_name},\n\nWelcome to Swastik! Verify your university email here: {link}\n"
+    )
+
+def _retry_delay(attempts: int) -> float:
+    return min(EMAIL_RETRY_BASE * 2 ** (attempts - 1), EMAIL_RETRY_MAX)
+
+def _build_message(email: OutboxEmail) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = EMAIL_FROM
+    message["To"] = email.recipient
+    message["Subject"] = email.subject
+    message.set_content(email.text_body or "")
+    if email.html_body:
+        message.add_alternative(email.html_body, subtype="html")
+    return message
+
+def _open_smtp() -> "smtplib.SMTP":
+    import smtplib
+
+    smtp = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT, timeout=EMAIL_TIMEOUT)
+    if EMAIL_USE_TLS:
+        smtp.starttls()
+    if EMAIL_USERNAME:
+        smtp.login(EMAIL_USERNAME, EMAIL_PASSWORD)
+    return smtp
+
+def _mark_failed(email: OutboxEmail, error: str) -> None:
+    email.attempts = (email.attempts or 0) + 1
+    email.last_error = error[:1000]
+    if email.attempts >= EMAIL_MAX_ATTEMPTS:
+        email.status = "failed"
+    else:
+        email.next_attempt_at = datetime.now(timezone.utc) + timedelta(seconds=_retry_delay(email.attempts))
+
+def deliver_pending(db: Session, batch_size: int = EMAIL_BATCH_SIZE) -> int:
+    """Send one batch of due outbox emails over a single SMTP connection.
+
+    Rows are also locked with SKIP LOCKED where the database supports it,
+    for callers outside drain_outbox's lease. Returns the number of emails
+    claimed (sent or rescheduled).
+    """
+    batch = db.query(OutboxEmail).filter(
+        OutboxEmail.status == "pending",
+        OutboxEmail.next_attempt_at <= func.now()
+    ).order_by(OutboxEmail.next_attempt_at, OutboxEmail.id).limit(batch_size).with_for_update(skip_locked=True).all()
+
+    if not batch:
+        db.commit()
+        return 0
+
+    # Imported here, when there is mail to send, not on every worker start
+    import smtplib
+
+    try:
+        smtp = _open_smtp()
+    except (OSError, smtplib.SMTPException) as e:
+        logger.warning("SMTP unavailable, rescheduling %d emails: %s", len(batch), e)
+        for email in batch:
+            _mark_failed(email, f"connect: {e}")
+        db.commit()
+        return len(batch)
+
+    try:
+        for email in batch:
+            try:
+                smtp.send_message(_build_message(email))
+            except smtplib.SMTPServerDisconnected as e:
+                # Connection dropped mid-batch; the rest are retried next round
+                _mark_failed(email, str(e))
+                break
+            except (OSError, smtplib.SMTPException) as e:
+                _mark_failed(email, str(e))
+            else:
+                email.status = "sent"
+                email.attempts = (email.attempts or 0) + 1
+                email.sent_at = datetime.now(timezone.utc)
+    finally:
+        try:
+            smtp.quit()
+        except (OSError, smtplib.SMTPException):
+            pass
+
+    db.commit()
+    return len(batch)
+
+def drain_outbox(batch_size: int = EMAIL_BATCH_SIZE) -> int:
+    """Deliver batches until nothing is due; returns emails processed.
+
+    Stops early if another worker holds the outbox lease: that worker drains
+    what is due, so no email goes out twice from racing dispatchers.
+    """
+    processed = 0
+    with SessionLocal() as db:
+        while True:
+            with worker_lease("email_outbox", EMAIL_LEASE) as acquired:
+                if not acquired:
+                    return processed
+                claimed = deliver_pending(db, batch_size)
+            processed += claimed
+            if claimed < batch_size:
+                return processed
+
+class OutboxDispatcher:
+    """In-process outbox worker for deployments without Celery.
+
+    Wakes when `notify` is called after a commit, and otherwise polls every
+    EMAIL_POLL_INTERVAL seconds to pick up retries and other workers' rows.
+    """
+
+    def __init__(self, poll_interval: float = EMAIL_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await run_in_threadpool(drain_outbox)
+            except Exception:
+                logger.exception("Email outbox dispatch failed")
+
+email_dispatcher = OutboxDispatcher()
+
+def notify_outbox() -> None:
+    """Ask the configured worker to deliver newly committed emails"""
+    if EMAIL_DELIVERY == "celery":
+        from app.worker import deliver_outbox
+        try:
+            deliver_outbox.apply_async(retry=False)
+        except Exception as e:
+            # Celery beat still picks the email up on its next run
+            logger.warning("Could not notify email worker: %s", e)
+    else:
+        email_dispatcher.notify()
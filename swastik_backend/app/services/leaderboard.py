@@ -0,0 +1,367 @@
+# app/services/leaderboard.py
+import asyncio
+import logging
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.models.quiz import QuizAttempt
+from app.services.connection_manager import manager, quiz_channel
+from app.services.message_service import MessageService
+from app.utils.broker import REDIS_URL
+from app.utils.database import SessionLocal
+from app.utils.skiplist import IndexableSkiplist
+
+logger = logging.getLogger(__name__)
+
+LEADERBOARD_BACKEND = config("LEADERBOARD_BACKEND", default="redis" if REDIS_URL else "memory")
+# The in-memory boards start empty, so they are rebuilt from quiz_attempts on
+# startup; Redis boards survive restarts and only need it after a data fix
+LEADERBOARD_REBUILD_ON_STARTUP = config(
+    "LEADERBOARD_REBUILD_ON_STARTUP", default=LEADERBOARD_BACKEND == "memory", cast=bool
+)
+# Rank updates that land in the top N also carry the new top N
+LEADERBOARD_PUSH_TOP = config("LEADERBOARD_PUSH_TOP", default=10, cast=int)
+LEADERBOARD_REBUILD_CHUNK = config("LEADERBOARD_REBUILD_CHUNK", default=5000, cast=int)
+
+# (score, time_taken) of a user's best completed attempt
+Result = Tuple[float, Optional[int]]
+
+def better(result: Result, other: Optional[Result]) -> bool:
+    """Higher score wins; equal scores go to the faster attempt"""
+    if other is None:
+        return True
+    score, time_taken = result
+    other_score, other_time = other
+    if score != other_score:
+        return score > other_score
+    if time_taken is None:
+        return False
+    return other_time is None or time_taken < other_time
+
+def stream_results(db: Session, quiz_id: Optional[int] = None) -> Iterator[Tuple[int, Dict[int, Result]]]:
+    """Best result per user for each quiz, from one streaming pass over quiz_attempts.
+
+    Attempts arrive ordered by quiz, so each quiz is yielded as soon as its
+    last attempt has been read and only one quiz is held in memory at a time.
+    """
+    query = db.query(
+        QuizAttempt.quiz_id, QuizAttempt.user_id, QuizAttempt.score, QuizAttempt.time_taken
+    ).filter(
+        QuizAttempt.is_completed == True,
+        QuizAttempt.score.isnot(None)
+    )
+    if quiz_id is not None:
+        query = query.filter(QuizAttempt.quiz_id == quiz_id)
+
+    current, best = None, {}
+    for attempt in query.order_by(QuizAttempt.quiz_id).yield_per(LEADERBOARD_REBUILD_CHUNK):
+        if attempt.quiz_id != current:
+            if current is not None:
+                yield current, best
+            current, best = attempt.quiz_id, {}
+        result = (attempt.score, attempt.time_taken)
+        if better(result, best.get(attempt.user_id)):
+            best[attempt.user_id] = result
+
+    if current is not None:
+        yield current, best
+    elif quiz_id is not None:
+        yield quiz_id, {}
+
+class LeaderboardBackend:
+    """Per-quiz ranking of users by their best completed attempt.
+
+    Ranks are 1-based; every lookup is O(log n) in the quiz's participants.
+    """
+
+    async def submit(self, quiz_id: int, user_id: int, result: Result) -> bool:
+        """Record a result; True if it became the user's best"""
+        raise NotImplementedError
+
+    async def standing(self, quiz_id: int, user_id: int) -> Optional[dict]:
+        """The user's rank, result and the board size, or None if not ranked"""
+        raise NotImplementedError
+
+    async def top(self, quiz_id: int, limit: int) -> List[dict]:
+        raise NotImplementedError
+
+    async def size(self, quiz_id: int) -> int:
+        raise NotImplementedError
+
+    def replace(self, quiz_id: int, results: Dict[int, Result]) -> None:
+        """Swap in a freshly built board; blocking, run it off the event loop"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+# Stands in for an unknown time_taken so that it sorts after every real one
+_NO_TIME = 2 ** 62
+
+class InMemoryLeaderboard(LeaderboardBackend):
+    """Skiplist-backed boards in this process.
+
+    Every worker only sees the submissions it graded itself, so deployments
+    running more than one worker should use the Redis backend.
+    """
+
+    def __init__(self):
+        self._boards: Dict[int, Tuple[IndexableSkiplist, Dict[int, tuple]]] = {}
+
+    @staticmethod
+    def _key(user_id: int, result: Result) -> tuple:
+        score, time_taken = result
+        return (-score, _NO_TIME if time_taken is None else time_taken, user_id)
+
+    @staticmethod
+    def _entry(rank: int, key: tuple) -> dict:
+        return {
+            "rank": rank,
+            "user_id": key[2],
+            "score": -key[0],
+            "time_taken": None if key[1] == _NO_TIME else key[1]
+        }
+
+    def _board(self, quiz_id: int):
+        board = self._boards.get(quiz_id)
+        if board is None:
+            board = self._boards[quiz_id] = (IndexableSkiplist(), {})
+        return board
+
+    async def submit(self, quiz_id: int, user_id: int, result: Result) -> bool:
+        ranking, keys = self._board(quiz_id)
+        key = self._key(user_id, result)
+        previous = keys.get(user_id)
+        if previous is not None:
+            if key >= previous:
+                return False
+            ranking.remove(previous)
+        ranking.insert(key)
+        keys[user_id] = key
+        return True
+
+    async def standing(self, quiz_id: int, user_id: int) -> Optional[dict]:
+        board = self._boards.get(quiz_id)
+        if board is None or user_id not in board[1]:
+            return None
+        ranking, keys = board
+        key = keys[user_id]
+        return dict(self._entry(ranking.index(key) + 1, key), size=len(ranking))
+
+    async def top(self, quiz_id: int, limit: int) -> List[dict]:
+        board = self._boards.get(quiz_id)
+        if board is None:
+            return []
+        return [self._entry(rank, key) for rank, key in enumerate(board[0].islice(0, limit), start=1)]
+
+    async def size(self, quiz_id: int) -> int:
+        board = self._boards.get(quiz_id)
+        return 0 if board is None else len(board[0])
+
+    def replace(self, quiz_id: int, results: Dict[int, Result]) -> None:
+        ranking, keys = IndexableSkiplist(), {}
+        for user_id, result in results.items():
+            keys[user_id] = key = self._key(user_id, result)
+            ranking.insert(key)
+        # A single assignment, so readers see either the old or the new board
+        self._boards[quiz_id] = (ranking, keys)
+
+# Redis sorted sets hold one float per member, so score and time are packed
+# into it: score in hundredths above, time_taken below, inverted so that
+# ZREVRANGE puts faster attempts first. Exact up to a score of ~9 million.
+_TIME_SCALE = 10 ** 7
+_MAX_TIME = _TIME_SCALE - 2
+
+class RedisLeaderboard(LeaderboardBackend):
+    """One sorted set per quiz, shared by every worker.
+
+    ZADD GT keeps each user's best result atomically. Users whose packed
+    results are identical are ordered by member, i.e. by user id as a string.
+    """
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "leaderboard"):
+        import redis
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._client = redis.asyncio.from_url(url, decode_responses=True)
+        # Rebuilds run in the threadpool
+        self._sync_client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, quiz_id: int) -> str:
+        return f"{self.prefix}:quiz:{quiz_id}"
+
+    @staticmethod
+    def _pack(result: Result) -> int:
+        score, time_taken = result
+        # time_taken None packs to 0, after every measured time
+        remainder = 0 if time_taken is None else _TIME_SCALE - 1 - min(max(time_taken, 0), _MAX_TIME)
+        return round(score * 100) * _TIME_SCALE + remainder
+
+    @staticmethod
+    def _unpack(packed: float) -> Result:
+        hundredths, remainder = divmod(int(packed), _TIME_SCALE)
+        return hundredths / 100, None if remainder == 0 else _TIME_SCALE - 1 - remainder
+
+    def _entry(self, rank: int, member: str, packed: float) -> dict:
+        score, time_taken = self._unpack(packed)
+        return {"rank": rank, "user_id": int(member), "score": score, "time_taken": time_taken}
+
+    async def submit(self, quiz_id: int, user_id: int, result: Result) -> bool:
+        changed = await self._client.zadd(self._key(quiz_id), {str(user_id): self._pack(result)}, gt=True, ch=True)
+        return bool(changed)
+
+    async def standing(self, quiz_id: int, user_id: int) -> Optional[dict]:
+        async with self._client.pipeline(transaction=False) as pipe:
+            pipe.zrevrank(self._key(quiz_id), user_id)
+            pipe.zscore(self._key(quiz_id), user_id)
+            pipe.zcard(self._key(quiz_id))
+            rank, packed, size = await pipe.execute()
+        if rank is None or packed is None:
+            return None
+        return dict(self._entry(rank + 1, str(user_id), packed), size=size)
+
+    async def top(self, quiz_id: int, limit: int) -> List[dict]:
+        members = await self._client.zrevrange(self._key(quiz_id), 0, limit - 1, withscores=True)
+        return [self._entry(rank, member, packed) for rank, (member, packed) in enumerate(members, start=1)]
+
+    async def size(self, quiz_id: int) -> int:
+        return await self._client.zcard(self._key(quiz_id))
+
+    def replace(self, quiz_id: int, results: Dict[int, Result]) -> None:
+        key = self._key(quiz_id)
+        if not results:
+            self._sync_client.delete(key)
+            return
+        # Fill a scratch key and RENAME it over the live one atomically
+        scratch = f"{key}:rebuild"
+        items = [(str(user_id), self._pack(result)) for user_id, result in results.items()]
+        with self._sync_client.pipeline(transaction=False) as pipe:
+            pipe.delete(scratch)
+            for start in range(0, len(items), LEADERBOARD_REBUILD_CHUNK):
+                pipe.zadd(scratch, dict(items[start:start + LEADERBOARD_REBUILD_CHUNK]))
+            pipe.rename(scratch, key)
+            pipe.execute()
+
+    async def close(self) -> None:
+        await self._client.close()
+        self._sync_client.close()
+
+def get_leaderboard_backend() -> LeaderboardBackend:
+    """Build the leaderboard backend configured for this deployment"""
+    if LEADERBOARD_BACKEND == "redis":
+        return RedisLeaderboard(REDIS_URL)
+    return InMemoryLeaderboard()
+
+class Leaderboards:
+    """Live quiz leaderboards, updated as attempts are graded.
+
+    Each improvement is pushed on the quiz's real-time channel with the
+    user's new rank, plus the new top N when it reaches the top.
+    """
+
+    def __init__(self, backend: Optional[LeaderboardBackend] = None, session_factory=SessionLocal):
+        self.backend = backend
+        self.session_factory = session_factory
+        # Results recorded while a rebuild is reading the table, replayed after it
+        self._replay: Optional[List[tuple]] = None
+        self._rebuilding = asyncio.Lock()
+        self._startup_rebuild: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.backend is None:
+            self.backend = get_leaderboard_backend()
+        if LEADERBOARD_REBUILD_ON_STARTUP:
+            # In the background, so a full scan of quiz_attempts does not hold
+            # up the worker; results graded meanwhile are replayed after it
+            self._startup_rebuild = asyncio.create_task(self._rebuild_on_startup())
+
+    async def stop(self) -> None:
+        if self._startup_rebuild is not None:
+            self._startup_rebuild.cancel()
+            try:
+                await self._startup_rebuild
+            except asyncio.CancelledError:
+                pass
+            self._startup_rebuild = None
+        if self.backend is not None:
+            await self.backend.close()
+
+    async def record(self, result: dict) -> None:
+        """Rank a graded attempt (a SubmissionGrader result)"""
+        quiz_id, user_id = result["quiz_id"], result["user_id"]
+        entry = (result["score"], result["time_taken"])
+        if self._replay is not None:
+            self._replay.append((quiz_id, user_id, entry))
+
+        try:
+            await self._record(quiz_id, user_id, entry)
+        except Exception:
+            # The attempt is already stored; a rebuild brings the board back in line
+            logger.exception("Failed to update leaderboard for quiz %s", quiz_id)
+
+    async def _record(self, quiz_id: int, user_id: int, entry: Result) -> None:
+        if not await self.backend.submit(quiz_id, user_id, entry):
+            return
+
+        standing = await self.backend.standing(quiz_id, user_id)
+        if standing is None:
+            return
+        event = dict(standing, quiz_id=quiz_id, percentile=self.percentile(standing))
+        if standing["rank"] <= LEADERBOARD_PUSH_TOP:
+            event["top"] = await self.backend.top(quiz_id, LEADERBOARD_PUSH_TOP)
+        await manager.publish(quiz_channel(quiz_id), MessageService.encode_event("leaderboard", event))
+
+    async def get(self, quiz_id: int, user_id: int, limit: int) -> dict:
+        """Top `limit` entries and the user's own standing"""
+        standing = await self.backend.standing(quiz_id, user_id)
+        if standing is not None:
+            standing["percentile"] = self.percentile(standing)
+            size = standing["size"]
+        else:
+            size = await self.backend.size(quiz_id)
+
+        return {
+            "quiz_id": quiz_id,
+            "size": size,
+            "top": await self.backend.top(quiz_id, limit),
+            "me": standing
+        }
+
+    @staticmethod
+    def percentile(standing: dict) -> float:
+        """Share of participants ranked at or below the user"""
+        return round(100 * (standing["size"] - standing["rank"] + 1) / standing["size"], 2)
+
+    async def rebuild(self, quiz_id: Optional[int] = None) -> int:
+        """Rebuild one quiz's board, or every board, from quiz_attempts"""
+        async with self._rebuilding:
+            self._replay = []
+            try:
+                ranked = await run_in_threadpool(self._rebuild, quiz_id)
+                for replay_quiz, user_id, entry in self._replay:
+                    if quiz_id is None or replay_quiz == quiz_id:
+                        await self.backend.submit(replay_quiz, user_id, entry)
+            finally:
+                self._replay = None
+        logger.info("Rebuilt leaderboards with %d ranked users", ranked)
+        return ranked
+
+    async def _rebuild_on_startup(self) -> None:
+        try:
+            await self.rebuild()
+        except Exception:
+            # Boards fill up again as attempts are graded, and a regrade rebuilds its quiz
+            logger.exception("Startup leaderboard rebuild failed")
+
+    def _rebuild(self, quiz_id: Optional[int]) -> int:
+        ranked = 0
+        with self.session_factory() as db:
+            for board_quiz, results in stream_results(db, quiz_id):
+                self.backend.replace(board_quiz, results)
+                ranked += len(results)
+        return ranked
+
+leaderboards = Leaderboards()
@@ -0,0 +1,724 @@
+# app/services/message_service.py
+import logging
+from datetime import datetime
+from decouple import config
+from sqlalchemy import and_, bindparam, delete, exists, false, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, aliased
+from app.models.message import Message, MessageReaction, MessageReactionCount
+from app.models.room import Room, RoomMember
+from app.schemas.message import MessageCreate
+from app.schemas.views import MessageView, ReactionView, ThreadReplyView
+from app.services.archive_service import ArchiveService
+from app.services.search_service import parse_terms, search_backend_for
+from app.utils.batching import MicroBatcher
+from app.utils.database import SessionLocal
+from app.utils.metrics import Counter, Histogram
+from app.utils.pagination import encode_cursor, decode_cursor, encode_forward_cursor, decode_forward_cursor
+from app.utils.serialization import dumps
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+HISTORY_PAGE_SIZE = 50
+MAX_HISTORY_PAGE_SIZE = 100
+
+THREAD_PAGE_SIZE = 200
+MAX_THREAD_PAGE_SIZE = 500
+MAX_THREAD_DEPTH = 10
+
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 50
+# Every page still ranks all earlier hits, so offsets are kept shallow
+MAX_SEARCH_PAGE = 20
+
+INGEST_MAX_BATCH_SIZE = config("MESSAGE_BATCH_MAX_SIZE", default=200, cast=int)
+INGEST_MAX_DELAY = config("MESSAGE_BATCH_MAX_DELAY_MS", default=5, cast=int) / 1000
+INGEST_MAX_PENDING = config("MESSAGE_BATCH_MAX_PENDING", default=10000, cast=int)
+
+BATCH_SIZE = Histogram(
+    "message_ingest_batch_size", "Messages written per batch",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+FLUSH_LATENCY = Histogram("message_ingest_flush_seconds", "Time to insert and commit one batch")
+INGEST_FAILURES = Counter("message_ingest_failures_total", "Messages rejected by the database")
+
+# The columns of MessageView, in field order: read paths select only these
+MESSAGE_VIEW_COLUMNS = (
+    Message.id, Message.content, Message.message_type, Message.file_url, Message.user_id,
+    Message.room_id, Message.room_seq, Message.parent_id, Message.thread_id, Message.reply_count,
+    Message.last_reply_at, Message.is_edited, Message.created_at
+)
+
+class NotRoomMember(ValueError):
+    """Raised when a message's author is not, or no longer, a member of its room"""
+
+class MessageService:
+
+    @staticmethod
+    def create_message(db: Session, room_id: int, user_id: int, message_data: MessageCreate) -> Message:
+        """Persist a new message in a room"""
+        stored = MessageService.insert_messages(db, [MessageService.build_row(room_id, user_id, message_data)])
+        db.commit()
+
+        return db.get(Message, stored[0]["id"])
+
+    @staticmethod
+    def build_row(room_id: int, user_id: int, message_data: MessageCreate) -> dict:
+        """Column values for a new message, as accepted by insert_messages"""
+        return {
+            "content": message_data.content,
+            "message_type": message_data.message_type,
+            "file_url": message_data.file_url,
+            "parent_id": message_data.parent_id,
+            "user_id": user_id,
+            "room_id": room_id,
+            "is_edited": False,
+            "is_deleted": False
+        }
+
+    @staticmethod
+    def get_message_history(
+        db: Session,
+        room_id: int,
+        limit: int = HISTORY_PAGE_SIZE,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        viewer_id: Optional[int] = None
+    ) -> dict:
+        """Page through a room's messages with opaque keyset cursors.
+
+        Without a cursor the newest page is returned. `before` walks back to
+        older messages by (created_at, id) on ix_messages_room_created_id;
+        `after` walks forward to newer ones in room_seq order on
+        ix_messages_room_seq, the order they were committed in, so a message
+        stamped before a poller's cursor but committed after it still shows
+        up. Either way a page costs the same no matter how deep into the
+        history it is. Reaction summaries for the
+        whole page come from one more query on message_reaction_counts;
+        `viewer_id` marks the emojis that user has reacted with. Pages that
+        reach back past the archive horizon also read the room's archive
+        segments (see app.services.archive_service) and merge them in, so
+        archived messages page exactly like the rest. Every `after` page has a
+        `newer_cursor` to poll from, `after` itself when nothing is newer; a
+        page shorter than `limit` means the client has caught up.
+        """
+        statement, limit = MessageService._history_statement(room_id, limit, before, after)
+        hot = [MessageView(*row, []) for row in db.execute(statement)]
+        messages = hot
+        if ArchiveService.may_hold(hot, limit, before, after):
+            messages = ArchiveService.history(db, room_id, hot, limit, before, after, viewer_id)
+        page = MessageService._history_page(messages, limit, before, after)
+        hot = MessageService._unarchived(page["messages"], hot)
+        if hot:
+            summaries = db.execute(MessageService._reactions_statement(hot, viewer_id)).all()
+            MessageService._attach_reactions(hot, summaries)
+        return page
+
+    @staticmethod
+    async def get_message_history_async(
+        db: AsyncSession,
+        room_id: int,
+        limit: int = HISTORY_PAGE_SIZE,
+        before: Optional[str] = None,
+        after: Optional[str] = None,
+        viewer_id: Optional[int] = None
+    ) -> dict:
+        """get_message_history on an AsyncSession"""
+        statement, limit = MessageService._history_statement(room_id, limit, before, after)
+        hot = [MessageView(*row, []) for row in (await db.execute(statement))]
+        messages = hot
+        if ArchiveService.may_hold(hot, limit, before, after):
+            messages = await ArchiveService.history_async(db, room_id, hot, limit, before, after, viewer_id)
+        page = MessageService._history_page(messages, limit, before, after)
+        hot = MessageService._unarchived(page["messages"], hot)
+        if hot:
+            summaries = (await db.execute(MessageService._reactions_statement(hot, viewer_id))).all()
+            MessageService._attach_reactions(hot, summaries)
+        return page
+
+    @staticmethod
+    def _history_statement(room_id: int, limit: int, before: Optional[str], after: Optional[str]):
+        if before and after:
+            raise ValueError("Use either before or after, not both")
+
+        limit = max(1, min(limit, MAX_HISTORY_PAGE_SIZE))
+        position = tuple_(Message.created_at, Message.id)
+
+        statement = select(*MESSAGE_VIEW_COLUMNS).where(
+            Message.room_id == room_id,
+            Message.is_deleted == False
+        )
+
+        if after:
+            # Forward by room_seq, not created_at: created_at is stamped when the
+            # writer's transaction starts, room_seq in commit order (see insert_messages)
+            statement = statement.where(Message.room_seq > decode_forward_cursor(after)[0]).order_by(
+                Message.room_seq.asc()
+            )
+        else:
+            if before:
+                statement = statement.where(position < decode_cursor(before))
+            statement = statement.order_by(Message.created_at.desc(), Message.id.desc())
+
+        return statement.limit(limit + 1), limit
+
+    @staticmethod
+    def _history_page(messages: List[MessageView], limit: int, before: Optional[str], after: Optional[str]) -> dict:
+        has_more = len(messages) > limit
+        messages = list(messages[:limit])
+
+        if after:
+            # Always somewhere to poll from: messages committed later land after it
+            has_older, has_newer = True, True
+        else:
+            messages.reverse()
+            has_older, has_newer = has_more, before is not None
+
+        newer_cursor = None
+        if messages and has_newer and messages[-1].room_seq is not None:
+            newer_cursor = encode_forward_cursor(messages[-1].room_seq, messages[-1].created_at, messages[-1].id)
+        if after and not messages:
+            newer_cursor = after
+        return {
+            "messages": messages,
+            "older_cursor": encode_cursor(messages[0].created_at, messages[0].id) if messages and has_older else None,
+            "newer_cursor": newer_cursor
+        }
+
+    @staticmethod
+    def _unarchived(messages: List[MessageView], hot: List[MessageView]) -> List[MessageView]:
+        """The messages of a page read from the messages table; archived ones carry their reactions"""
+        hot_ids = {message.id for message in hot}
+        return [message for message in messages if message.id in hot_ids]
+
+    @staticmethod
+    def get_thread(
+        db: Session,
+        message_id: int,
+        user_id: int,
+        max_depth: int = MAX_THREAD_DEPTH,
+        limit: int = THREAD_PAGE_SIZE
+    ) -> dict:
+        """Load a message and its reply tree, oldest reply first.
+
+        The whole tree comes from one recursive CTE over
+        ix_messages_parent_created_id, down to `max_depth` levels below the
+        message and capped at `limit` replies. Replies are always newer than
+        their parent, so a truncated result is still a connected tree.
+        Deleted replies are left out but their own replies are kept, still
+        pointing at them through parent_id.
+        """
+        max_depth = max(1, min(max_depth, MAX_THREAD_DEPTH))
+        limit = max(1, min(limit, MAX_THREAD_PAGE_SIZE))
+
+        is_member = exists().where(RoomMember.room_id == Message.room_id, RoomMember.user_id == user_id)
+        tree = select(Message.id, literal(0).label("depth")).where(
+            Message.id == message_id,
+            Message.is_deleted == False,
+            is_member
+        ).cte("thread", recursive=True)
+        replies = aliased(Message)
+        tree = tree.union_all(
+            select(replies.id, tree.c.depth + 1)
+            .join(tree, replies.parent_id == tree.c.id)
+            .where(tree.c.depth < max_depth)
+        )
+
+        rows = db.execute(
+            select(*MESSAGE_VIEW_COLUMNS, tree.c.depth)
+            .join(tree, tree.c.id == Message.id)
+            .where(Message.is_deleted == False)
+            .order_by(Message.created_at, Message.id)
+            .limit(limit + 2)
+        ).all()
+        if not rows or rows[0].depth != 0:
+            raise ValueError("Message not found")
+
+        messages = [MessageView(*rows[0][:-1], [])]
+        messages.extend(ThreadReplyView(*row[:-1], [], row.depth) for row in rows[1:limit + 1])
+        summaries = db.execute(MessageService._reactions_statement(messages, user_id)).all()
+        MessageService._attach_reactions(messages, summaries)
+
+        return {
+            "root": messages[0],
+            "replies": messages[1:],
+            "truncated": len(rows) > limit + 1
+        }
+
+    @staticmethod
+    def sync_threads(db: Session) -> None:
+        """Recompute thread_id, reply_count and last_reply_at (backfill/repair)"""
+        parents = aliased(Message)
+        db.execute(
+            update(Message).values(thread_id=None, updated_at=Message.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        # Replies to roots first, then one level deeper per pass
+        db.execute(
+            update(Message)
+            .where(Message.parent_id.in_(select(parents.id).where(parents.parent_id.is_(None))))
+            .values(thread_id=Message.parent_id, updated_at=Message.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        parent_thread = select(parents.thread_id).where(parents.id == Message.parent_id).scalar_subquery()
+        while db.execute(
+            update(Message)
+            .where(Message.thread_id.is_(None), Message.parent_id.isnot(None), parent_thread.isnot(None))
+            .values(thread_id=parent_thread, updated_at=Message.updated_at)
+            .execution_options(synchronize_session=False)
+        ).rowcount:
+            pass
+
+        db.execute(
+            update(Message)
+            .where((Message.reply_count != 0) | Message.last_reply_at.isnot(None))
+            .values(reply_count=0, last_reply_at=None, updated_at=Message.updated_at)
+            .execution_options(synchronize_session=False)
+        )
+        totals = db.execute(
+            select(Message.thread_id, func.count(Message.id), func.max(Message.created_at))
+            .where(Message.thread_id.isnot(None), Message.is_deleted == False)
+            .group_by(Message.thread_id)
+        ).all()
+        if totals:
+            messages = Message.__table__
+            db.execute(
+                update(messages)
+                .where(messages.c.id == bindparam("b_id"))
+                .values(
+                    reply_count=bindparam("b_count"),
+                    last_reply_at=bindparam("b_last_reply_at", type_=messages.c.last_reply_at.type),
+                    updated_at=messages.c.updated_at
+                ),
+                [
+                    {"b_id": thread_id, "b_count": count, "b_last_reply_at": last_reply_at}
+                    for thread_id, count, last_reply_at in totals
+                ]
+            )
+        db.commit()
+
+    @staticmethod
+    def _reactions_statement(messages: List[MessageView], viewer_id: Optional[int]):
+        counts = MessageReactionCount
+        if viewer_id is None:
+            return select(counts.message_id, counts.emoji, counts.count, false().label("reacted")).where(
+                counts.message_id.in_([message.id for message in messages])
+            ).order_by(counts.message_id, counts.count.desc(), counts.emoji)
+
+        # The viewer's own reactions are found through the unique index
+        return select(
+            counts.message_id, counts.emoji, counts.count, MessageReaction.id.isnot(None).label("reacted")
+        ).outerjoin(MessageReaction, and_(
+            MessageReaction.message_id == counts.message_id,
+            MessageReaction.user_id == viewer_id,
+            MessageReaction.emoji == counts.emoji
+        )).where(
+            counts.message_id.in_([message.id for message in messages])
+        ).order_by(counts.message_id, counts.count.desc(), counts.emoji)
+
+    @staticmethod
+    def _attach_reactions(messages: List[MessageView], rows) -> None:
+        summaries: Dict[int, List[ReactionView]] = {}
+        for row in rows:
+            summaries.setdefault(row.message_id, []).append(ReactionView(row.emoji, row.count, bool(row.reacted)))
+        for message in messages:
+            message.reactions = summaries.get(message.id, [])
+
+    @staticmethod
+    def toggle_reaction(db: Session, message_id: int, user_id: int, emoji: str) -> dict:
+        """Add a user's reaction to a message, or remove it if already there.
+
+        The reaction row and the per-emoji counter change in one transaction,
+        and the counter is bumped in place, so concurrent toggles by different
+        users never lose updates. The unique constraint on message_reactions
+        keeps one reaction per user and emoji.
+        """
+        is_member = exists().where(RoomMember.room_id == Message.room_id, RoomMember.user_id == user_id)
+        target = db.execute(
+            select(Message.room_id, is_member.label("is_member"))
+            .where(Message.id == message_id, Message.is_deleted == False)
+        ).first()
+        if target is None:
+            raise ValueError("Message not found")
+        if not target.is_member:
+            db.rollback()
+            raise ValueError("Not a member of this room")
+
+        removed = db.execute(
+            delete(MessageReaction)
+            .where(
+                MessageReaction.message_id == message_id,
+                MessageReaction.user_id == user_id,
+                MessageReaction.emoji == emoji
+            )
+            .returning(MessageReaction.id)
+            .execution_options(synchronize_session=False)
+        ).first()
+
+        counts = MessageReactionCount
+        if removed is not None:
+            count = db.execute(
+                update(counts)
+                .where(counts.message_id == message_id, counts.emoji == emoji)
+                .values(count=counts.count - 1)
+                .returning(counts.count)
+                .execution_options(synchronize_session=False)
+            ).scalar()
+            if not count:
+                db.execute(delete(counts).where(
+                    counts.message_id == message_id, counts.emoji == emoji, counts.count <= 0
+                ))
+                count = 0
+        else:
+            try:
+                db.execute(insert(MessageReaction).values(message_id=message_id, user_id=user_id, emoji=emoji))
+            except IntegrityError:
+                # The same user added the same emoji concurrently and got there first
+                db.rollback()
+                raise ValueError("Reaction was changed concurrently, try again")
+            count = db.execute(
+                MessageService._upsert(db, counts)
+                .values(message_id=message_id, emoji=emoji, count=1)
+                .on_conflict_do_update(
+                    index_elements=[counts.message_id, counts.emoji],
+                    set_={"count": counts.count + 1}
+                )
+                .returning(counts.count)
+            ).scalar_one()
+
+        db.commit()
+
+        return {
+            "message_id": message_id,
+            "room_id": target.room_id,
+            "emoji": emoji,
+            "added": removed is None,
+            "count": count
+        }
+
+    @staticmethod
+    def _upsert(db: Session, model):
+        """INSERT supporting ON CONFLICT for the session's database"""
+        dialect = db.get_bind().dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(model)
+        if dialect == "sqlite":
+            return sqlite.insert(model)
+        raise RuntimeError(f"Reactions are not supported on {dialect}")
+
+    @staticmethod
+    def search_messages(
+        db: Session,
+        user_id: int,
+        query: str,
+        room_id: Optional[int] = None,
+        page: int = 1,
+        page_size: int = SEARCH_PAGE_SIZE
+    ) -> dict:
+        """Ranked full-text search over the rooms the user belongs to.
+
+        Served by the search index joined to messages by primary key, so only
+        matching rows are read; membership is checked per hit via the
+        (room_id, user_id) unique index.
+        """
+        terms = parse_terms(query)
+        page = max(1, min(page, MAX_SEARCH_PAGE))
+        page_size = max(1, min(page_size, MAX_SEARCH_PAGE_SIZE))
+
+        statement, relevance = search_backend_for(db).matches(terms, MESSAGE_VIEW_COLUMNS)
+        statement = statement.where(
+            Message.is_deleted == False,
+            Message.room_id.in_(select(RoomMember.room_id).where(RoomMember.user_id == user_id))
+        )
+        if room_id is not None:
+            statement = statement.where(Message.room_id == room_id)
+
+        rows = db.execute(
+            statement.order_by(relevance.desc(), Message.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size + 1)
+        ).all()
+
+        return {
+            "messages": [MessageView(*row[:-1], []) for row in rows[:page_size]],
+            "page": page,
+            "page_size": page_size,
+            "has_more": len(rows) > page_size
+        }
+
+    @staticmethod
+    def edit_message(db: Session, message_id: int, user_id: int, content: str) -> dict:
+        """Change a message's text (author only) and reindex it"""
+        message = db.query(Message).filter(Message.id == message_id, Message.is_deleted == False).first()
+        if message is None:
+            raise ValueError("Message not found")
+        if message.user_id != user_id:
+            raise ValueError("You can only edit your own messages")
+
+        search = search_backend_for(db)
+        search.unindex(db, [(message.id, message.content)])
+        message.content = content
+        message.is_edited = True
+        db.flush()
+        search.index(db, [(message.id, content)])
+
+        edited = MessageService.to_dict(message)
+        db.commit()
+        return edited
+
+    @staticmethod
+    def delete_message(db: Session, message_id: int, user_id: int) -> dict:
+        """Soft-delete a message (its author or a room admin/moderator) and unindex it"""
+        row = db.query(Message, RoomMember.role).outerjoin(
+            RoomMember,
+            (RoomMember.room_id == Message.room_id) & (RoomMember.user_id == user_id)
+        ).filter(Message.id == message_id, Message.is_deleted == False).first()
+        if row is None:
+            raise ValueError("Message not found")
+
+        message, role = row
+        if message.user_id != user_id and role not in ("admin", "moderator"):
+            raise ValueError("You can only delete your own messages")
+
+        search_backend_for(db).unindex(db, [(message.id, message.content)])
+        message.is_deleted = True
+        if message.thread_id is not None:
+            # The badge's time goes back to the newest reply still shown
+            replies = aliased(Message)
+            last_reply_at = select(func.max(replies.created_at)).where(
+                replies.thread_id == message.thread_id,
+                replies.id != message.id,
+                replies.is_deleted == False
+            ).scalar_subquery()
+            db.execute(
+                update(Message)
+                .where(Message.id == message.thread_id)
+                .values(reply_count=Message.reply_count - 1, last_reply_at=last_reply_at, updated_at=Message.updated_at)
+                .execution_options(synchronize_session=False)
+            )
+
+        deleted = {"id": message.id, "room_id": message.room_id}
+        db.commit()
+        return deleted
+
+    @staticmethod
+    def to_dict(message: Message) -> dict:
+        """Plain representation of a message for API responses and broadcasts"""
+        return {
+            "id": message.id,
+            "content": message.content,
+            "message_type": message.message_type,
+            "file_url": message.file_url,
+            "user_id": message.user_id,
+            "room_id": message.room_id,
+            "room_seq": message.room_seq,
+            "parent_id": message.parent_id,
+            "thread_id": message.thread_id,
+            "reply_count": message.reply_count or 0,
+            "last_reply_at": message.last_reply_at.isoformat() if message.last_reply_at else None,
+            "is_edited": bool(message.is_edited),
+            "created_at": message.created_at.isoformat()
+        }
+
+    @staticmethod
+    def encode_event(event_type: str, data: dict) -> str:
+        """Encode a real-time event once so it can be fanned out as-is"""
+        return dumps({"type": event_type, "data": data}).decode()
+
+    @staticmethod
+    def insert_messages(db: Session, rows: List[dict]) -> List[dict]:
+        """Insert message rows and update per-room bookkeeping, without committing.
+
+        Every write path goes through here so that room sequence numbers,
+        last activity, the search index and the authors' read cursors stay
+        consistent with the messages table. Authors must be members of the
+        room they write to. Returns the stored messages in input order.
+        """
+        MessageService._check_members(db, rows)
+        MessageService._resolve_threads(db, rows)
+
+        per_room = {}
+        for row in rows:
+            per_room[row["room_id"]] = per_room.get(row["room_id"], 0) + 1
+
+        # Reserve a block of sequence numbers per room. The UPDATE row-locks
+        # each room until commit, so concurrent writers get disjoint blocks;
+        # rooms are locked in id order so two batches cannot deadlock
+        rooms = Room.__table__
+        db.execute(
+            update(rooms)
+            .where(rooms.c.id == bindparam("b_room_id"))
+            .values(
+                message_seq=rooms.c.message_seq + bindparam("b_count"),
+                last_activity_at=func.now()
+            ),
+            [{"b_room_id": room_id, "b_count": count} for room_id, count in sorted(per_room.items())]
+        )
+        next_seq = {
+            room_id: message_seq - per_room[room_id] + 1
+            for room_id, message_seq in db.execute(
+                select(rooms.c.id, rooms.c.message_seq).where(rooms.c.id.in_(per_room))
+            )
+        }
+        for row in rows:
+            row["room_seq"] = next_seq.get(row["room_id"])
+            if row["room_seq"] is not None:
+                next_seq[row["room_id"]] += 1
+
+        returned = db.execute(
+            insert(Message).returning(Message.id, Message.created_at, sort_by_parameter_order=True),
+            rows
+        ).all()
+        search_backend_for(db).index(db, [(message_id, row["content"]) for row, (message_id, _) in zip(rows, returned)])
+
+        # Replies bump their thread root's badge (count and latest reply time)
+        threads = {}
+        for row, (_, created_at) in zip(rows, returned):
+            if row["thread_id"] is not None:
+                count, _ = threads.get(row["thread_id"], (0, None))
+                threads[row["thread_id"]] = (count + 1, created_at)
+        if threads:
+            messages = Message.__table__
+            db.execute(
+                update(messages)
+                .where(messages.c.id == bindparam("b_id"))
+                .values(
+                    reply_count=messages.c.reply_count + bindparam("b_count"),
+                    last_reply_at=bindparam("b_last_reply_at", type_=messages.c.last_reply_at.type),
+                    # A new reply is not an edit of the root
+                    updated_at=messages.c.updated_at
+                ),
+                [
+                    {"b_id": thread_id, "b_count": count, "b_last_reply_at": last_reply_at}
+                    for thread_id, (count, last_reply_at) in sorted(threads.items())
+                ]
+            )
+
+        # Sending a message marks everything before it as read for its author
+        authored = {}
+        for row, (message_id, _) in zip(rows, returned):
+            if row["room_seq"] is not None:
+                authored[(row["room_id"], row["user_id"])] = (row["room_seq"], message_id)
+        if authored:
+            members = RoomMember.__table__
+            db.execute(
+                update(members)
+                .where(
+                    members.c.room_id == bindparam("b_room_id"),
+                    members.c.user_id == bindparam("b_user_id"),
+                    members.c.last_read_seq < bindparam("b_seq")
+                )
+                .values(last_read_seq=bindparam("b_seq"), last_read_message_id=bindparam("b_message_id")),
+                [
+                    {"b_room_id": room_id, "b_user_id": user_id, "b_seq": seq, "b_message_id": message_id}
+                    for (room_id, user_id), (seq, message_id) in sorted(authored.items())
+                ]
+            )
+
+        return [MessageService._stored(row, *values) for row, values in zip(rows, returned)]
+
+    @staticmethod
+    def _check_members(db: Session, rows: List[dict]) -> None:
+        """Check every author still belongs to the room (one query per batch)"""
+        # Queued messages may have been sent just before their author left the room
+        authors = {(row["room_id"], row["user_id"]) for row in rows}
+        members = db.execute(
+            select(func.count()).where(tuple_(RoomMember.room_id, RoomMember.user_id).in_(authors))
+        ).scalar()
+        if members < len(authors):
+            raise NotRoomMember("Not a member of this room")
+
+    @staticmethod
+    def _resolve_threads(db: Session, rows: List[dict]) -> None:
+        """Check reply parents and set each row's thread_id (one query, replies only)"""
+        parent_ids = {row["parent_id"] for row in rows if row.get("parent_id") is not None}
+        parents = {}
+        if parent_ids:
+            parents = {
+                parent.id: parent for parent in db.execute(
+                    select(Message.id, Message.room_id, Message.thread_id)
+                    .where(Message.id.in_(parent_ids), Message.is_deleted == False)
+                )
+            }
+
+        for row in rows:
+            row["thread_id"] = None
+            if row.get("parent_id") is None:
+                continue
+            parent = parents.get(row["parent_id"])
+            if parent is None or parent.room_id != row["room_id"]:
+                raise ValueError("Reply target not found in this room")
+            row["thread_id"] = parent.thread_id or parent.id
+
+    @staticmethod
+    def _stored(row: dict, message_id: int, created_at: datetime) -> dict:
+        return {
+            "id": message_id,
+            "content": row["content"],
+            "message_type": row["message_type"],
+            "file_url": row["file_url"],
+            "user_id": row["user_id"],
+            "room_id": row["room_id"],
+            "room_seq": row["room_seq"],
+            "parent_id": row["parent_id"],
+            "thread_id": row["thread_id"],
+            "reply_count": 0,
+            "last_reply_at": None,
+            "is_edited": False,
+            "created_at": created_at.isoformat()
+        }
+
+class MessageBatchWriter(MicroBatcher):
+    """Write-behind queue that stores chat messages in micro-batches.
+
+    Senders await `submit`, which resolves with the stored message (id and
+    created_at assigned) only after the batch containing it has committed.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_batch_size: int = INGEST_MAX_BATCH_SIZE,
+        max_delay: float = INGEST_MAX_DELAY,
+        max_pending: int = INGEST_MAX_PENDING
+    ):
+        super().__init__(
+            max_batch_size, max_delay, max_pending,
+            batch_size=BATCH_SIZE, flush_latency=FLUSH_LATENCY, failures=INGEST_FAILURES
+        )
+        self.session_factory = session_factory
+
+    async def submit(self, room_id: int, user_id: int, message_data: MessageCreate) -> dict:
+        """Queue a message and wait until it is committed"""
+        return await self._enqueue(MessageService.build_row(room_id, user_id, message_data))
+
+    def _write(self, rows: List[dict]) -> list:
+        """Insert rows with one multi-row INSERT; isolate bad rows on failure"""
+        with self.session_factory() as db:
+            try:
+                stored = MessageService.insert_messages(db, rows)
+                db.commit()
+                return stored
+            except Exception as e:
+                db.rollback()
+                if len(rows) == 1:
+                    # Rejected input (e.g. a reply to another room) fails only its sender
+                    if isinstance(e, ValueError):
+                        return [e]
+                    raise
+
+            # One row broke the batch (e.g. a bad parent_id): retry individually
+            results = []
+            for row in rows:
+                try:
+                    results.extend(MessageService.insert_messages(db, [row]))
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    results.append(e)
+            return results
+
+message_writer = MessageBatchWriter()
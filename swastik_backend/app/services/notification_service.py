@@ -0,0 +1,328 @@
+# app/services/notification_service.py
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import String, case, cast, exists, func, insert, literal, select, tuple_, update
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+
+from app.models.notification import Notification
+from app.models.room import Room, RoomMember
+from app.utils.database import SessionLocal
+from app.utils.pagination import encode_cursor, decode_cursor
+
+logger = logging.getLogger(__name__)
+
+INBOX_PAGE_SIZE = 20
+MAX_INBOX_PAGE_SIZE = 100
+
+# Buffered message events are written at most this often
+NOTIFICATION_FLUSH_INTERVAL = config("NOTIFICATION_FLUSH_INTERVAL", default=2, cast=float)
+# Unread notifications younger than this absorb new events of the same group
+NOTIFICATION_COALESCE_WINDOW = config("NOTIFICATION_COALESCE_WINDOW", default=600, cast=float)
+
+PREVIEW_LENGTH = 200
+
+def message_group(room_id: int) -> str:
+    return f"room:{room_id}:message"
+
+class NotificationService:
+
+    @staticmethod
+    def notify_users(
+        db: Session,
+        user_ids: List[int],
+        title: str,
+        message: str,
+        notification_type: str,
+        related_id: Optional[int] = None,
+        related_type: Optional[str] = None,
+        priority: str = "normal"
+    ) -> int:
+        """Create the same notification for many users with one bulk INSERT (no commit)"""
+        if not user_ids:
+            return 0
+
+        db.execute(insert(Notification), [
+            {
+                "user_id": user_id,
+                "title": title,
+                "message": message,
+                "notification_type": notification_type,
+                "related_id": related_id,
+                "related_type": related_type,
+                "priority": priority,
+                "is_read": False,
+                "count": 1
+            }
+            for user_id in user_ids
+        ])
+        return len(user_ids)
+
+    @staticmethod
+    def announce(db: Session, room_id: int, sender_id: int, title: str, message: str, priority: str = "high") -> int:
+        """Send an announcement to every member of a room; returns recipients.
+
+        The fan-out is a single INSERT ... SELECT over room_members, so a
+        5,000-member room costs one statement, not 5,000 ORM inserts.
+        """
+        role = db.query(RoomMember.role).filter(
+            RoomMember.room_id == room_id,
+            RoomMember.user_id == sender_id
+        ).scalar()
+        if role not in ("admin", "moderator"):
+            raise ValueError("Only room admins and moderators can send announcements")
+
+        recipients = select(
+            RoomMember.user_id,
+            literal(title),
+            literal(message),
+            literal("announcement"),
+            literal(room_id),
+            literal("room"),
+            literal(priority),
+            literal(False),
+            literal(1)
+        ).where(
+            RoomMember.room_id == room_id,
+            RoomMember.user_id != sender_id
+        )
+        result = db.execute(insert(Notification).from_select(
+            ["user_id", "title", "message", "notification_type", "related_id",
+             "related_type", "priority", "is_read", "count"],
+            recipients
+        ))
+        db.commit()
+
+        return result.rowcount
+
+    @staticmethod
+    def record_room_messages(
+        db: Session,
+        room_id: int,
+        room_name: str,
+        senders: Dict[int, int],
+        last_message_id: int,
+        preview: str,
+        window: float = NOTIFICATION_COALESCE_WINDOW
+    ) -> None:
+        """Fold new messages into each member's "N new messages" notification.
+
+        `senders` maps user id to messages sent; members are not notified of
+        their own messages. Members with an unread notification for the room
+        from the last `window` seconds have it bumped, everyone else gets a
+        new one: two statements per room however many members or messages.
+        Does not commit.
+        """
+        total = sum(senders.values())
+        group_key = message_group(room_id)
+        since = datetime.now(timezone.utc) - timedelta(seconds=window)
+        preview = preview[:PREVIEW_LENGTH]
+
+        listening = select(RoomMember.user_id).where(
+            RoomMember.room_id == room_id,
+            RoomMember.is_muted.isnot(True)
+        )
+
+        # Messages each user did not send themselves
+        new_for_open = total - case(senders, value=Notification.user_id, else_=0)
+        db.execute(
+            update(Notification)
+            .where(
+                Notification.group_key == group_key,
+                Notification.is_read == False,
+                Notification.created_at >= since,
+                Notification.user_id.in_(listening),
+                new_for_open > 0
+            )
+            .values(
+                count=Notification.count + new_for_open,
+                title=cast(Notification.count + new_for_open, String) + literal(f" new messages in {room_name}"),
+                message=preview,
+                related_id=last_message_id,
+                created_at=func.now()
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        new_for_member = total - case(senders, value=RoomMember.user_id, else_=0)
+        has_open = exists().where(
+            Notification.user_id == RoomMember.user_id,
+            Notification.group_key == group_key,
+            Notification.is_read == False,
+            Notification.created_at >= since
+        )
+        recipients = select(
+            RoomMember.user_id,
+            case(
+                (new_for_member == 1, literal(f"New message in {room_name}")),
+                else_=cast(new_for_member, String) + literal(f" new messages in {room_name}")
+            ),
+            literal(preview),
+            literal("message"),
+            literal(last_message_id),
+            literal("message"),
+            literal("normal"),
+            literal(False),
+            literal(group_key),
+            new_for_member
+        ).where(
+            RoomMember.room_id == room_id,
+            RoomMember.is_muted.isnot(True),
+            new_for_member > 0,
+            ~has_open
+        )
+        db.execute(insert(Notification).from_select(
+            ["user_id", "title", "message", "notification_type", "related_id",
+             "related_type", "priority", "is_read", "group_key", "count"],
+            recipients
+        ))
+
+    @staticmethod
+    def get_inbox(
+        db: Session,
+        user_id: int,
+        unread_only: bool = False,
+        limit: int = INBOX_PAGE_SIZE,
+        before: Optional[str] = None
+    ) -> dict:
+        """Page through a user's notifications, newest first"""
+        limit = max(1, min(limit, MAX_INBOX_PAGE_SIZE))
+
+        query = db.query(Notification).filter(Notification.user_id == user_id)
+        if unread_only:
+            query = query.filter(Notification.is_read == False)
+        if before:
+            query = query.filter(tuple_(Notification.created_at, Notification.id) < decode_cursor(before))
+
+        notifications = query.order_by(
+            Notification.created_at.desc(), Notification.id.desc()
+        ).limit(limit + 1).all()
+        has_more = len(notifications) > limit
+        notifications = notifications[:limit]
+
+        return {
+            "notifications": [NotificationService.to_dict(n) for n in notifications],
+            "next_cursor": (
+                encode_cursor(notifications[-1].created_at, notifications[-1].id) if has_more else None
+            )
+        }
+
+    @staticmethod
+    def unread_count(db: Session, user_id: int) -> int:
+        """Number of unread notifications (an index-only count)"""
+        return db.query(func.count(Notification.id)).filter(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).scalar()
+
+    @staticmethod
+    def mark_read(db: Session, user_id: int, notification_id: int) -> None:
+        """Mark one of the user's notifications as read"""
+        result = db.execute(
+            update(Notification)
+            .where(Notification.id == notification_id, Notification.user_id == user_id)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            db.rollback()
+            raise ValueError("Notification not found")
+        db.commit()
+
+    @staticmethod
+    def mark_all_read(db: Session, user_id: int) -> int:
+        """Mark every unread notification of a user as read with one UPDATE"""
+        result = db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id, Notification.is_read == False)
+            .values(is_read=True)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return result.rowcount
+
+    @staticmethod
+    def to_dict(notification: Notification) -> dict:
+        """Plain representation of a notification for API responses"""
+        return {
+            "id": notification.id,
+            "title": notification.title,
+            "message": notification.message,
+            "notification_type": notification.notification_type,
+            "related_id": notification.related_id,
+            "related_type": notification.related_type,
+            "priority": notification.priority,
+            "count": notification.count,
+            "is_read": bool(notification.is_read),
+            "created_at": notification.created_at.isoformat()
+        }
+
+class NotificationCoalescer:
+    """Buffers new-message events and writes them as coalesced notifications.
+
+    `record` is called for every stored message and only updates an
+    in-memory tally; every `flush_interval` seconds the tally is written
+    with NotificationService.record_room_messages, so a burst of messages in
+    a room costs two statements per flush instead of one insert per member
+    per message.
+    """
+
+    def __init__(self, session_factory=SessionLocal, flush_interval: float = NOTIFICATION_FLUSH_INTERVAL):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self._pending: Dict[int, dict] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write whatever is buffered, then stop"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._flush()
+
+    def record(self, message: dict) -> None:
+        pending = self._pending.setdefault(message["room_id"], {"senders": Counter()})
+        pending["senders"][message["user_id"]] += 1
+        pending["last_message_id"] = message["id"]
+        pending["preview"] = message["content"]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        try:
+            await run_in_threadpool(self._write, pending)
+        except Exception:
+            logger.exception("Could not write notifications for %d rooms", len(pending))
+
+    def _write(self, pending: Dict[int, dict]) -> None:
+        with self.session_factory() as db:
+            names = dict(db.query(Room.id, Room.name).filter(Room.id.in_(pending)).all())
+            for room_id in sorted(pending):
+                if room_id not in names:
+                    continue
+                events = pending[room_id]
+                NotificationService.record_room_messages(
+                    db, room_id, names[room_id], dict(events["senders"]),
+                    events["last_message_id"], events["preview"]
+                )
+            db.commit()
+
+notification_coalescer = NotificationCoalescer()
@@ -0,0 +1,330 @@
+# app/services/presence.py
+import asyncio
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import bindparam, update
+from typing import Dict, List, Optional, Set, Tuple
+
+from app.models.user import User
+from app.services.connection_manager import manager, room_channel
+from app.services.message_service import MessageService
+from app.utils.broker import REDIS_URL
+from app.utils.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+PRESENCE_BACKEND = config("PRESENCE_BACKEND", default="redis" if REDIS_URL else "memory")
+# Clients heartbeat well within this; a silent user drops out after it
+PRESENCE_TTL = config("PRESENCE_TTL", default=60, cast=float)
+TYPING_TTL = config("TYPING_TTL", default=6, cast=float)
+PRESENCE_SHARDS = config("PRESENCE_SHARDS", default=16, cast=int)
+PRESENCE_SWEEP_INTERVAL = config("PRESENCE_SWEEP_INTERVAL", default=5, cast=float)
+LAST_SEEN_FLUSH_INTERVAL = config("LAST_SEEN_FLUSH_INTERVAL", default=30, cast=float)
+
+ONLINE = "online"
+TYPING = "typing"
+
+# (kind, room_id): one set of present users
+Scope = Tuple[str, int]
+
+class PresenceStore:
+    """Per-room sets of users whose entries expire unless refreshed"""
+
+    async def refresh(self, scope: Scope, user_id: int, ttl: float) -> bool:
+        """Add or extend a user's entry; True if the user was not present"""
+        raise NotImplementedError
+
+    async def remove(self, scope: Scope, user_id: int) -> bool:
+        """Drop a user's entry; True if it was present"""
+        raise NotImplementedError
+
+    async def members(self, scope: Scope) -> List[int]:
+        """Users currently present, without expired entries"""
+        raise NotImplementedError
+
+    async def sweep(self) -> List[Tuple[Scope, int]]:
+        """Remove expired entries and return them"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class _Shard:
+    __slots__ = ("lock", "scopes")
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # scope -> user_id -> expiry (monotonic seconds)
+        self.scopes: Dict[Scope, Dict[int, float]] = {}
+
+class InMemoryPresenceStore(PresenceStore):
+    """Presence held in this process, split into independently locked shards.
+
+    Rooms hash to shards, so heartbeats for different rooms never contend
+    and a sweep holds each lock only for its own slice of rooms.
+    """
+
+    def __init__(self, shards: int = PRESENCE_SHARDS, timer=time.monotonic):
+        self._shards = [_Shard() for _ in range(max(1, shards))]
+        self._timer = timer
+
+    def _shard(self, scope: Scope) -> _Shard:
+        return self._shards[hash(scope) % len(self._shards)]
+
+    async def refresh(self, scope: Scope, user_id: int, ttl: float) -> bool:
+        now = self._timer()
+        shard = self._shard(scope)
+        with shard.lock:
+            users = shard.scopes.setdefault(scope, {})
+            previous = users.get(user_id)
+            users[user_id] = now + ttl
+        return previous is None or previous <= now
+
+    async def remove(self, scope: Scope, user_id: int) -> bool:
+        now = self._timer()
+        shard = self._shard(scope)
+        with shard.lock:
+            users = shard.scopes.get(scope)
+            if not users or user_id not in users:
+                return False
+            expires_at = users.pop(user_id)
+            if not users:
+                del shard.scopes[scope]
+        return expires_at > now
+
+    async def members(self, scope: Scope) -> List[int]:
+        now = self._timer()
+        shard = self._shard(scope)
+        with shard.lock:
+            users = shard.scopes.get(scope)
+            if not users:
+                return []
+            return [user_id for user_id, expires_at in users.items() if expires_at > now]
+
+    async def sweep(self) -> List[Tuple[Scope, int]]:
+        now = self._timer()
+        expired = []
+        for shard in self._shards:
+            with shard.lock:
+                for scope in list(shard.scopes):
+                    users = shard.scopes[scope]
+                    gone = [user_id for user_id, expires_at in users.items() if expires_at <= now]
+                    for user_id in gone:
+                        del users[user_id]
+                        expired.append((scope, user_id))
+                    if not users:
+                        del shard.scopes[scope]
+        return expired
+
+class RedisPresenceStore(PresenceStore):
+    """One sorted set per scope scored by expiry time, shared by every worker.
+
+    Expired members are collected and removed by one script, atomically,
+    so a user refreshed meanwhile is never dropped and each expiry is
+    reported by exactly one worker.
+    """
+
+    # Returns the removed members, or nil once the key itself is gone
+    EXPIRE_SCRIPT = """
+    if redis.call('EXISTS', KEYS[1]) == 0 then return nil end
+    local stale = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1])
+    if #stale > 0 then redis.call('ZREM', KEYS[1], unpack(stale)) end
+    return stale
+    """
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "presence"):
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._client = redis.asyncio.from_url(url, decode_responses=True)
+        self._expire = self._client.register_script(self.EXPIRE_SCRIPT)
+        # Scopes this worker has written to; each worker sweeps its own
+        self._scopes: Set[Scope] = set()
+
+    def _key(self, scope: Scope) -> str:
+        kind, room_id = scope
+        return f"{self.prefix}:{kind}:{room_id}"
+
+    async def refresh(self, scope: Scope, user_id: int, ttl: float) -> bool:
+        now = time.time()
+        key = self._key(scope)
+        self._scopes.add(scope)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.zscore(key, user_id)
+            pipe.zadd(key, {str(user_id): now + ttl})
+            # Rooms nobody touches any more disappear on their own
+            pipe.expire(key, int(ttl * 2) + 1)
+            previous, _, _ = await pipe.execute()
+        return previous is None or float(previous) <= now
+
+    async def remove(self, scope: Scope, user_id: int) -> bool:
+        key = self._key(scope)
+        async with self._client.pipeline(transaction=True) as pipe:
+            pipe.zscore(key, user_id)
+            pipe.zrem(key, user_id)
+            previous, _ = await pipe.execute()
+        return previous is not None and float(previous) > time.time()
+
+    async def members(self, scope: Scope) -> List[int]:
+        members = await self._client.zrangebyscore(self._key(scope), time.time(), "+inf")
+        return [int(member) for member in members]
+
+    async def sweep(self) -> List[Tuple[Scope, int]]:
+        now = time.time()
+        expired = []
+        for scope in list(self._scopes):
+            stale = await self._expire(keys=[self._key(scope)], args=[now])
+            if stale is None:
+                self._scopes.discard(scope)
+                continue
+            expired.extend((scope, int(member)) for member in stale)
+        return expired
+
+    async def close(self) -> None:
+        await self._client.close()
+
+def get_presence_store() -> PresenceStore:
+    """Build the presence store configured for this deployment"""
+    if PRESENCE_BACKEND == "redis":
+        return RedisPresenceStore(REDIS_URL)
+    return InMemoryPresenceStore()
+
+class PresenceService:
+    """Online and typing state per room, plus coalesced last_seen writes.
+
+    Presence lives only in the store; the database sees one bulk UPDATE of
+    users.last_seen every LAST_SEEN_FLUSH_INTERVAL seconds, however many
+    requests and heartbeats arrived in between. Transitions (online,
+    offline, typing) are pushed as events on the room's channel.
+    """
+
+    def __init__(
+        self,
+        store: Optional[PresenceStore] = None,
+        session_factory=SessionLocal,
+        sweep_interval: float = PRESENCE_SWEEP_INTERVAL,
+        flush_interval: float = LAST_SEEN_FLUSH_INTERVAL
+    ):
+        self.store = store
+        self.session_factory = session_factory
+        self.sweep_interval = sweep_interval
+        self.flush_interval = flush_interval
+        self._last_seen: Dict[int, datetime] = {}
+        # Open sockets per (room, user) in this process, so a second tab
+        # closing does not mark its user offline
+        self._sockets: Dict[Tuple[int, int], int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self.store is None:
+            self.store = get_presence_store()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Write pending last_seen values, then stop"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self._flush()
+        if self.store is not None:
+            await self.store.close()
+
+    def touch(self, user_id: int) -> None:
+        """Note that a user was active; persisted with the next flush"""
+        self._last_seen[user_id] = datetime.now(timezone.utc)
+
+    async def connect(self, room_id: int, user_id: int) -> None:
+        """A room socket opened"""
+        key = (room_id, user_id)
+        self._sockets[key] = self._sockets.get(key, 0) + 1
+        await self.heartbeat(room_id, user_id)
+
+    async def disconnect(self, room_id: int, user_id: int) -> None:
+        """A room socket closed; the user goes offline with their last socket"""
+        key = (room_id, user_id)
+        remaining = self._sockets.get(key, 1) - 1
+        if remaining > 0:
+            self._sockets[key] = remaining
+            return
+        self._sockets.pop(key, None)
+
+        self.touch(user_id)
+        await self.store.remove((TYPING, room_id), user_id)
+        if await self.store.remove((ONLINE, room_id), user_id):
+            await self._publish(room_id, user_id, "offline")
+
+    async def heartbeat(self, room_id: int, user_id: int) -> None:
+        """Keep a user online in a room for another PRESENCE_TTL seconds"""
+        self.touch(user_id)
+        if await self.store.refresh((ONLINE, room_id), user_id, PRESENCE_TTL):
+            await self._publish(room_id, user_id, "online")
+
+    async def typing(self, room_id: int, user_id: int) -> None:
+        """Mark a user as typing; only the start of a typing burst is broadcast"""
+        self.touch(user_id)
+        await self.store.refresh((ONLINE, room_id), user_id, PRESENCE_TTL)
+        if await self.store.refresh((TYPING, room_id), user_id, TYPING_TTL):
+            await self._publish(room_id, user_id, "typing")
+
+    async def room_presence(self, room_id: int, limit: int) -> dict:
+        """Who is online and typing in a room, answered from the store alone"""
+        online = await self.store.members((ONLINE, room_id))
+        typing = await self.store.members((TYPING, room_id))
+        return {
+            "room_id": room_id,
+            "online_count": len(online),
+            "online": sorted(online)[:limit],
+            "typing": sorted(typing)
+        }
+
+    async def _publish(self, room_id: int, user_id: int, status: str) -> None:
+        await manager.publish(
+            room_channel(room_id),
+            MessageService.encode_event("presence", {"room_id": room_id, "user_id": user_id, "status": status})
+        )
+
+    async def _run(self) -> None:
+        next_flush = time.monotonic() + self.flush_interval
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                for (kind, room_id), user_id in await self.store.sweep():
+                    if kind == ONLINE:
+                        await self._publish(room_id, user_id, "offline")
+            except Exception:
+                logger.exception("Presence sweep failed")
+
+            if time.monotonic() >= next_flush:
+                next_flush = time.monotonic() + self.flush_interval
+                await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._last_seen:
+            return
+        pending, self._last_seen = self._last_seen, {}
+        try:
+            await run_in_threadpool(self._write, pending)
+        except Exception:
+            logger.exception("Could not store last_seen for %d users", len(pending))
+
+    def _write(self, pending: Dict[int, datetime]) -> None:
+        users = User.__table__
+        with self.session_factory() as db:
+            db.execute(
+                update(users)
+                .where(users.c.id == bindparam("b_id"))
+                # Being seen is not a profile change; keep updated_at as it was
+                .values(last_seen=bindparam("b_last_seen"), updated_at=users.c.updated_at),
+                [{"b_id": user_id, "b_last_seen": pending[user_id]} for user_id in sorted(pending)]
+            )
+            db.commit()
+
+presence = PresenceService()
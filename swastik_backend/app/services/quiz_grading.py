@@ -0,0 +1,280 @@
+# app/services/quiz_grading.py
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from decouple import config
+from sqlalchemy import tuple_, update
+from sqlalchemy.orm import Session
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from app.models.quiz import Quiz, QuizQuestion, QuizAttempt
+from app.utils.batching import MicroBatcher
+from app.utils.cache import TTLCache
+from app.utils.database import SessionLocal
+from app.utils.metrics import Counter, Histogram
+
+GRADING_MAX_BATCH_SIZE = config("QUIZ_GRADING_MAX_BATCH_SIZE", default=500, cast=int)
+GRADING_MAX_DELAY = config("QUIZ_GRADING_MAX_DELAY_MS", default=20, cast=int) / 1000
+GRADING_MAX_PENDING = config("QUIZ_GRADING_MAX_PENDING", default=10000, cast=int)
+# Submissions arriving this long after end_time are still accepted (network slack)
+SUBMISSION_GRACE = timedelta(seconds=config("QUIZ_SUBMISSION_GRACE_SECONDS", default=30, cast=float))
+ANSWER_KEY_TTL = config("QUIZ_ANSWER_KEY_TTL", default=3600, cast=float)
+
+GRADING_BATCH_SIZE = Histogram(
+    "quiz_grading_batch_size", "Quiz submissions graded per batch",
+    buckets=(1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+GRADING_LATENCY = Histogram("quiz_grading_flush_seconds", "Time to grade and store one batch")
+GRADING_FAILURES = Counter("quiz_grading_failures_total", "Quiz submissions rejected")
+
+_WHITESPACE = re.compile(r"\s+")
+_TRUE = frozenset({"true", "t", "yes", "y", "1"})
+_FALSE = frozenset({"false", "f", "no", "n", "0"})
+
+def _normalize_text(value: Any) -> str:
+    return _WHITESPACE.sub(" ", str(value)).strip().casefold()
+
+def _normalize_short_answer(value: Any) -> str:
+    return _normalize_text(value).strip(".,;:!?'\"")
+
+def _normalize_true_false(value: Any) -> str:
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    text = _normalize_text(value)
+    if text in _TRUE:
+        return "true"
+    if text in _FALSE:
+        return "false"
+    return text
+
+NORMALIZERS: Dict[str, Callable[[Any], str]] = {
+    "mcq": _normalize_text,
+    "true_false": _normalize_true_false,
+    "short_answer": _normalize_short_answer,
+}
+
+def _accepted_answers(question_type: str, correct_answer: Optional[str], options: Optional[list]) -> FrozenSet[str]:
+    """Every normalized form of a student answer that counts as correct"""
+    if correct_answer is None:
+        return frozenset()
+
+    normalize = NORMALIZERS.get(question_type, _normalize_text)
+    accepted = {normalize(correct_answer)}
+
+    if question_type == "mcq" and options:
+        # The key and the student may name the option by text, index or letter
+        texts = [_normalize_text(option) for option in options]
+        key = _normalize_text(correct_answer)
+        for index, text in enumerate(texts):
+            letter = chr(ord("a") + index) if index < 26 else None
+            if key in (text, str(index), letter):
+                accepted.update({text, str(index)})
+                if letter:
+                    accepted.add(letter)
+
+    return frozenset(accepted)
+
+@dataclass(frozen=True)
+class AnswerKey:
+    """A quiz's answer key as parallel columns, compiled once per quiz"""
+    quiz_id: int
+    question_ids: Tuple[str, ...]
+    normalizers: Tuple[Callable[[Any], str], ...]
+    accepted: Tuple[FrozenSet[str], ...]
+    points: Tuple[int, ...]
+    total_points: int
+    end_time: Optional[datetime]
+
+def compile_answer_key(db: Session, quiz_id: int) -> Optional[AnswerKey]:
+    """Load a quiz's questions in one query and compile them into an AnswerKey"""
+    quiz = db.query(Quiz.total_points, Quiz.end_time).filter(Quiz.id == quiz_id).first()
+    if quiz is None:
+        return None
+
+    questions = db.query(
+        QuizQuestion.id, QuizQuestion.question_type, QuizQuestion.options,
+        QuizQuestion.correct_answer, QuizQuestion.points
+    ).filter(QuizQuestion.quiz_id == quiz_id).order_by(QuizQuestion.order_index, QuizQuestion.id).all()
+
+    points = tuple(q.points or 0 for q in questions)
+    return AnswerKey(
+        quiz_id=quiz_id,
+        question_ids=tuple(str(q.id) for q in questions),
+        normalizers=tuple(NORMALIZERS.get(q.question_type, _normalize_text) for q in questions),
+        accepted=tuple(_accepted_answers(q.question_type, q.correct_answer, q.options) for q in questions),
+        points=points,
+        total_points=quiz.total_points if quiz.total_points is not None else sum(points),
+        end_time=quiz.end_time
+    )
+
+answer_keys = TTLCache(maxsize=256, ttl=ANSWER_KEY_TTL)
+
+def get_answer_key(db: Session, quiz_id: int) -> Optional[AnswerKey]:
+    """Cached compile_answer_key"""
+    key = answer_keys.get(quiz_id)
+    if key is None:
+        key = compile_answer_key(db, quiz_id)
+        if key is not None:
+            answer_keys.set(quiz_id, key)
+    return key
+
+def invalidate_answer_key(quiz_id: int) -> None:
+    answer_keys.delete(quiz_id)
+
+def score_attempts(key: AnswerKey, submissions: List[Optional[dict]]) -> List[float]:
+    """Score many answer sheets against one key in a single column-wise pass.
+
+    Each question is graded for the whole batch at once, and every distinct
+    raw answer is normalized and checked only once per question, so a class
+    choosing among four options costs four comparisons, not one per student.
+    """
+    scores = [0.0] * len(submissions)
+    sheets = [answers if isinstance(answers, dict) else {} for answers in submissions]
+
+    for question_id, normalize, accepted, points in zip(key.question_ids, key.normalizers, key.accepted, key.points):
+        if not points or not accepted:
+            continue
+        verdicts: Dict[Any, bool] = {}
+        for i, sheet in enumerate(sheets):
+            answer = sheet.get(question_id)
+            if answer is None:
+                continue
+            try:
+                correct = verdicts[answer]
+            except KeyError:
+                correct = verdicts[answer] = normalize(answer) in accepted
+            except TypeError:
+                # Lists and objects are never a valid answer
+                continue
+            if correct:
+                scores[i] += points
+
+    return scores
+
+def regrade_quiz(db: Session, quiz_id: int, chunk_size: int = 1000) -> int:
+    """Re-score every completed attempt of a quiz, e.g. after a key correction.
+
+    Attempts are read in id-ordered chunks; each chunk is scored in one pass
+    and written back with one bulk UPDATE. Returns the number of attempts.
+    """
+    invalidate_answer_key(quiz_id)
+    key = get_answer_key(db, quiz_id)
+    if key is None:
+        raise ValueError("Quiz not found")
+
+    graded = 0
+    last_id = 0
+    while True:
+        chunk = db.query(QuizAttempt.id, QuizAttempt.answers).filter(
+            QuizAttempt.quiz_id == quiz_id,
+            QuizAttempt.is_completed == True,
+            QuizAttempt.id > last_id
+        ).order_by(QuizAttempt.id).limit(chunk_size).all()
+        if not chunk:
+            return graded
+
+        scores = score_attempts(key, [attempt.answers for attempt in chunk])
+        db.execute(update(QuizAttempt), [
+            {"id": attempt.id, "score": score, "total_points": key.total_points}
+            for attempt, score in zip(chunk, scores)
+        ])
+        db.commit()
+
+        graded += len(chunk)
+        last_id = chunk[-1].id
+
+def as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Attach UTC to naive timestamps (SQLite returns them; they are stored in UTC)"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+class SubmissionGrader(MicroBatcher):
+    """Grades quiz submissions in micro-batches.
+
+    When a timed quiz closes, hundreds of submissions arrive within seconds;
+    they are grouped per quiz, scored against the cached answer key in one
+    pass and stored with one bulk UPDATE per batch.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        max_batch_size: int = GRADING_MAX_BATCH_SIZE,
+        max_delay: float = GRADING_MAX_DELAY,
+        max_pending: int = GRADING_MAX_PENDING
+    ):
+        super().__init__(
+            max_batch_size, max_delay, max_pending,
+            batch_size=GRADING_BATCH_SIZE, flush_latency=GRADING_LATENCY, failures=GRADING_FAILURES
+        )
+        self.session_factory = session_factory
+
+    async def submit(self, quiz_id: int, user_id: int, answers: dict) -> dict:
+        """Queue a user's answers for their open attempt and wait for the result"""
+        return await self._enqueue((quiz_id, user_id, answers, datetime.now(timezone.utc)))
+
+    def _write(self, items: List[tuple]) -> list:
+        with self.session_factory() as db:
+            pairs = {(quiz_id, user_id) for quiz_id, user_id, _, _ in items}
+            open_attempts = {}
+            for attempt in db.query(
+                QuizAttempt.id, QuizAttempt.quiz_id, QuizAttempt.user_id, QuizAttempt.started_at
+            ).filter(
+                QuizAttempt.is_completed == False,
+                tuple_(QuizAttempt.quiz_id, QuizAttempt.user_id).in_(pairs)
+            ).order_by(QuizAttempt.id):
+                open_attempts[(attempt.quiz_id, attempt.user_id)] = attempt
+
+            results: List[Any] = [None] * len(items)
+            by_quiz: Dict[int, List[int]] = {}
+            for index, (quiz_id, user_id, _, submitted_at) in enumerate(items):
+                attempt = open_attempts.pop((quiz_id, user_id), None)
+                if attempt is None:
+                    results[index] = ValueError("No open attempt for this quiz")
+                    continue
+                key = get_answer_key(db, quiz_id)
+                if key is None:
+                    results[index] = ValueError("Quiz not found")
+                    continue
+                if key.end_time is not None and submitted_at > as_utc(key.end_time) + SUBMISSION_GRACE:
+                    results[index] = ValueError("This quiz has ended")
+                    continue
+                results[index] = attempt
+                by_quiz.setdefault(quiz_id, []).append(index)
+
+            updates = []
+            for quiz_id, indexes in by_quiz.items():
+                key = get_answer_key(db, quiz_id)
+                scores = score_attempts(key, [items[i][2] for i in indexes])
+                for index, score in zip(indexes, scores):
+                    attempt, submitted_at = results[index], items[index][3]
+                    time_taken = None
+                    if attempt.started_at is not None:
+                        time_taken = int((submitted_at - as_utc(attempt.started_at)).total_seconds())
+                    updates.append({
+                        "id": attempt.id,
+                        "answers": items[index][2],
+                        "score": score,
+                        "total_points": key.total_points,
+                        "time_taken": time_taken,
+                        "is_completed": True,
+                        "completed_at": submitted_at
+                    })
+                    results[index] = {
+                        "attempt_id": attempt.id,
+                        "quiz_id": quiz_id,
+                        "user_id": items[index][1],
+                        "score": score,
+                        "total_points": key.total_points,
+                        "time_taken": time_taken,
+                        "completed_at": submitted_at.isoformat()
+                    }
+
+            if updates:
+                db.execute(update(QuizAttempt), updates)
+                db.commit()
+
+            return results
+
+submission_grader = SubmissionGrader()
@@ -0,0 +1,188 @@
+# app/services/quiz_service.py
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decouple import config
+from sqlalchemy import insert, or_
+from sqlalchemy.orm import Session, selectinload
+from typing import List, Optional
+
+from app.models.quiz import Quiz, QuizQuestion, QuizAttempt
+from app.schemas.quiz import QuizCreate
+from app.schemas.views import QuizPublicView, QuizQuestionView, QuizView
+from app.services.quiz_grading import as_utc, regrade_quiz
+from app.utils.cache import TTLCache
+from app.utils.http import strong_etag
+from app.utils.serialization import dumps
+
+QUIZ_PAYLOAD_CACHE_SIZE = config("QUIZ_PAYLOAD_CACHE_SIZE", default=1024, cast=int)
+# Payloads never change once published; the TTL only bounds memory held by old quizzes
+QUIZ_PAYLOAD_TTL = config("QUIZ_PAYLOAD_TTL", default=86400, cast=float)
+
+@dataclass(frozen=True)
+class QuizPayload:
+    """A quiz's public view, serialized once and served as-is to every student"""
+    body: bytes
+    etag: str
+    start_time: Optional[datetime]
+
+quiz_payloads = TTLCache(maxsize=QUIZ_PAYLOAD_CACHE_SIZE, ttl=QUIZ_PAYLOAD_TTL)
+
+class QuizService:
+
+    @staticmethod
+    def create_quiz(db: Session, quiz_data: QuizCreate, creator_id: int) -> Quiz:
+        """Create a quiz together with its questions in one transaction"""
+        if quiz_data.start_time and quiz_data.end_time and as_utc(quiz_data.end_time) <= as_utc(quiz_data.start_time):
+            raise ValueError("end_time must be after start_time")
+
+        for question in quiz_data.questions:
+            if question.question_type == "mcq" and not question.options:
+                raise ValueError("Multiple choice questions need options")
+
+        new_quiz = Quiz(
+            title=quiz_data.title,
+            description=quiz_data.description,
+            subject=quiz_data.subject,
+            difficulty=quiz_data.difficulty,
+            time_limit=quiz_data.time_limit,
+            start_time=quiz_data.start_time,
+            end_time=quiz_data.end_time,
+            total_questions=len(quiz_data.questions),
+            total_points=sum(question.points for question in quiz_data.questions),
+            created_by=creator_id
+        )
+        new_quiz.questions = [
+            QuizQuestion(
+                question_text=question.question_text,
+                question_type=question.question_type,
+                options=question.options,
+                correct_answer=question.correct_answer,
+                explanation=question.explanation,
+                points=question.points,
+                order_index=index
+            )
+            for index, question in enumerate(quiz_data.questions)
+        ]
+
+        db.add(new_quiz)
+        db.commit()
+        db.refresh(new_quiz)
+
+        # Publish the public view now so that the first students to open it hit the cache
+        quiz_payloads.set(new_quiz.id, QuizService.build_payload(new_quiz))
+
+        return new_quiz
+
+    @staticmethod
+    def build_payload(quiz: Quiz) -> QuizPayload:
+        """Serialize a quiz and its questions with the answers left out"""
+        public = QuizPublicView(
+            quiz.id, quiz.title, quiz.description, quiz.subject, quiz.difficulty, quiz.time_limit,
+            quiz.total_questions, quiz.total_points, quiz.start_time, quiz.end_time,
+            questions=[
+                QuizQuestionView(
+                    question.id, question.question_text, question.question_type,
+                    question.options, question.points, question.order_index
+                )
+                for question in quiz.questions
+            ]
+        )
+        body = dumps(public)
+        return QuizPayload(body=body, etag=strong_etag(body), start_time=quiz.start_time)
+
+    @staticmethod
+    def get_public_payload(db: Session, quiz_id: int) -> Optional[QuizPayload]:
+        """Cached public view of an active quiz; two queries on a miss, none on a hit"""
+        payload = quiz_payloads.get(quiz_id)
+        if payload is None:
+            quiz = db.query(Quiz).options(selectinload(Quiz.questions)).filter(
+                Quiz.id == quiz_id,
+                Quiz.is_active == True
+            ).first()
+            if quiz is None:
+                return None
+            payload = QuizService.build_payload(quiz)
+            quiz_payloads.set(quiz_id, payload)
+            # Release the connection; nothing else in the request needs it
+            db.commit()
+
+        return payload
+
+    @staticmethod
+    def get_available_quizzes(db: Session, subject: Optional[str] = None) -> List[QuizView]:
+        """Active quizzes that have not ended yet, soonest first"""
+        now = datetime.now(timezone.utc)
+        query = db.query(
+            Quiz.id, Quiz.title, Quiz.description, Quiz.subject, Quiz.difficulty, Quiz.time_limit,
+            Quiz.total_questions, Quiz.total_points, Quiz.start_time, Quiz.end_time
+        ).filter(
+            Quiz.is_active == True,
+            or_(Quiz.end_time.is_(None), Quiz.end_time > now)
+        )
+
+        if subject:
+            query = query.filter(Quiz.subject == subject)
+
+        return [QuizView(*quiz) for quiz in query.order_by(Quiz.start_time, Quiz.id).all()]
+
+    @staticmethod
+    def start_attempt(db: Session, quiz_id: int, user_id: int) -> dict:
+        """Open an attempt for a user, or return the one already open"""
+        quiz = db.query(Quiz.is_active, Quiz.start_time, Quiz.end_time, Quiz.total_points).filter(
+            Quiz.id == quiz_id
+        ).first()
+        if quiz is None or not quiz.is_active:
+            raise ValueError("Quiz not found")
+
+        now = datetime.now(timezone.utc)
+        if quiz.start_time and now < as_utc(quiz.start_time):
+            raise ValueError("This quiz has not started yet")
+        if quiz.end_time and now > as_utc(quiz.end_time):
+            raise ValueError("This quiz has ended")
+
+        attempt = db.query(QuizAttempt.id, QuizAttempt.started_at).filter(
+            QuizAttempt.quiz_id == quiz_id,
+            QuizAttempt.user_id == user_id,
+            QuizAttempt.is_completed == False
+        ).first()
+        if attempt is None:
+            attempt = db.execute(
+                insert(QuizAttempt)
+                .values(quiz_id=quiz_id, user_id=user_id, total_points=quiz.total_points, is_completed=False)
+                .returning(QuizAttempt.id, QuizAttempt.started_at)
+            ).first()
+        # Commit either way so no connection is held for the rest of the request
+        db.commit()
+
+        return {
+            "attempt_id": attempt.id,
+            "quiz_id": quiz_id,
+            "started_at": attempt.started_at.isoformat()
+        }
+
+    @staticmethod
+    def regrade(db: Session, quiz_id: int, user_id: int) -> int:
+        """Re-score all completed attempts; only the quiz creator may do this"""
+        created_by = db.query(Quiz.created_by).filter(Quiz.id == quiz_id).scalar()
+        if created_by is None:
+            raise ValueError("Quiz not found")
+        if created_by != user_id:
+            raise ValueError("Only the quiz creator can regrade it")
+
+        return regrade_quiz(db, quiz_id)
+
+    @staticmethod
+    def to_dict(quiz) -> dict:
+        """Plain representation of a quiz (ORM object or row) without its questions"""
+        return {
+            "id": quiz.id,
+            "title": quiz.title,
+            "description": quiz.description,
+            "subject": quiz.subject,
+            "difficulty": quiz.difficulty,
+            "time_limit": quiz.time_limit,
+            "total_questions": quiz.total_questions,
+            "total_points": quiz.total_points,
+            "start_time": quiz.start_time.isoformat() if quiz.start_time else None,
+            "end_time": quiz.end_time.isoformat() if quiz.end_time else None
+        }
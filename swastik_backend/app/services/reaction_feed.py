@@ -0,0 +1,73 @@
+# app/services/reaction_feed.py
+import asyncio
+import logging
+from decouple import config
+from typing import Dict, Optional, Tuple
+
+from app.services.connection_manager import manager, room_channel
+from app.services.message_service import MessageService
+
+logger = logging.getLogger(__name__)
+
+# Reaction changes are pushed to rooms at most this often
+REACTION_FLUSH_INTERVAL = config("REACTION_FLUSH_INTERVAL", default=0.5, cast=float)
+
+class ReactionFeed:
+    """Broadcasts reaction changes per room as coalesced deltas.
+
+    `record` only notes the new count of a (message, emoji) pair; every
+    `flush_interval` seconds each room with changes gets one "reactions"
+    event listing just the pairs that changed, with their latest counts.
+    A burst of toggles on a popular message in a large room therefore
+    costs one small event per interval, not one per toggle per socket.
+    Counts are absolute, so a dropped or repeated event does no harm.
+    """
+
+    def __init__(self, flush_interval: float = REACTION_FLUSH_INTERVAL):
+        self.flush_interval = flush_interval
+        # room_id -> (message_id, emoji) -> latest count
+        self._pending: Dict[int, Dict[Tuple[int, str], int]] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Publish whatever is buffered, then stop"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await self._flush()
+
+    def record(self, reaction: dict) -> None:
+        changes = self._pending.setdefault(reaction["room_id"], {})
+        changes[(reaction["message_id"], reaction["emoji"])] = reaction["count"]
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, {}
+        for room_id, changes in pending.items():
+            event = MessageService.encode_event("reactions", {
+                "room_id": room_id,
+                "changes": [
+                    {"message_id": message_id, "emoji": emoji, "count": count}
+                    for (message_id, emoji), count in changes.items()
+                ]
+            })
+            try:
+                await manager.publish(room_channel(room_id), event)
+            except Exception:
+                logger.exception("Could not publish reaction changes for room %d", room_id)
+
+reaction_feed = ReactionFeed()
@@ -1,10 +1,35 @@
 # app/services/room_service.py
+from sqlalchemy import case, delete, exists, func, or_, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.models.message import Message
 from app.models.room import Room, RoomMember
 from app.models.user import User
 from app.schemas.room import RoomCreate, RoomUpdate
+from app.schemas.views import RoomView, UnreadView
+from app.utils.cache import TTLCache
+from decouple import config
 from typing import List, Optional
 
+ROOM_DIRECTORY_TTL = config("ROOM_DIRECTORY_TTL", default=60, cast=float)
+ROOM_DIRECTORY_MAX_ROOMS = config("ROOM_DIRECTORY_MAX_ROOMS", default=5000, cast=int)
+
+DIRECTORY_SORTS = {
+    "popular": (Room.member_count.desc(), Room.id.desc()),
+    "active": (Room.last_activity_at.desc().nulls_last(), Room.id.desc()),
+    "newest": (Room.created_at.desc(), Room.id.desc()),
+}
+
+# (university_domain, sort) -> every directory entry for that university, in order
+directory_cache = TTLCache(maxsize=1024, ttl=ROOM_DIRECTORY_TTL)
+
+# The columns of RoomView, in field order
+ROOM_VIEW_COLUMNS = (
+    Room.id, Room.name, Room.description, Room.room_type, Room.subject, Room.university_domain,
+    Room.max_members, Room.member_count, Room.last_activity_at, Room.created_at
+)
+
 class RoomService:
     
     @staticmethod
@@ -12,11 +37,11 @@ class RoomService:
         """Create a new chat room"""
         
         # Get creator info for university domain
-        creator = db.query(User).filter(User.id == creator_id).first()
+        creator = db.query(User.university_domain).filter(User.id == creator_id).first()
         if not creator:
             raise ValueError("Creator not found")
         
-        # Create room
+        # Create room with the creator as admin; both rows go out in one flush
         new_room = Room(
             name=room_data.name,
             description=room_data.description,
@@ -24,22 +49,17 @@ class RoomService:
             subject=room_data.subject,
             university_domain=creator.university_domain,
             max_members=room_data.max_members or 100,
+            member_count=1,
             created_by=creator_id
         )
+        new_room.members.append(RoomMember(user_id=creator_id, role="admin"))
         
         db.add(new_room)
         db.commit()
         db.refresh(new_room)
         
-        # Add creator as admin
-        creator_membership = RoomMember(
-            room_id=new_room.id,
-            user_id=creator_id,
-            role="admin"
-        )
-        
-        db.add(creator_membership)
-        db.commit()
+        if new_room.room_type == "public":
+            RoomService.invalidate_directory(new_room.university_domain)
         
         return new_room
     
@@ -47,112 +67,301 @@ class RoomService:
     def join_room(db: Session, room_id: int, user_id: int) -> dict:
         """Join a user to a room"""
         
-        # Check if room exists
-        room = db.query(Room).filter(Room.id == room_id).first()
-        if not room:
-            raise ValueError("Room not found")
-        
-        # Check if user exists
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            raise ValueError("User not found")
-        
-        # Check if already a member
-        existing_membership = db.query(RoomMember).filter(
-            RoomMember.room_id == room_id,
-            RoomMember.user_id == user_id
+        # Claim a seat atomically: the UPDATE only matches an active room with
+        # spare capacity that the user's university may join, and concurrent
+        # joiners serialize on the room row instead of racing on COUNT(*)
+        user_domain = select(User.university_domain).where(User.id == user_id).scalar_subquery()
+        claimed = db.execute(
+            update(Room)
+            .where(
+                Room.id == room_id,
+                Room.is_active == True,
+                Room.member_count < Room.max_members,
+                exists().where(User.id == user_id),
+                or_(Room.university_domain.is_(None), Room.university_domain == user_domain)
+            )
+            .values(member_count=Room.member_count + 1)
+            .returning(Room.name, Room.message_seq)
+            .execution_options(synchronize_session=False)
         ).first()
         
-        if existing_membership:
-            raise ValueError("Already a member of this room")
-        
-        # Check university domain for restricted rooms
-        if room.university_domain and room.university_domain != user.university_domain:
-            raise ValueError("This room is restricted to your university")
+        if claimed is None:
+            db.rollback()
+            raise ValueError(RoomService._join_rejection(db, room_id, user_id))
         
-        # Check room capacity
-        current_members = db.query(RoomMember).filter(RoomMember.room_id == room_id).count()
-        if current_members >= room.max_members:
-            raise ValueError("Room is at maximum capacity")
-        
-        # Add user to room
-        new_membership = RoomMember(
+        # Add user to room; the unique constraint replaces the membership check.
+        # Earlier history does not count as unread for a new member
+        db.add(RoomMember(
             room_id=room_id,
             user_id=user_id,
-            role="member"
-        )
+            role="member",
+            last_read_seq=claimed.message_seq
+        ))
         
-        db.add(new_membership)
-        db.commit()
+        try:
+            db.commit()
+        except IntegrityError:
+            # Rolls the seat claim back too
+            db.rollback()
+            raise ValueError("Already a member of this room")
         
         return {
-            "message": f"Successfully joined {room.name}",
+            "message": f"Successfully joined {claimed.name}",
             "room_id": room_id,
             "role": "member"
         }
     
     @staticmethod
-    def get_user_rooms(db: Session, user_id: int) -> List[Room]:
+    def _join_rejection(db: Session, room_id: int, user_id: int) -> str:
+        """Explain why join_room could not claim a seat (one query, error path only)"""
+        
+        is_member = exists().where(RoomMember.room_id == room_id, RoomMember.user_id == user_id)
+        row = db.query(
+            Room.is_active, Room.member_count, Room.max_members, Room.university_domain,
+            User.id.label("user_id"), User.university_domain.label("user_domain"),
+            is_member.label("is_member")
+        ).select_from(Room).outerjoin(User, User.id == user_id).filter(Room.id == room_id).first()
+        
+        if row is None or not row.is_active:
+            return "Room not found"
+        if row.user_id is None:
+            return "User not found"
+        if row.is_member:
+            return "Already a member of this room"
+        if row.university_domain and row.university_domain != row.user_domain:
+            return "This room is restricted to your university"
+        return "Room is at maximum capacity"
+    
+    @staticmethod
+    def get_user_rooms(db: Session, user_id: int) -> List[RoomView]:
         """Get all rooms a user is a member of"""
         
-        room_memberships = db.query(RoomMember).filter(RoomMember.user_id == user_id).all()
-        room_ids = [membership.room_id for membership in room_memberships]
+        rows = db.execute(
+            select(*ROOM_VIEW_COLUMNS).join(RoomMember, RoomMember.room_id == Room.id).where(
+                RoomMember.user_id == user_id,
+                Room.is_active == True
+            )
+        ).all()
+        return [RoomView(*row) for row in rows]
+    
+    @staticmethod
+    def is_member(db: Session, room_id: int, user_id: int) -> bool:
+        """Check whether a user belongs to an active room"""
         
-        return db.query(Room).filter(Room.id.in_(room_ids), Room.is_active == True).all()
+        return db.execute(RoomService._membership_statement(room_id, user_id)).first() is not None
     
     @staticmethod
-    def get_public_rooms(db: Session, university_domain: str = None) -> List[Room]:
-        """Get public rooms, optionally filtered by university"""
+    async def is_member_async(db: AsyncSession, room_id: int, user_id: int) -> bool:
+        """is_member on an AsyncSession"""
         
-        query = db.query(Room).filter(
-            Room.room_type == "public",
+        return (await db.execute(RoomService._membership_statement(room_id, user_id))).first() is not None
+    
+    @staticmethod
+    def _membership_statement(room_id: int, user_id: int):
+        return select(RoomMember.id).join(Room, Room.id == RoomMember.room_id).where(
+            RoomMember.room_id == room_id,
+            RoomMember.user_id == user_id,
             Room.is_active == True
-        )
+        ).limit(1)
+    
+    @staticmethod
+    def mark_read(db: Session, room_id: int, user_id: int, message_id: Optional[int] = None) -> dict:
+        """Advance a member's read cursor to a message, or to the latest one.
+        
+        The cursor only moves forward, so out-of-order acknowledgements from
+        several devices are harmless.
+        """
+        
+        if message_id is None:
+            target = select(Room.message_seq).where(Room.id == room_id).scalar_subquery()
+            target_message = select(Message.id).where(Message.room_id == room_id).order_by(
+                Message.created_at.desc(), Message.id.desc()
+            ).limit(1).scalar_subquery()
+        else:
+            target = select(Message.room_seq).where(
+                Message.id == message_id, Message.room_id == room_id
+            ).scalar_subquery()
+            target_message = message_id
+        
+        cursor = db.execute(
+            update(RoomMember)
+            .where(RoomMember.room_id == room_id, RoomMember.user_id == user_id)
+            .values(
+                last_read_seq=case((target > RoomMember.last_read_seq, target), else_=RoomMember.last_read_seq),
+                last_read_message_id=case((target > RoomMember.last_read_seq, target_message), else_=RoomMember.last_read_message_id)
+            )
+            .returning(RoomMember.last_read_seq, RoomMember.last_read_message_id, target.label("target"))
+            .execution_options(synchronize_session=False)
+        ).first()
+        
+        if cursor is None:
+            db.rollback()
+            raise ValueError("Not a member of this room")
+        if cursor.target is None:
+            db.rollback()
+            raise ValueError("Message not found in this room")
+        db.commit()
+        
+        return {
+            "room_id": room_id,
+            "last_read_seq": cursor.last_read_seq,
+            "last_read_message_id": cursor.last_read_message_id
+        }
+    
+    @staticmethod
+    def get_unread_counts(db: Session, user_id: int) -> List[UnreadView]:
+        """Unread message counts for all of a user's rooms in one query.
+        
+        The count is the distance between the room's message sequence and the
+        member's read cursor, so the cost grows with the number of rooms and
+        never touches the messages table.
+        """
+        
+        rows = db.query(
+            RoomMember.room_id,
+            (Room.message_seq - RoomMember.last_read_seq).label("unread_count"),
+            RoomMember.last_read_message_id,
+            Room.last_activity_at
+        ).join(Room, Room.id == RoomMember.room_id).filter(
+            RoomMember.user_id == user_id,
+            Room.is_active == True
+        ).all()
         
-        if university_domain:
-            query = query.filter(
-                (Room.university_domain == university_domain) | 
-                (Room.university_domain.is_(None))
+        return [
+            UnreadView(row.room_id, max(row.unread_count, 0), row.last_read_message_id, row.last_activity_at)
+            for row in rows
+        ]
+    
+    @staticmethod
+    def get_public_rooms(
+        db: Session,
+        university_domain: str = None,
+        page: int = 1,
+        page_size: int = 20,
+        sort: str = "popular"
+    ) -> dict:
+        """Get a page of the public room directory, optionally filtered by university.
+        
+        The full ordered directory for a university is cached for
+        ROOM_DIRECTORY_TTL seconds, so paging and repeat visits never touch
+        the database. Member counts and last activity come from columns
+        maintained on Room, not from per-room subqueries.
+        """
+        
+        if sort not in DIRECTORY_SORTS:
+            raise ValueError(f"Unknown sort order, use one of: {', '.join(DIRECTORY_SORTS)}")
+        
+        entries = directory_cache.get((university_domain, sort))
+        if entries is None:
+            query = db.query(*ROOM_VIEW_COLUMNS).filter(
+                Room.room_type == "public",
+                Room.is_active == True
             )
+            
+            if university_domain:
+                query = query.filter(
+                    (Room.university_domain == university_domain) | 
+                    (Room.university_domain.is_(None))
+                )
+            
+            rows = query.order_by(*DIRECTORY_SORTS[sort]).limit(ROOM_DIRECTORY_MAX_ROOMS).all()
+            entries = [RoomView(*row) for row in rows]
+            directory_cache.set((university_domain, sort), entries)
         
-        return query.all()
+        start = (page - 1) * page_size
+        return {
+            "rooms": entries[start:start + page_size],
+            "page": page,
+            "page_size": page_size,
+            "total": len(entries)
+        }
+    
+    @staticmethod
+    def invalidate_directory(university_domain: Optional[str]) -> None:
+        """Drop cached directory pages that may list a room of this university"""
+        
+        if university_domain is None:
+            # Unrestricted rooms appear in every university's directory
+            directory_cache.clear()
+            return
+        
+        for sort in DIRECTORY_SORTS:
+            directory_cache.delete((university_domain, sort))
+            directory_cache.delete((None, sort))
+    
+    @staticmethod
+    def to_dict(room) -> dict:
+        """Plain representation of a room (ORM object or row) for API responses"""
+        return {
+            "id": room.id,
+            "name": room.name,
+            "description": room.description,
+            "room_type": room.room_type,
+            "subject": room.subject,
+            "university_domain": room.university_domain,
+            "max_members": room.max_members,
+            "member_count": room.member_count,
+            "last_activity_at": room.last_activity_at.isoformat() if room.last_activity_at else None,
+            "created_at": room.created_at.isoformat()
+        }
     
     @staticmethod
     def leave_room(db: Session, room_id: int, user_id: int) -> dict:
         """Remove user from room"""
         
-        membership = db.query(RoomMember).filter(
-            RoomMember.room_id == room_id,
-            RoomMember.user_id == user_id
+        left = db.execute(
+            delete(RoomMember)
+            .where(RoomMember.room_id == room_id, RoomMember.user_id == user_id)
+            .returning(RoomMember.role)
+            .execution_options(synchronize_session=False)
         ).first()
         
-        if not membership:
+        if not left:
+            db.rollback()
             raise ValueError("Not a member of this room")
         
-        # Check if user is the only admin
-        if membership.role == "admin":
-            admin_count = db.query(RoomMember).filter(
-                RoomMember.room_id == room_id,
-                RoomMember.role == "admin"
-            ).count()
+        room_values = {"member_count": Room.member_count - 1}
+        
+        # Make sure the room keeps an admin
+        if left.role == "admin":
+            successor = db.query(RoomMember).filter(
+                RoomMember.room_id == room_id
+            ).order_by(
+                case((RoomMember.role == "admin", 0), else_=1),
+                RoomMember.joined_at,
+                RoomMember.id
+            ).first()
             
-            if admin_count == 1:
-                # Transfer admin to another member or delete room
-                other_members = db.query(RoomMember).filter(
-                    RoomMember.room_id == room_id,
-                    RoomMember.user_id != user_id
-                ).first()
-                
-                if other_members:
-                    other_members.role = "admin"
-                    db.commit()
-                else:
-                    # No other members, delete the room
-                    room = db.query(Room).filter(Room.id == room_id).first()
-                    room.is_active = False
-                    db.commit()
-        
-        db.delete(membership)
+            if successor is None:
+                # No other members, delete the room
+                room_values["is_active"] = False
+            elif successor.role != "admin":
+                successor.role = "admin"
+        
+        deactivated = db.execute(
+            update(Room)
+            .where(Room.id == room_id)
+            .values(**room_values)
+            .returning(Room.room_type, Room.university_domain)
+            .execution_options(synchronize_session=False)
+        ).first()
         db.commit()
         
+        if "is_active" in room_values and deactivated.room_type == "public":
+            RoomService.invalidate_directory(deactivated.university_domain)
+        
         return {"message": "Successfully left the room"}
+    
+    @staticmethod
+    def sync_member_counts(db: Session) -> None:
+        """Recompute Room.member_count from room_members (backfill/repair)"""
+        
+        member_count = select(func.count(RoomMember.id)).where(
+            RoomMember.room_id == Room.id
+        ).scalar_subquery()
+        db.execute(
+            update(Room)
+            .values(member_count=member_count)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
@@ -0,0 +1,97 @@
+# app/services/search_service.py
+import re
+from sqlalchemy import column, func, literal_column, select, table
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Tuple
+
+from app.models.message import Message, SEARCH_TABLE
+
+MAX_SEARCH_TERMS = 8
+
+_TERM = re.compile(r"\w+")
+
+def parse_terms(query: str) -> List[str]:
+    """Split a search box query into plain word terms, dropping any syntax"""
+    terms = _TERM.findall(query.casefold())[:MAX_SEARCH_TERMS]
+    if not terms:
+        raise ValueError("Search query is empty")
+    return terms
+
+class SearchBackend:
+    """Full-text index over message content.
+
+    Terms are ANDed, and the last one also matches as a prefix so that
+    results keep up while the user is still typing. Indexing is done by
+    the message write paths, in the same transaction as the row change.
+    """
+
+    def index(self, db: Session, messages: Iterable[Tuple[int, str]]) -> None:
+        """Add (id, content) pairs to the index"""
+        raise NotImplementedError
+
+    def unindex(self, db: Session, messages: Iterable[Tuple[int, str]]) -> None:
+        """Remove (id, content) pairs; content must be what was indexed"""
+        raise NotImplementedError
+
+    def matches(self, terms: List[str], columns):
+        """(query, relevance): `columns` of messages matching every term, plus relevance"""
+        raise NotImplementedError
+
+class SQLiteSearchBackend(SearchBackend):
+    """FTS5 table over messages.content (see app.models.message), ranked by BM25"""
+
+    _search = table(SEARCH_TABLE, column("rowid"), column("content"))
+    # External-content FTS5 tables delete through this special command column
+    _commands = table(SEARCH_TABLE, column(SEARCH_TABLE), column("rowid"), column("content"))
+
+    def index(self, db: Session, messages: Iterable[Tuple[int, str]]) -> None:
+        rows = [{"rowid": message_id, "content": content} for message_id, content in messages]
+        if rows:
+            db.execute(self._search.insert(), rows)
+
+    def unindex(self, db: Session, messages: Iterable[Tuple[int, str]]) -> None:
+        rows = [{SEARCH_TABLE: "delete", "rowid": message_id, "content": content} for message_id, content in messages]
+        if rows:
+            db.execute(self._commands.insert(), rows)
+
+    def matches(self, terms: List[str], columns):
+        expression = " ".join(f'"{term}"' for term in terms) + "*"
+        search = literal_column(SEARCH_TABLE)
+        # bm25() is lower for better matches
+        relevance = (-func.bm25(search)).label("relevance")
+        query = select(*columns, relevance).join(
+            self._search, self._search.c.rowid == Message.id
+        ).where(search.op("MATCH")(expression))
+        return query, relevance
+
+class PostgresSearchBackend(SearchBackend):
+    """Generated tsvector column with a partial GIN index, ranked by ts_rank_cd.
+
+    PostgreSQL recomputes the vector whenever content changes and the index
+    predicate drops deleted rows, so there is nothing to maintain by hand.
+    """
+
+    def index(self, db: Session, messages: Iterable[Tuple[int, str]]) -> None:
+        pass
+
+    def unindex(self, db: Session, messages: Iterable[Tuple[int, str]]) -> None:
+        pass
+
+    def matches(self, terms: List[str], columns):
+        tsquery = func.to_tsquery("simple", " & ".join(terms) + ":*")
+        vector = literal_column("messages.search_vector")
+        relevance = func.ts_rank_cd(vector, tsquery).label("relevance")
+        return select(*columns, relevance).where(vector.op("@@")(tsquery)), relevance
+
+_BACKENDS: Dict[str, SearchBackend] = {
+    "sqlite": SQLiteSearchBackend(),
+    "postgresql": PostgresSearchBackend(),
+}
+
+def search_backend_for(db: Session) -> SearchBackend:
+    """The search backend matching the database the session is bound to"""
+    dialect = db.get_bind().dialect.name
+    try:
+        return _BACKENDS[dialect]
+    except KeyError:
+        raise RuntimeError(f"Message search is not supported on {dialect}")
@@ -0,0 +1,152 @@
+# app/services/user_cache.py
+import json
+import time
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from decouple import config
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from typing import Optional
+
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.utils.cache import TTLCache, RedisCache
+from app.utils.metrics import Counter, Gauge, Histogram
+
+USER_CACHE_BACKEND = config("USER_CACHE_BACKEND", default="memory")  # memory, redis
+USER_CACHE_SIZE = config("USER_CACHE_SIZE", default=50000, cast=int)
+USER_CACHE_TTL = config("USER_CACHE_TTL", default=300, cast=float)
+# With the shared backend, local copies are kept briefly so that an
+# invalidation on one worker reaches the others within this many seconds
+USER_CACHE_LOCAL_TTL = config("USER_CACHE_LOCAL_TTL", default=5, cast=float)
+
+LOOKUPS = Counter("user_cache_lookups_total", "Authenticated user lookups", labelnames=("result",))
+LOOKUP_LATENCY = Histogram("user_cache_lookup_seconds", "Time to resolve the current user", labelnames=("result",))
+HIT_RATIO = Gauge("user_cache_hit_ratio", "Share of user lookups served from cache")
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Read-only snapshot of an authenticated user, safe to share across requests"""
+    id: int
+    username: str
+    email: str
+    first_name: str
+    last_name: str
+    university_domain: str
+    university_badge: str
+    is_verified: bool
+    is_active: bool
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserPrincipal":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            first_name=user.first_name,
+            last_name=user.last_name,
+            university_domain=user.university_domain,
+            university_badge=user.university_badge,
+            is_verified=bool(user.is_verified),
+            is_active=bool(user.is_active),
+            created_at=user.created_at
+        )
+
+    def to_json(self) -> str:
+        data = asdict(self)
+        data["created_at"] = self.created_at.isoformat() if self.created_at else None
+        return json.dumps(data)
+
+    @classmethod
+    def from_json(cls, raw: str) -> "UserPrincipal":
+        data = json.loads(raw)
+        if data["created_at"]:
+            data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(**data)
+
+class UserPrincipalCache:
+    """Token subject -> UserPrincipal cache in front of the users table"""
+
+    def __init__(self, maxsize: int = USER_CACHE_SIZE, ttl: float = USER_CACHE_TTL, shared: Optional[RedisCache] = None):
+        self.shared = shared
+        self.local = TTLCache(maxsize, USER_CACHE_LOCAL_TTL if shared is not None else ttl)
+        self._hits = 0
+        self._misses = 0
+
+    async def get(self, username: str) -> Optional[UserPrincipal]:
+        principal = self.local.get(username)
+        if principal is None and self.shared is not None:
+            raw = await self.shared.get(username)
+            if raw is not None:
+                principal = UserPrincipal.from_json(raw)
+                self.local.set(username, principal)
+        return principal
+
+    async def set(self, principal: UserPrincipal) -> None:
+        self.local.set(principal.username, principal)
+        if self.shared is not None:
+            await self.shared.set(principal.username, principal.to_json())
+
+    def invalidate(self, username: str) -> None:
+        """Forget a user; call after any change to their row"""
+        self.local.delete(username)
+        if self.shared is not None:
+            self.shared.delete(username)
+
+    async def resolve(self, db: Session, username: str) -> Optional[UserPrincipal]:
+        """Cached equivalent of AuthService.get_user_by_username"""
+        started = time.perf_counter()
+
+        principal = await self.get(username)
+        if principal is not None:
+            self._record("hit", started)
+            return principal
+
+        user = AuthService.get_user_by_username(db, username)
+        if user is not None:
+            principal = UserPrincipal.from_user(user)
+        # End the read transaction so the pooled connection is not held while
+        # the request awaits other work (batch writers, the password hasher)
+        db.commit()
+        if principal is not None:
+            await self.set(principal)
+
+        self._record("miss", started)
+        return principal
+
+    def _record(self, result: str, started: float) -> None:
+        LOOKUP_LATENCY.labels(result).observe(time.perf_counter() - started)
+        LOOKUPS.labels(result).inc()
+        if result == "hit":
+            self._hits += 1
+        else:
+            self._misses += 1
+        HIT_RATIO.set(self._hits / (self._hits + self._misses))
+
+def _build_cache() -> UserPrincipalCache:
+    if USER_CACHE_BACKEND == "redis":
+        return UserPrincipalCache(shared=RedisCache(config("REDIS_URL"), "user", USER_CACHE_TTL))
+    return UserPrincipalCache()
+
+user_cache = _build_cache()
+
+# Invalidate cached principals whenever a User row changes through the ORM
+# (email verification, deactivation, profile edits). Names are collected at
+# flush time and dropped from the cache once the transaction commits.
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_stale_user(mapper, connection, target):
+    stale = object_session(target).info.setdefault("stale_usernames", set())
+    stale.add(target.username)
+    stale.update(inspect(target).attrs.username.history.deleted or ())
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_stale_users(session):
+    for username in session.info.pop("stale_usernames", ()):
+        user_cache.invalidate(username)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_stale_users(session):
+    session.info.pop("stale_usernames", None)
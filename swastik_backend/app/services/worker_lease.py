@@ -0,0 +1,61 @@
+# app/services/worker_lease.py
+import logging
+import os
+import socket
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from typing import Iterator
+
+from app.models.worker_lease import WorkerLease
+from app.utils.database import SessionLocal, register_models
+
+logger = logging.getLogger(__name__)
+
+HOST = socket.gethostname()
+
+def _acquire(name: str, holder: str, ttl: float, session_factory) -> bool:
+    now = datetime.now(timezone.utc)
+    expires_at = now + timedelta(seconds=ttl)
+    with session_factory() as db:
+        try:
+            db.add(WorkerLease(name=name, holder=holder, expires_at=expires_at))
+            db.commit()
+            return True
+        except IntegrityError:
+            db.rollback()
+        # Held before: take it over only once the last holder's lease ran out
+        taken = db.execute(
+            update(WorkerLease)
+            .where(WorkerLease.name == name, WorkerLease.expires_at < now)
+            .values(holder=holder, expires_at=expires_at)
+        ).rowcount
+        db.commit()
+        return taken == 1
+
+def _release(name: str, holder: str, session_factory) -> None:
+    with session_factory() as db:
+        db.execute(delete(WorkerLease).where(WorkerLease.name == name, WorkerLease.holder == holder))
+        db.commit()
+
+@contextmanager
+def worker_lease(name: str, ttl: float, session_factory=SessionLocal) -> Iterator[bool]:
+    """Run a background pass in one process at a time, across every API and Celery worker.
+
+    Yields True if this process holds the named lease for the pass, False if
+    another one does. The lease lapses after `ttl` seconds, so a worker that
+    died mid-pass does not block the pass for good.
+    """
+    # Celery loads no routes, and with them not every model the mappers need
+    register_models()
+    holder = f"{HOST}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+    acquired = _acquire(name, holder, ttl, session_factory)
+    if not acquired:
+        logger.debug("Skipping %s: another worker holds the lease", name)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            _release(name, holder, session_factory)
@@ -0,0 +1,114 @@
+# app/utils/batching.py
+import asyncio
+import logging
+import time
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, List, Optional
+
+from app.utils.metrics import Counter, Histogram
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """Base class for write-behind queues that flush in micro-batches.
+
+    Callers await `_enqueue`, which resolves with the item's result only
+    after the batch containing it has been written. A batch is flushed when
+    it reaches `max_batch_size` or `max_delay` seconds after its first item
+    arrived, whichever comes first; while a flush is running, new items keep
+    accumulating for the next one. Subclasses implement `_write`, which runs
+    in a worker thread and returns one result per item, in order; an
+    Exception in that list fails only its own item.
+    """
+
+    def __init__(
+        self,
+        max_batch_size: int,
+        max_delay: float,
+        max_pending: int,
+        batch_size: Optional[Histogram] = None,
+        flush_latency: Optional[Histogram] = None,
+        failures: Optional[Counter] = None
+    ):
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._batch_size = batch_size
+        self._flush_latency = flush_latency
+        self._failures = failures
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Flush whatever is queued, then stop the worker"""
+        if self._worker is None:
+            return
+        await self._queue.join()
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+    async def _enqueue(self, item: Any) -> Any:
+        future = asyncio.get_running_loop().create_future()
+        # Blocks callers once max_pending items are waiting
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_delay
+
+            while len(batch) < self.max_batch_size:
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _flush(self, batch: List[tuple]) -> None:
+        started = time.perf_counter()
+        items = [item for item, _ in batch]
+
+        try:
+            results = await run_in_threadpool(self._write, items)
+        except Exception as e:
+            logger.exception("%s batch of %d failed", type(self).__name__, len(items))
+            results = [e] * len(items)
+
+        if self._flush_latency is not None:
+            self._flush_latency.observe(time.perf_counter() - started)
+        if self._batch_size is not None:
+            self._batch_size.observe(len(items))
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                if self._failures is not None:
+                    self._failures.inc()
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def _write(self, items: List[Any]) -> list:
+        raise NotImplementedError
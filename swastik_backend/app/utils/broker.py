@@ -0,0 +1,121 @@
+# app/utils/broker.py
+import asyncio
+import logging
+from typing import Callable, Optional, Set
+from decouple import config
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = config("REDIS_URL", default="")
+BROKER_BACKEND = config("BROKER_BACKEND", default="redis" if REDIS_URL else "memory")
+
+# Called with (channel, payload) for every message on a subscribed channel
+MessageHandler = Callable[[str, str], None]
+
+class Broker:
+    """Publish/subscribe transport that fans messages out to every worker"""
+
+    async def start(self, handler: MessageHandler) -> None:
+        raise NotImplementedError
+
+    async def stop(self) -> None:
+        raise NotImplementedError
+
+    async def subscribe(self, channel: str) -> None:
+        raise NotImplementedError
+
+    async def unsubscribe(self, channel: str) -> None:
+        raise NotImplementedError
+
+    async def publish(self, channel: str, payload: str) -> None:
+        raise NotImplementedError
+
+class InMemoryBroker(Broker):
+    """Single-process broker, used for local development and tests"""
+
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+        self._channels: Set[str] = set()
+
+    async def start(self, handler: MessageHandler) -> None:
+        self._handler = handler
+
+    async def stop(self) -> None:
+        self._handler = None
+        self._channels.clear()
+
+    async def subscribe(self, channel: str) -> None:
+        self._channels.add(channel)
+
+    async def unsubscribe(self, channel: str) -> None:
+        self._channels.discard(channel)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        if self._handler is not None and channel in self._channels:
+            self._handler(channel, payload)
+
+class RedisBroker(Broker):
+    """Redis pub/sub broker shared by all uvicorn workers"""
+
+    def __init__(self, url: str = REDIS_URL):
+        self._url = url
+        self._client = None
+        self._pubsub = None
+        self._handler: Optional[MessageHandler] = None
+        self._listener: Optional[asyncio.Task] = None
+        self._subscribed = asyncio.Event()
+
+    async def start(self, handler: MessageHandler) -> None:
+        import redis.asyncio as redis
+
+        self._handler = handler
+        self._client = redis.from_url(self._url, decode_responses=True)
+        self._pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        if self._pubsub is not None:
+            await self._pubsub.close()
+        if self._client is not None:
+            await self._client.close()
+
+    async def subscribe(self, channel: str) -> None:
+        await self._pubsub.subscribe(channel)
+        self._subscribed.set()
+
+    async def unsubscribe(self, channel: str) -> None:
+        await self._pubsub.unsubscribe(channel)
+
+    async def publish(self, channel: str, payload: str) -> None:
+        await self._client.publish(channel, payload)
+
+    async def _listen(self) -> None:
+        # The pubsub connection only exists after the first subscribe
+        await self._subscribed.wait()
+        while True:
+            try:
+                message = await self._pubsub.get_message(timeout=1.0)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Redis broker read failed, retrying")
+                await asyncio.sleep(1.0)
+                continue
+
+            if message is not None and message["type"] == "message":
+                try:
+                    self._handler(message["channel"], message["data"])
+                except Exception:
+                    logger.exception("Broker handler failed for %s", message["channel"])
+
+def get_broker() -> Broker:
+    """Build the broker configured for this deployment"""
+    if BROKER_BACKEND == "redis":
+        return RedisBroker(REDIS_URL)
+    return InMemoryBroker()
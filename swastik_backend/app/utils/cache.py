@@ -0,0 +1,91 @@
+# app/utils/cache.py
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """Bounded LRU mapping whose entries expire `ttl` seconds after being set"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 300.0, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+
+            value, expires_at = item
+            if expires_at <= self._timer():
+                del self._data[key]
+                return default
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class RedisCache:
+    """String cache in Redis, shared by every worker of a deployment"""
+
+    def __init__(self, url: str, prefix: str, ttl: float = 300.0):
+        import redis
+        import redis.asyncio
+
+        self.prefix = prefix
+        self.ttl = ttl
+        self._client = redis.asyncio.from_url(url, decode_responses=True)
+        # Invalidations can come from sync code running outside the event loop
+        self._sync_client = redis.Redis.from_url(url, decode_responses=True)
+
+    def _key(self, key: Hashable) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def get(self, key: Hashable) -> Optional[str]:
+        return await self._client.get(self._key(key))
+
+    async def set(self, key: Hashable, value: str, ttl: Optional[float] = None) -> None:
+        await self._client.set(self._key(key), value, ex=int(self.ttl if ttl is None else ttl))
+
+    def delete(self, key: Hashable) -> None:
+        """Remove a key; scheduled on the loop when called from async code"""
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self._sync_client.delete(self._key(key))
+            return
+        loop.create_task(self._delete(key))
+
+    async def _delete(self, key: Hashable) -> None:
+        try:
+            await self._client.delete(self._key(key))
+        except Exception:
+            logger.exception("Failed to invalidate %s", self._key(key))
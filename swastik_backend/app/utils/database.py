@@ -0,0 +1,135 @@
+# app/utils/database.py
+from functools import lru_cache
+from typing import List
+from sqlalchemy import DateTime, create_engine, inspect
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from decouple import config
+
+DATABASE_URL = config("DATABASE_URL", default="sqlite:///./swastik.db")
+
+# Pool sizing applies per engine and per worker process: with both engines
+# in use, a worker may hold up to 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+# connections, which must fit the server's max_connections
+DB_POOL_SIZE = config("DB_POOL_SIZE", default=10, cast=int)
+DB_MAX_OVERFLOW = config("DB_MAX_OVERFLOW", default=20, cast=int)
+DB_POOL_TIMEOUT = config("DB_POOL_TIMEOUT", default=10, cast=float)
+# Recycle before server or proxy idle timeouts close connections under us
+DB_POOL_RECYCLE = config("DB_POOL_RECYCLE", default=1800, cast=int)
+# Test connections on checkout so a database restart costs one retry, not errors
+DB_POOL_PRE_PING = config("DB_POOL_PRE_PING", default=True, cast=bool)
+
+def async_database_url(url: str) -> str:
+    """The asyncio driver URL for a sync DATABASE_URL (asyncpg, aiosqlite)"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend == "postgresql":
+        return parsed.set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+    if backend == "sqlite":
+        return parsed.set(drivername="sqlite+aiosqlite").render_as_string(hide_password=False)
+    return url
+
+ASYNC_DATABASE_URL = config("ASYNC_DATABASE_URL", default=async_database_url(DATABASE_URL))
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    """Pool and driver settings shared by the sync and async engines"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite":
+        if parsed.database in (None, "", ":memory:"):
+            # One shared in-memory database; there is nothing to pool
+            return {"connect_args": {"check_same_thread": False}}
+        options = {"connect_args": {"check_same_thread": False}}
+        if is_async:
+            # aiosqlite would otherwise open a new connection (and thread) per checkout
+            options["poolclass"] = AsyncAdaptedQueuePool
+    else:
+        options = {}
+
+    options.update(
+        pool_size=DB_POOL_SIZE,
+        max_overflow=DB_MAX_OVERFLOW,
+        pool_timeout=DB_POOL_TIMEOUT,
+        pool_recycle=DB_POOL_RECYCLE,
+        pool_pre_ping=DB_POOL_PRE_PING
+    )
+    return options
+
+engine = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@lru_cache(maxsize=None)
+def get_async_engine() -> AsyncEngine:
+    """The engine of the async path, created on first use.
+
+    Only the API needs it, so the CLI and Celery workers import this module
+    without loading the async driver (asyncpg).
+    """
+    return create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+
+# Async path for services migrated to `AsyncSession`, method by method;
+# sessions are bound to get_async_engine() when opened.
+# expire_on_commit=False: attribute access after commit would need a
+# lazy load, which is not allowed on an async session
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+# SQLite stores server_default timestamps as "YYYY-MM-DD HH:MM:SS"; bind
+# parameters must use the same text format or keyset comparisons break ties
+Timestamp = DateTime(timezone=True).with_variant(
+    sqlite.DATETIME(storage_format="%(year)04d-%(month)02d-%(day)02d %(hour)02d:%(minute)02d:%(second)02d"),
+    "sqlite"
+)
+
+def get_db():
+    """Get a database session for the current request"""
+    db = SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    """Get an async database session for the current request"""
+    async with AsyncSessionLocal(bind=get_async_engine()) as db:
+        yield db
+
+def register_models() -> None:
+    """Import every model so its table is registered on Base.metadata"""
+    from app.models import user, room, message, quiz, notification, email_outbox, attachment, worker_lease  # noqa: F401
+
+def create_tables(bind=None) -> None:
+    """Create missing database tables (python -m scripts.manage_db create; not run by the app)"""
+    register_models()
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    # create_all indexes only the tables it creates; add indexes since added to a model
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind, checkfirst=True)
+
+def missing_tables(bind=None) -> List[str]:
+    """Tables of the models that do not exist in the database yet"""
+    register_models()
+    existing = set(inspect(bind or engine).get_table_names())
+    return [name for name in Base.metadata.tables if name not in existing]
+
+def missing_columns(bind=None) -> List[str]:
+    """Model columns missing from tables that already exist, as table.column
+
+    create_all only adds tables, so columns added to an existing model have
+    to be added to the database by hand (ALTER TABLE ... ADD COLUMN)
+    """
+    register_models()
+    inspector = inspect(bind or engine)
+    existing = set(inspector.get_table_names())
+    missing = []
+    for name, table in Base.metadata.tables.items():
+        if name not in existing:
+            continue
+        present = {column["name"] for column in inspector.get_columns(name)}
+        missing += [f"{name}.{column.name}" for column in table.columns if column.name not in present]
+    return missing
@@ -0,0 +1,100 @@
+# app/utils/http.py
+import hashlib
+import os
+import re
+from typing import Optional, Tuple
+from fastapi.concurrency import run_in_threadpool
+from starlette.responses import FileResponse
+
+def strong_etag(body: bytes) -> str:
+    """Strong validator derived from the exact bytes of a representation"""
+    return digest_etag(hashlib.sha256(body).hexdigest())
+
+def digest_etag(sha256_hex: str) -> str:
+    """strong_etag of content whose SHA-256 is already known"""
+    return '"' + sha256_hex[:32] + '"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for it)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+_BYTE_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """The inclusive (first, last) byte positions a Range header asks for.
+
+    None means send the whole representation: no header, or one a server may
+    ignore (malformed, another unit, several ranges). Raises ValueError when
+    the range lies entirely past the end (416).
+    """
+    match = _BYTE_RANGE.match(header.strip()) if header else None
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.group(1), match.group(2)
+    if first == "":
+        # Suffix range: the final `last` bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError("Empty suffix range")
+        return max(size - length, 0), size - 1
+    first = int(first)
+    last = size - 1 if last == "" else min(int(last), size - 1)
+    if first > last:
+        if first >= size:
+            raise ValueError("Range starts past the end")
+        return None
+    return first, last
+
+class FileRangeResponse(FileResponse):
+    """A file, or one byte range of it, streamed without loading it.
+
+    Handed to the server as an ASGI zero-copy send (sendfile) when the
+    server offers that extension; otherwise read with os.pread in a thread
+    one chunk at a time, so a download never holds more than `chunk_size`
+    bytes however large the file.
+    """
+    chunk_size = 256 * 1024
+
+    def __init__(self, path, size: int, byte_range: Optional[Tuple[int, int]] = None, headers: Optional[dict] = None, **kwargs):
+        self.first, self.last = byte_range or (0, size - 1)
+        headers = dict(headers or {}, **{"accept-ranges": "bytes", "content-length": str(self.last - self.first + 1)})
+        if byte_range is not None:
+            headers["content-range"] = f"bytes {self.first}-{self.last}/{size}"
+        super().__init__(path, status_code=206 if byte_range is not None else 200, headers=headers, **kwargs)
+
+    async def __call__(self, scope, receive, send) -> None:
+        file = await run_in_threadpool(open, self.path, "rb", buffering=0)
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            remaining = self.last - self.first + 1
+            if self.send_header_only:
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+            elif "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend", "file": file,
+                    "offset": self.first, "count": remaining, "more_body": False
+                })
+            else:
+                offset = self.first
+                while remaining:
+                    chunk = await run_in_threadpool(os.pread, file.fileno(), min(self.chunk_size, remaining), offset)
+                    if not chunk:
+                        raise RuntimeError(f"File at path {self.path} is shorter than expected")
+                    offset += len(chunk)
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        finally:
+            file.close()
+        if self.background is not None:
+            await self.background()
@@ -0,0 +1,205 @@
+# app/utils/instrumentation.py
+import asyncio
+import logging
+import time
+from contextvars import ContextVar
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import event, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from typing import Dict, Optional
+
+from app.utils.metrics import Counter, Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+# The same statement this many times in one request is reported as a likely N+1
+N_PLUS_ONE_THRESHOLD = config("N_PLUS_ONE_THRESHOLD", default=10, cast=int)
+LOOP_LAG_INTERVAL = config("LOOP_LAG_INTERVAL", default=0.5, cast=float)
+HEALTH_DB_TIMEOUT = config("HEALTH_DB_TIMEOUT", default=2, cast=float)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route", labelnames=("method", "route", "status")
+)
+REQUESTS_IN_PROGRESS = Gauge("http_requests_in_progress", "Requests being handled")
+REQUEST_STATEMENTS = Histogram(
+    "http_request_sql_statements", "SQL statements issued per request",
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100), labelnames=("route",)
+)
+REQUEST_SQL_TIME = Histogram("http_request_sql_seconds", "Time spent in SQL per request", labelnames=("route",))
+N_PLUS_ONE = Counter("sql_n_plus_one_total", "Requests that repeated one statement N_PLUS_ONE_THRESHOLD+ times", labelnames=("route",))
+STATEMENT_LATENCY = Histogram("sql_statement_duration_seconds", "Latency of single SQL statements")
+LOOP_LAG = Histogram(
+    "event_loop_lag_seconds", "How late the event loop ran a timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Connections in use", labelnames=("engine",))
+POOL_CAPACITY = Gauge("db_pool_capacity", "Connections the pool may open (size + max overflow)", labelnames=("engine",))
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+class RequestStats:
+    """SQL issued while handling one request"""
+    __slots__ = ("statements", "sql_seconds", "shapes")
+
+    def __init__(self):
+        self.statements = 0
+        self.sql_seconds = 0.0
+        # statement text -> executions; parameters are bound, so equal text means equal shape
+        self.shapes: Dict[str, int] = {}
+
+# Set by the middleware; copied into threadpool calls, so sync routes are counted too
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    context._instrumentation_started = time.perf_counter()
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._instrumentation_started
+    STATEMENT_LATENCY.observe(elapsed)
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.statements += 1
+        stats.sql_seconds += elapsed
+        stats.shapes[statement] = stats.shapes.get(statement, 0) + 1
+
+def instrument_engine(engine) -> None:
+    """Time every statement of an engine and attribute it to the current request"""
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+
+class InstrumentationMiddleware:
+    """Per-route latency and per-request SQL counts, as a plain ASGI middleware.
+
+    Routes are labelled with their path template (/rooms/{room_id}/messages),
+    so metric cardinality stays bounded however many rooms there are.
+    """
+
+    def __init__(self, app, n_plus_one_threshold: int = N_PLUS_ONE_THRESHOLD):
+        self.app = app
+        self.n_plus_one_threshold = n_plus_one_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _request_stats.set(stats)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            REQUESTS_IN_PROGRESS.dec()
+            _request_stats.reset(token)
+
+            route = scope.get("route")
+            route = getattr(route, "path", UNMATCHED_ROUTE)
+            REQUEST_LATENCY.labels(scope["method"], route, f"{status_code // 100}xx").observe(elapsed)
+            REQUEST_STATEMENTS.labels(route).observe(stats.statements)
+            REQUEST_SQL_TIME.labels(route).observe(stats.sql_seconds)
+            self._check_n_plus_one(scope["method"], route, stats)
+
+    def _check_n_plus_one(self, method: str, route: str, stats: RequestStats) -> None:
+        if stats.statements < self.n_plus_one_threshold:
+            return
+        statement, count = max(stats.shapes.items(), key=lambda item: item[1])
+        if count >= self.n_plus_one_threshold:
+            N_PLUS_ONE.labels(route).inc()
+            logger.warning(
+                "Possible N+1 in %s %s: statement ran %d times (%d statements in request): %s",
+                method, route, count, stats.statements, " ".join(statement.split())[:200]
+            )
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a periodic timer.
+
+    Anything that blocks the loop (sync DB calls, bcrypt, big JSON) shows
+    up here as lag, delaying every request and socket in the worker.
+    """
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            LOOP_LAG.observe(max(0.0, time.perf_counter() - started - self.interval))
+
+def pool_status(engine) -> dict:
+    """Connections in use and the most the pool will open"""
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    pool = engine.pool
+    max_overflow = getattr(pool, "_max_overflow", -1)
+    if not hasattr(pool, "checkedout") or max_overflow < 0:
+        # NullPool, StaticPool or unbounded overflow: nothing to saturate
+        return {"checked_out": None, "capacity": None}
+    return {"checked_out": pool.checkedout(), "capacity": pool.size() + max_overflow}
+
+def collect_pool_metrics(engines: Dict[str, object]) -> None:
+    """Refresh the pool gauges; called when /metrics is scraped"""
+    for name, engine in engines.items():
+        status = pool_status(engine)
+        if status["capacity"] is not None:
+            POOL_CHECKED_OUT.labels(name).set(status["checked_out"])
+            POOL_CAPACITY.labels(name).set(status["capacity"])
+
+def _ping(engine: Engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+async def _ping_async(engine: AsyncEngine) -> None:
+    async with engine.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+
+async def check_database(engines: Dict[str, object], timeout: float = HEALTH_DB_TIMEOUT) -> dict:
+    """Readiness of each engine: a SELECT 1 within `timeout` and a pool with room left"""
+    results = {}
+    for name, engine in engines.items():
+        status = pool_status(engine)
+        if status["capacity"] is not None and status["checked_out"] >= status["capacity"]:
+            # A ping would only queue behind everyone else for DB_POOL_TIMEOUT
+            results[name] = dict(status, ok=False, error="connection pool exhausted")
+            continue
+        try:
+            if isinstance(engine, AsyncEngine):
+                await asyncio.wait_for(_ping_async(engine), timeout)
+            else:
+                await asyncio.wait_for(run_in_threadpool(_ping, engine), timeout)
+            status["ok"] = True
+        except Exception as e:
+            status["ok"] = False
+            status["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+        results[name] = status
+    return results
+
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,37 @@
+# app/utils/pagination.py
+import base64
+from datetime import datetime
+from typing import Tuple
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor for a (created_at, id) position"""
+    raw = f"{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Inverse of encode_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
+
+def encode_forward_cursor(room_seq: int, created_at: datetime, row_id: int) -> str:
+    """Opaque cursor for paging forward through a room from a message.
+
+    Forward pages are ordered by room_seq, which is handed out in commit
+    order, so a message stamped earlier but committed later is not skipped.
+    The (created_at, id) position is kept for finding archive segments.
+    """
+    raw = f"{room_seq}|{created_at.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_forward_cursor(cursor: str) -> Tuple[int, datetime, int]:
+    """Inverse of encode_forward_cursor; raises ValueError for malformed cursors"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        room_seq, created_at, row_id = raw.split("|")
+        return int(room_seq), datetime.fromisoformat(created_at), int(row_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError("Invalid cursor")
@@ -0,0 +1,30 @@
+# app/utils/query_counter.py
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from typing import List
+
+class QueryCounter:
+    """Records every SQL statement an engine executes while active.
+
+        with QueryCounter(engine) as queries:
+            RoomService.join_room(db, room_id, user_id)
+        assert queries.count == 2, queries.statements
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> "QueryCounter":
+        event.listen(self.engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        event.remove(self.engine, "before_cursor_execute", self._record)
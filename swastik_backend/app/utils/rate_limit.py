@@ -0,0 +1,226 @@
+# app/utils/rate_limit.py
+import logging
+import math
+import time
+from dataclasses import dataclass
+from decouple import config
+from fastapi import HTTPException, status
+from starlette.requests import HTTPConnection
+from typing import Dict, List, Optional, Tuple
+
+from app.utils.broker import REDIS_URL
+from app.utils.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_ENABLED = config("RATE_LIMIT_ENABLED", default=True, cast=bool)
+# The memory backend limits each worker separately; use redis to share buckets
+RATE_LIMIT_BACKEND = config("RATE_LIMIT_BACKEND", default="redis" if REDIS_URL else "memory")
+RATE_LIMIT_MAX_KEYS = config("RATE_LIMIT_MAX_KEYS", default=100000, cast=int)
+# Only behind one reverse proxy that appends to X-Forwarded-For; otherwise
+# clients could pick their own IP
+RATE_LIMIT_TRUST_FORWARDED = config("RATE_LIMIT_TRUST_FORWARDED", default=False, cast=bool)
+
+DECISIONS = Counter(
+    "rate_limit_decisions_total", "Rate limit checks by scope and outcome", labelnames=("scope", "result")
+)
+
+@dataclass(frozen=True)
+class Rate:
+    """`limit` requests per `period` seconds, in bursts of up to `limit`"""
+    limit: int
+    period: float
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+    @classmethod
+    def parse(cls, spec: str) -> "Rate":
+        """Read "count/seconds", e.g. "10/60" for ten per minute"""
+        limit, _, period = spec.partition("/")
+        return cls(int(limit), float(period or 1))
+
+# Whole API, per client IP (generous: a campus NAT puts many students behind one IP)
+API_RATE = Rate.parse(config("RATE_LIMIT_API", default="1200/60"))
+# Credential endpoints: bcrypt makes every attempt expensive
+LOGIN_RATE = Rate.parse(config("RATE_LIMIT_LOGIN", default="30/60"))
+LOGIN_ACCOUNT_RATE = Rate.parse(config("RATE_LIMIT_LOGIN_ACCOUNT", default="10/300"))
+REGISTER_RATE = Rate.parse(config("RATE_LIMIT_REGISTER", default="20/3600"))
+# Messages per sender per room, and per room across all senders
+MESSAGE_RATE = Rate.parse(config("RATE_LIMIT_MESSAGES", default="30/10"))
+ROOM_MESSAGE_RATE = Rate.parse(config("RATE_LIMIT_ROOM_MESSAGES", default="300/10"))
+REACTION_RATE = Rate.parse(config("RATE_LIMIT_REACTIONS", default="60/10"))
+
+class RateLimitBackend:
+    """Token buckets keyed by string"""
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        """Take one token; 0 if allowed, else seconds until a token is available"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        pass
+
+class InMemoryRateLimitBackend(RateLimitBackend):
+    """Buckets in a plain dict: a check is a lookup and a little arithmetic.
+
+    Only the event loop thread touches it, so there is no lock. Buckets
+    that have refilled completely hold no information and are dropped when
+    the table reaches `max_keys`.
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, timer=time.monotonic):
+        self.max_keys = max_keys
+        self._timer = timer
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: Dict[str, List[float]] = {}
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        return self.take(key, rate)
+
+    def take(self, key: str, rate: Rate) -> float:
+        now = self._timer()
+        per_second = rate.limit / rate.period
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            self._buckets[key] = [rate.limit - 1, now, now + 1 / per_second]
+            return 0.0
+
+        tokens = min(rate.limit, bucket[0] + (now - bucket[1]) * per_second)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            bucket[2] = now + (rate.limit - tokens + 1) / per_second
+            return 0.0
+        bucket[0] = tokens
+        return (1 - tokens) / per_second
+
+    def _prune(self, now: float) -> None:
+        self._buckets = {key: bucket for key, bucket in self._buckets.items() if bucket[2] > now}
+        if len(self._buckets) >= self.max_keys:
+            # Everyone is active: forget the oldest half rather than grow without bound
+            keys = list(self._buckets)
+            for key in keys[:len(keys) // 2]:
+                del self._buckets[key]
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Buckets in Redis hashes, shared by every worker.
+
+    Refill and take happen in one script, so concurrent workers cannot
+    both spend the last token. Idle buckets expire once they would be full.
+    """
+
+    # Returns the wait as a string: Lua numbers become integers on the way out
+    TAKE_SCRIPT = """
+    local rate = tonumber(ARGV[1])
+    local burst = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local bucket = redis.call('HMGET', KEYS[1], 't', 'ts')
+    local tokens = tonumber(bucket[1]) or burst
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(burst, tokens + math.max(0, now - updated) * rate)
+    local wait = 0
+    if tokens >= 1 then tokens = tokens - 1 else wait = (1 - tokens) / rate end
+    redis.call('HSET', KEYS[1], 't', tokens, 'ts', now)
+    redis.call('PEXPIRE', KEYS[1], math.ceil((burst - tokens) / rate * 1000) + 1000)
+    return tostring(wait)
+    """
+
+    def __init__(self, url: str = REDIS_URL, prefix: str = "ratelimit"):
+        import redis.asyncio
+
+        self.prefix = prefix
+        self._client = redis.asyncio.from_url(url)
+        self._take = self._client.register_script(self.TAKE_SCRIPT)
+
+    async def hit(self, key: str, rate: Rate) -> float:
+        wait = await self._take(
+            keys=[f"{self.prefix}:{key}"], args=[rate.per_second, rate.limit, time.time()]
+        )
+        return float(wait)
+
+    async def close(self) -> None:
+        await self._client.close()
+
+def get_rate_limit_backend() -> RateLimitBackend:
+    """Build the rate limit backend configured for this deployment"""
+    if RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(REDIS_URL)
+    return InMemoryRateLimitBackend()
+
+def too_many_requests(wait: float) -> HTTPException:
+    """429 response telling the client how long to back off"""
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail="Too many requests, slow down",
+        headers={"Retry-After": str(max(1, math.ceil(wait)))},
+    )
+
+def client_ip(connection: HTTPConnection) -> str:
+    """The caller's address, from X-Forwarded-For when the proxy is trusted"""
+    if RATE_LIMIT_TRUST_FORWARDED:
+        forwarded = connection.headers.get("x-forwarded-for")
+        if forwarded:
+            # The proxy appends the address it saw; earlier entries are client-supplied
+            return forwarded.rsplit(",", 1)[-1].strip()
+    return connection.client.host if connection.client else "unknown"
+
+class RateLimiter:
+    """Token-bucket limits per scope and key (client IP, user, room...).
+
+    A backend failure lets the request through: losing throttling briefly
+    is better than failing every request while Redis is down.
+    """
+
+    def __init__(self, backend: Optional[RateLimitBackend] = None, enabled: bool = RATE_LIMIT_ENABLED):
+        self.backend = backend
+        self.enabled = enabled
+        self._decisions: Dict[Tuple[str, str], object] = {}
+        self._last_error_logged = 0.0
+
+    def _count(self, scope: str, result: str) -> None:
+        child = self._decisions.get((scope, result))
+        if child is None:
+            child = self._decisions[(scope, result)] = DECISIONS.labels(scope, result)
+        child.inc()
+
+    async def check(self, scope: str, key, rate: Rate) -> float:
+        """Spend one request of `scope` for `key`; 0 if allowed, else Retry-After seconds"""
+        if not self.enabled:
+            return 0.0
+        if self.backend is None:
+            self.backend = get_rate_limit_backend()
+
+        try:
+            wait = await self.backend.hit(f"{scope}:{key}", rate)
+        except Exception:
+            self._count(scope, "error")
+            if time.monotonic() - self._last_error_logged > 60:
+                self._last_error_logged = time.monotonic()
+                logger.exception("Rate limiter unavailable, letting requests through")
+            return 0.0
+
+        self._count(scope, "limited" if wait else "allowed")
+        return wait
+
+    async def enforce(self, scope: str, key, rate: Rate) -> None:
+        """check, raising 429 Too Many Requests with Retry-After when limited"""
+        wait = await self.check(scope, key, rate)
+        if wait:
+            raise too_many_requests(wait)
+
+    def by_ip(self, scope: str, rate: Rate):
+        """FastAPI dependency limiting each client IP; socket handshakes are not counted"""
+        async def dependency(connection: HTTPConnection) -> None:
+            if connection.scope["type"] == "http":
+                await self.enforce(scope, client_ip(connection), rate)
+        return dependency
+
+    async def close(self) -> None:
+        if self.backend is not None:
+            await self.backend.close()
+
+rate_limiter = RateLimiter()
@@ -0,0 +1,123 @@
+# app/utils/security.py
+import asyncio
+import secrets
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional, Tuple
+from decouple import config
+
+from app.utils.metrics import Counter, Gauge
+
+SECRET_KEY = config("SECRET_KEY")
+ALGORITHM = config("ALGORITHM", default="HS256")
+ACCESS_TOKEN_EXPIRE_MINUTES = config("ACCESS_TOKEN_EXPIRE_MINUTES", default=30, cast=int)
+
+# bcrypt cost factor; stored hashes with a different cost are upgraded on login
+BCRYPT_ROUNDS = config("BCRYPT_ROUNDS", default=12, cast=int)
+PASSWORD_HASH_WORKERS = config("PASSWORD_HASH_WORKERS", default=2, cast=int)
+PASSWORD_HASH_MAX_PENDING = config("PASSWORD_HASH_MAX_PENDING", default=32, cast=int)
+
+# jose (with its cryptography backend) and passlib take ~90 ms to import,
+# so they load on the first token or password operation, not on worker start
+@lru_cache(maxsize=None)
+def password_context():
+    """The bcrypt CryptContext, built on first use"""
+    from passlib.context import CryptContext
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=BCRYPT_ROUNDS,
+        bcrypt__min_rounds=BCRYPT_ROUNDS,
+        bcrypt__max_rounds=BCRYPT_ROUNDS
+    )
+
+HASH_PENDING = Gauge("password_hash_pending", "Password hash operations queued or running")
+HASH_REJECTED = Counter("password_hash_rejected_total", "Password hash operations refused because the queue was full")
+
+def get_password_hash(password: str) -> str:
+    """Hash a password (blocking; use password_hasher from async code)"""
+    return password_context().hash(password)
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Check a password against its hash (blocking; use password_hasher from async code)"""
+    return password_context().verify(plain_password, hashed_password)
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Check a password and return a replacement hash if its cost factor is outdated"""
+    return password_context().verify_and_update(plain_password, hashed_password)
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many password hash operations are already waiting"""
+
+class PasswordHasher:
+    """Runs bcrypt on a small dedicated thread pool instead of the event loop.
+
+    bcrypt releases the GIL, so a couple of threads keep hashing off the loop
+    without starving the rest of the process. At most `max_pending`
+    operations may be queued or running; beyond that callers get
+    PasswordHasherBusy immediately rather than waiting behind a login storm.
+    The pool starts on the first hash and is shut down with the app.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Returns (is_valid, new_hash); new_hash is set when the stored hash needs an upgrade"""
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.max_pending:
+            HASH_REJECTED.inc()
+            raise PasswordHasherBusy("Too many login attempts in progress, please retry")
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+        self._pending += 1
+        HASH_PENDING.set(self._pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            HASH_PENDING.set(self._pending)
+
+    async def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+password_hasher = PasswordHasher()
+
+def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """Create a signed JWT access token"""
+    to_encode = data.copy()
+    expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    to_encode.update({"exp": expire})
+    from jose import jwt
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
+
+def verify_token(token: str) -> Optional[str]:
+    """Return the token subject (username) or None if the token is invalid"""
+    from jose import JWTError, jwt
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    return payload.get("sub")
+
+def generate_verification_token() -> str:
+    """Generate a random email verification token"""
+    return secrets.token_urlsafe(32)
+
+def extract_university_info(email: str) -> Tuple[str, str]:
+    """Derive the university domain and display badge from an email address"""
+    domain = email.split("@")[1].lower()
+    badge = domain.split(".")[0].upper()
+    return domain, badge
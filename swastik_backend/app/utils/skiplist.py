@@ -0,0 +1,130 @@
+# app/utils/skiplist.py
+import random
+from typing import Any, Iterator, List, Optional
+
+MAX_LEVELS = 32
+
+class _Node:
+    __slots__ = ("value", "next", "width")
+
+    def __init__(self, value: Any, levels: int):
+        self.value = value
+        self.next: List[Optional["_Node"]] = [None] * levels
+        # width[level]: positions advanced by following next[level]
+        self.width: List[int] = [1] * levels
+
+class IndexableSkiplist:
+    """Sorted collection with O(log n) insert, remove, rank and index lookup.
+
+    Values must be unique and mutually comparable. Each forward link also
+    records how many positions it skips, which is what makes positional
+    access and ranking logarithmic instead of linear.
+    """
+
+    def __init__(self, seed: Optional[int] = None):
+        self._head = _Node(None, MAX_LEVELS)
+        self._size = 0
+        self._levels = 1
+        self._random = random.Random(seed)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < MAX_LEVELS and self._random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find(self, value: Any):
+        """Last node before `value` on every level and its position"""
+        chain: List[_Node] = [self._head] * MAX_LEVELS
+        positions = [0] * MAX_LEVELS
+        node, position = self._head, 0
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and node.next[level].value < value:
+                position += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions, position
+
+    def insert(self, value: Any) -> int:
+        """Add a value; returns its 0-based index"""
+        chain, positions, position = self._find(value)
+        levels = self._random_level()
+        if levels > self._levels:
+            for level in range(self._levels, levels):
+                # The head's unused levels span the whole list
+                self._head.width[level] = self._size + 1
+            self._levels = levels
+
+        node = _Node(value, levels)
+        for level in range(levels):
+            previous = chain[level]
+            skipped = position - positions[level]
+            node.next[level] = previous.next[level]
+            previous.next[level] = node
+            node.width[level] = previous.width[level] - skipped
+            previous.width[level] = skipped + 1
+        for level in range(levels, MAX_LEVELS):
+            chain[level].width[level] += 1
+
+        self._size += 1
+        return position
+
+    def remove(self, value: Any) -> None:
+        """Remove a value; raises KeyError if it is not present"""
+        chain, _, _ = self._find(value)
+        node = chain[0].next[0]
+        if node is None or node.value != value:
+            raise KeyError(value)
+
+        for level in range(len(node.next)):
+            previous = chain[level]
+            previous.width[level] += node.width[level] - 1
+            previous.next[level] = node.next[level]
+        for level in range(len(node.next), MAX_LEVELS):
+            chain[level].width[level] -= 1
+
+        self._size -= 1
+
+    def index(self, value: Any) -> int:
+        """0-based position of a value; raises KeyError if it is not present"""
+        chain, _, position = self._find(value)
+        node = chain[0].next[0]
+        if node is None or node.value != value:
+            raise KeyError(value)
+        return position
+
+    def __getitem__(self, index: int) -> Any:
+        return self._node_at(index).value
+
+    def _node_at(self, index: int) -> _Node:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("skiplist index out of range")
+
+        node, remaining = self._head, index + 1
+        for level in reversed(range(self._levels)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        return node
+
+    def islice(self, start: int, stop: int) -> Iterator[Any]:
+        """Values at positions start..stop-1, walking the bottom level"""
+        stop = min(stop, self._size)
+        if start >= stop:
+            return
+        node = self._node_at(start)
+        for _ in range(stop - start):
+            yield node.value
+            node = node.next[0]
+
+    def __iter__(self) -> Iterator[Any]:
+        node = self._head.next[0]
+        while node is not None:
+            yield node.value
+            node = node.next[0]
@@ -0,0 +1,85 @@
+# app/utils/storage.py
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Tuple
+from decouple import config
+from fastapi.concurrency import run_in_threadpool
+
+ATTACHMENT_DIR = config("ATTACHMENT_DIR", default="./attachments")
+# An upload is written in pieces of this size, which bounds its memory
+ATTACHMENT_CHUNK_SIZE = config("ATTACHMENT_CHUNK_SIZE", default=256 * 1024, cast=int)
+ATTACHMENT_MAX_BYTES = config("ATTACHMENT_MAX_BYTES", default=50 * 1024 * 1024, cast=int)
+
+class AttachmentTooLarge(ValueError):
+    """Raised when an upload grows past the store's size limit"""
+
+def _write(file, digest, data) -> None:
+    digest.update(data)
+    file.write(data)
+
+class ContentStore:
+    """Files on local disk, named by the SHA-256 of their content.
+
+    An upload streams into a temporary file, hashed as it is written, and
+    is renamed into place only when complete, so a half-written file is
+    never served. Content that is already stored (the same slides reposted
+    in another room) is dropped instead of written twice.
+    """
+
+    def __init__(
+        self,
+        root: str = ATTACHMENT_DIR,
+        chunk_size: int = ATTACHMENT_CHUNK_SIZE,
+        max_bytes: int = ATTACHMENT_MAX_BYTES
+    ):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.max_bytes = max_bytes
+
+    def blob_path(self, digest: str) -> Path:
+        # Two levels of fan-out keep directories small
+        return self.root / "blobs" / digest[:2] / digest[2:4] / digest
+
+    def thumbnail_path(self, digest: str, size: int) -> Path:
+        return self.root / "thumbnails" / digest[:2] / digest[2:4] / f"{digest}-{size}.jpg"
+
+    async def save(self, chunks: AsyncIterator[bytes]) -> Tuple[str, int]:
+        """Store a stream of bytes; returns its hex SHA-256 and size"""
+        staging = self.root / "tmp"
+        await run_in_threadpool(staging.mkdir, parents=True, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=staging)
+        digest = hashlib.sha256()
+        size = 0
+        buffer = bytearray()
+        try:
+            with open(fd, "wb") as file:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > self.max_bytes:
+                        raise AttachmentTooLarge(f"Attachments are limited to {self.max_bytes} bytes")
+                    buffer += chunk
+                    if len(buffer) >= self.chunk_size:
+                        # Hashing and writing both release the GIL; neither runs on the loop
+                        await run_in_threadpool(_write, file, digest, buffer)
+                        buffer.clear()
+                if buffer:
+                    await run_in_threadpool(_write, file, digest, buffer)
+            if not size:
+                raise ValueError("Attachment is empty")
+            hexdigest = digest.hexdigest()
+            await run_in_threadpool(self._commit, temp_path, hexdigest)
+        except BaseException:
+            Path(temp_path).unlink(missing_ok=True)
+            raise
+        return hexdigest, size
+
+    def _commit(self, temp_path: str, digest: str) -> None:
+        target = self.blob_path(digest)
+        if target.exists():
+            os.unlink(temp_path)
+            return
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Atomic, so two uploads of the same content may race harmlessly
+        os.replace(temp_path, target)
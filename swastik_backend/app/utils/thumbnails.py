@@ -0,0 +1,19 @@
+# app/utils/thumbnails.py
+# Runs in thumbnail worker processes, which import only this module: keep it
+# free of app imports so a worker starts without loading FastAPI or the models
+import os
+
+def make_thumbnail(source: str, target: str, size: int) -> None:
+    """Write a JPEG thumbnail no larger than size x size (runs in a worker process; needs Pillow)"""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        # JPEGs decode straight at a reduced scale, so a large photo never fills memory
+        image.draft("RGB", (size, size))
+        image.thumbnail((size, size))
+        if image.mode != "RGB":
+            image = image.convert("RGB")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp_path = f"{target}.{os.getpid()}.tmp"
+        image.save(temp_path, "JPEG", quality=80, optimize=True)
+    os.replace(temp_path, target)
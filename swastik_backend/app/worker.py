@@ -0,0 +1,33 @@
+# app/worker.py
+# Celery entry point for background jobs:
+#   celery -A app.worker worker --beat --loglevel=info
+from celery import Celery
+from decouple import config
+
+from app.services.archive_service import compact_messages, COMPACTION_INTERVAL
+from app.services.email_service import drain_outbox, EMAIL_POLL_INTERVAL
+
+celery_app = Celery(
+    "swastik",
+    broker=config("CELERY_BROKER_URL", default=config("REDIS_URL", default="redis://localhost:6379"))
+)
+celery_app.conf.beat_schedule = {
+    "deliver-email-outbox": {
+        "task": "app.worker.deliver_outbox",
+        "schedule": EMAIL_POLL_INTERVAL,
+    },
+    "compact-messages": {
+        "task": "app.worker.compact_room_messages",
+        "schedule": COMPACTION_INTERVAL,
+    },
+}
+
+@celery_app.task(name="app.worker.deliver_outbox", ignore_result=True)
+def deliver_outbox():
+    """Send every due email in the outbox"""
+    return drain_outbox()
+
+@celery_app.task(name="app.worker.compact_room_messages", ignore_result=True)
+def compact_room_messages():
+    """Purge deleted messages and archive old threads"""
+    return compact_messages()
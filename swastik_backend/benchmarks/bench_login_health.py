@@ -0,0 +1,101 @@
+# benchmarks/bench_login_health.py
+"""/health latency while concurrent logins are hashing passwords.
+
+Runs the app in-process over httpx's ASGI transport, keeps --logins
+concurrent login requests in flight, and probes /health every 10 ms.
+Pass --blocking to run bcrypt on the event loop the way the handlers used
+to, for comparison.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_login_health --logins 8 --seconds 5
+    python -m benchmarks.bench_login_health --logins 8 --seconds 5 --blocking
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///./bench_login.db")
+os.environ.setdefault("BROKER_BACKEND", "memory")
+# The login limiter would answer nearly every request with 429 and leave no
+# bcrypt work to measure
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+
+import httpx
+
+from app.main import app
+from app.models.user import User
+from app.utils.database import SessionLocal, create_tables
+from app.utils.security import get_password_hash, password_hasher
+
+USERNAME = "bench_login"
+PASSWORD = "BenchPass123"
+PROBE_INTERVAL = 0.01
+
+def ensure_user() -> None:
+    create_tables()
+    with SessionLocal() as db:
+        if db.query(User).filter(User.username == USERNAME).first() is None:
+            db.add(User(
+                username=USERNAME, email="login@bench.edu", password_hash=get_password_hash(PASSWORD),
+                first_name="Bench", last_name="Login", university_domain="bench.edu",
+                university_badge="BENCH", is_verified=True
+            ))
+            db.commit()
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+async def run(logins: int, seconds: float) -> None:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        deadline = time.perf_counter() + seconds
+        completed_logins = 0
+        statuses = {}
+
+        async def login_loop():
+            nonlocal completed_logins
+            while time.perf_counter() < deadline:
+                response = await client.post("/auth/login", data={"username": USERNAME, "password": PASSWORD})
+                statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+                completed_logins += 1
+
+        async def probe_loop(samples):
+            # Latency is measured from when each probe was due, so time spent
+            # waiting for a blocked event loop is counted too
+            due = time.perf_counter()
+            while due < deadline:
+                await asyncio.sleep(max(0.0, due - time.perf_counter()))
+                await client.get("/health")
+                samples.append((time.perf_counter() - due) * 1000)
+                due += PROBE_INTERVAL
+
+        samples = []
+        await asyncio.gather(probe_loop(samples), *(login_loop() for _ in range(logins)))
+
+    print(f"logins completed: {completed_logins} ({completed_logins / seconds:.1f}/s) statuses={statuses}")
+    print(
+        f"/health over {len(samples)} probes: p50={statistics.median(samples):.2f} ms "
+        f"p99={percentile(samples, 0.99):.2f} ms max={max(samples):.2f} ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=8, help="concurrent login requests in flight")
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--blocking", action="store_true", help="hash on the event loop")
+    args = parser.parse_args()
+
+    ensure_user()
+
+    if args.blocking:
+        async def run_inline(fn, *fn_args):
+            return fn(*fn_args)
+        password_hasher._run = run_inline
+
+    asyncio.run(run(args.logins, args.seconds))
+
+if __name__ == "__main__":
+    main()
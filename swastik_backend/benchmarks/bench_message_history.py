@@ -0,0 +1,121 @@
+# benchmarks/bench_message_history.py
+"""OFFSET paging vs keyset paging over a seeded room history.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_message_history --messages 200000
+    python -m benchmarks.bench_message_history --database-url postgresql://... --messages 1000000
+
+The room is seeded once per database; pass --reseed to rebuild it.
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, func
+from sqlalchemy.orm import sessionmaker
+
+from app.utils.database import Base
+from app.models import user, room, message, quiz, notification  # noqa: F401
+from app.models.message import Message
+from app.models.room import Room
+from app.models.user import User
+from app.services.message_service import MessageService
+
+PAGE_SIZE = 50
+SEED_BATCH = 10000
+
+def seed(db, total: int) -> int:
+    """Create one room holding `total` messages and return its id"""
+    author = User(
+        username="bench_author", email="bench@bench.edu", password_hash="x",
+        first_name="Bench", last_name="Author", university_domain="bench.edu",
+        university_badge="BENCH", is_verified=True
+    )
+    db.add(author)
+    db.flush()
+
+    bench_room = Room(name="bench-history", created_by=author.id)
+    db.add(bench_room)
+    db.flush()
+
+    start = datetime(2024, 1, 1)
+    for offset in range(0, total, SEED_BATCH):
+        db.execute(insert(Message), [
+            {
+                "content": f"message {i}",
+                "user_id": author.id,
+                "room_id": bench_room.id,
+                "created_at": start + timedelta(seconds=i // 3),
+                "is_deleted": i % 97 == 0
+            }
+            for i in range(offset, min(offset + SEED_BATCH, total))
+        ])
+    db.commit()
+    return bench_room.id
+
+def timed(fn, repeat: int) -> float:
+    """Median wall time of `fn` in milliseconds"""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def offset_page(db, room_id: int, page: int):
+    messages = db.query(Message).filter(
+        Message.room_id == room_id,
+        Message.is_deleted == False
+    ).order_by(Message.created_at.desc(), Message.id.desc()).offset(page * PAGE_SIZE).limit(PAGE_SIZE).all()
+    return [MessageService.to_dict(message) for message in messages]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./bench_history.db")
+    parser.add_argument("--messages", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--reseed", action="store_true")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if args.reseed:
+        Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    bench_room = db.query(Room).filter(Room.name == "bench-history").first()
+    if bench_room is None:
+        print(f"Seeding {args.messages} messages...")
+        room_id = seed(db, args.messages)
+    else:
+        room_id = bench_room.id
+
+    visible = db.query(func.count(Message.id)).filter(
+        Message.room_id == room_id, Message.is_deleted == False
+    ).scalar()
+    last_page = visible // PAGE_SIZE - 1
+    depths = sorted({0, 10, 100, last_page // 2, last_page})
+
+    # Collect the keyset cursor that starts each measured page
+    cursors = {0: None}
+    page, cursor = 0, None
+    while page < last_page:
+        result = MessageService.get_message_history(db, room_id, PAGE_SIZE, before=cursor)
+        cursor = result["older_cursor"]
+        page += 1
+        if page in depths:
+            cursors[page] = cursor
+
+    print(f"{visible} visible messages, page size {PAGE_SIZE}, median of {args.repeat} runs")
+    print(f"{'page':>8} {'offset ms':>12} {'keyset ms':>12}")
+    for depth in depths:
+        offset_ms = timed(lambda: offset_page(db, room_id, depth), args.repeat)
+        keyset_ms = timed(
+            lambda: MessageService.get_message_history(db, room_id, PAGE_SIZE, before=cursors[depth]),
+            args.repeat
+        )
+        print(f"{depth:>8} {offset_ms:>12.2f} {keyset_ms:>12.2f}")
+
+if __name__ == "__main__":
+    main()
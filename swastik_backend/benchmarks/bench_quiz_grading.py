@@ -0,0 +1,137 @@
+# benchmarks/bench_quiz_grading.py
+"""Grade 10k quiz attempts with the compiled answer key.
+
+Builds a throwaway SQLite database with one quiz (mcq, true_false and
+short_answer questions) and --attempts completed attempts with random
+answers, then times:
+
+  compile   loading and compiling the answer key
+  score     score_attempts over every answer sheet in memory
+  regrade   regrade_quiz end to end (chunked SELECT, score, bulk UPDATE)
+  naive     per-attempt ORM grading that loads the questions for every
+            attempt and updates rows one by one (on --naive-sample attempts,
+            extrapolated), for comparison
+
+and checks that both graders agree.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_quiz_grading --attempts 10000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.utils.database import Base
+from app.models import user, room, message, quiz, notification, email_outbox  # noqa: F401
+from app.models.quiz import Quiz, QuizQuestion, QuizAttempt
+from app.services.quiz_grading import compile_answer_key, score_attempts, regrade_quiz
+
+def build_quiz(db, questions: int) -> int:
+    new_quiz = Quiz(title="Bench quiz", total_questions=questions, created_by=None)
+    rng = random.Random(1)
+    for index in range(questions):
+        kind = ("mcq", "true_false", "short_answer")[index % 3]
+        if kind == "mcq":
+            options = [f"Option {n}" for n in range(4)]
+            correct = options[rng.randrange(4)]
+        elif kind == "true_false":
+            options, correct = None, rng.choice(["true", "false"])
+        else:
+            options, correct = None, f"Answer {index}"
+        new_quiz.questions.append(QuizQuestion(
+            question_text=f"Question {index}", question_type=kind, options=options,
+            correct_answer=correct, points=1 + index % 3, order_index=index
+        ))
+    new_quiz.total_points = sum(q.points for q in new_quiz.questions)
+    db.add(new_quiz)
+    db.commit()
+    return new_quiz.id
+
+def random_answers(rng: random.Random, questions) -> dict:
+    answers = {}
+    for q in questions:
+        if rng.random() < 0.05:
+            continue  # skipped
+        if q.question_type == "mcq":
+            answers[str(q.id)] = rng.choice(q.options + ["a", "b", "c", "d", 0, 1, 2, 3])
+        elif q.question_type == "true_false":
+            answers[str(q.id)] = rng.choice([True, False, "True", "false", "yes", "no"])
+        else:
+            answers[str(q.id)] = rng.choice([q.correct_answer, f"  {q.correct_answer.upper()}.", "no idea"])
+    return answers
+
+def naive_grade(db, attempt_ids) -> dict:
+    scores = {}
+    for attempt_id in attempt_ids:
+        attempt = db.get(QuizAttempt, attempt_id)
+        questions = db.query(QuizQuestion).filter(QuizQuestion.quiz_id == attempt.quiz_id).all()
+        score = 0.0
+        for q in questions:
+            answer = (attempt.answers or {}).get(str(q.id))
+            if answer is None:
+                continue
+            key = q.correct_answer.strip().casefold()
+            given = str(answer).strip().casefold().strip(".")
+            if q.question_type == "mcq" and given in "abcd0123" and given:
+                index = "abcd".find(given) if given.isalpha() else int(given)
+                given = q.options[index].casefold()
+            if q.question_type == "true_false":
+                given = {"yes": "true", "no": "false"}.get(given, given)
+            if given == key:
+                score += q.points
+        attempt.score = score
+        db.commit()
+        scores[attempt_id] = score
+    return scores
+
+def timed(label: str, fn):
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+    print(f"{label:<10} {elapsed * 1000:9.1f} ms")
+    return result, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=10000)
+    parser.add_argument("--questions", type=int, default=30)
+    parser.add_argument("--naive-sample", type=int, default=500)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "quiz_grading.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    quiz_id = build_quiz(db, args.questions)
+    questions = db.query(QuizQuestion).filter(QuizQuestion.quiz_id == quiz_id).all()
+    rng = random.Random(2)
+    sheets = [random_answers(rng, questions) for _ in range(args.attempts)]
+    db.execute(insert(QuizAttempt), [
+        {"quiz_id": quiz_id, "user_id": i, "answers": answers, "is_completed": True}
+        for i, answers in enumerate(sheets)
+    ])
+    db.commit()
+    print(f"{args.attempts} attempts x {args.questions} questions")
+
+    key, _ = timed("compile", lambda: compile_answer_key(db, quiz_id))
+    scores, score_time = timed("score", lambda: score_attempts(key, sheets))
+    print(f"{'':<10} {args.attempts / score_time:9.0f} attempts/s in memory")
+    _, regrade_time = timed("regrade", lambda: regrade_quiz(db, quiz_id))
+    print(f"{'':<10} {args.attempts / regrade_time:9.0f} attempts/s end to end")
+
+    sample = list(range(1, min(args.naive_sample, args.attempts) + 1))
+    naive, naive_time = timed("naive", lambda: naive_grade(db, sample))
+    print(f"{'':<10} {len(sample) / naive_time:9.0f} attempts/s "
+          f"(~{naive_time / len(sample) * args.attempts:.1f} s for {args.attempts})")
+
+    mismatches = sum(1 for attempt_id in sample if naive[attempt_id] != scores[attempt_id - 1])
+    print(f"graders disagree on {mismatches} of {len(sample)} sampled attempts")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_rate_limit.py
+"""Per-request overhead of the in-memory rate limiter.
+
+Times three layers over --checks checks spread across --keys distinct
+keys (clients): the bare token bucket, RateLimiter.check as the routes
+call it (metrics included), and the check while the bucket table is full
+and has to be pruned. The bucket table is capped at --keys / 2 for the
+last run, so pruning happens continuously.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_rate_limit --checks 1000000 --keys 10000
+"""
+import argparse
+import asyncio
+import time
+
+from app.utils.rate_limit import InMemoryRateLimitBackend, Rate, RateLimiter
+
+def report(label: str, checks: int, elapsed: float) -> None:
+    print(f"{label:<28} {elapsed / checks * 1e9:8.0f} ns/check   {checks / elapsed:12.0f} checks/s")
+
+async def main_async(args) -> None:
+    rate = Rate(100, 1)
+    keys = [f"10.0.{n // 256}.{n % 256}" for n in range(args.keys)]
+
+    backend = InMemoryRateLimitBackend()
+    started = time.perf_counter()
+    for n in range(args.checks):
+        backend.take(keys[n % args.keys], rate)
+    report("bucket.take", args.checks, time.perf_counter() - started)
+
+    limiter = RateLimiter(InMemoryRateLimitBackend(), enabled=True)
+    started = time.perf_counter()
+    for n in range(args.checks):
+        await limiter.check("api", keys[n % args.keys], rate)
+    report("RateLimiter.check", args.checks, time.perf_counter() - started)
+
+    limiter = RateLimiter(InMemoryRateLimitBackend(max_keys=max(1, args.keys // 2)), enabled=True)
+    started = time.perf_counter()
+    for n in range(args.checks):
+        await limiter.check("api", keys[n % args.keys], rate)
+    report("RateLimiter.check (pruning)", args.checks, time.perf_counter() - started)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--checks", type=int, default=1000000)
+    parser.add_argument("--keys", type=int, default=10000)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+# benchmarks/bench_serialization.py
+"""Response serialization: ORM + Pydantic re-validation vs column views + orjson.
+
+For three list responses of --rows rows (a user's rooms, a page of
+messages, a quiz's questions) it times both ways of producing the
+response body:
+
+  pydantic  load ORM entities, map them to dicts field by field, then do
+            what FastAPI does with a response_model: validate, dump in
+            JSON mode, and json.dumps in JSONResponse
+  views     select only the needed columns into slotted views and render
+            them with FastJSONResponse (orjson), as the routes now do
+
+"load" is the query and mapping, "encode" is everything after it.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_serialization --rows 1000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import selectinload, sessionmaker
+
+from app.utils.database import Base
+from app.models import user, room, message, quiz, notification  # noqa: F401
+from app.models.message import Message
+from app.models.quiz import Quiz, QuizQuestion
+from app.models.room import Room, RoomMember
+from app.models.user import User
+from app.schemas.message import MessageResponse
+from app.schemas.quiz import QuizPublic
+from app.schemas.room import RoomResponse
+from app.services.message_service import MESSAGE_VIEW_COLUMNS, MessageService
+from app.services.quiz_service import QuizService
+from app.services.room_service import RoomService
+from app.schemas.views import MessageView
+from app.utils.serialization import FastJSONResponse
+
+def seed(db, rows: int) -> dict:
+    """One user in `rows` rooms, `rows` messages in the first, a quiz of `rows` questions"""
+    member = User(
+        username="bench_reader", email="reader@bench.edu", password_hash="x", first_name="Bench",
+        last_name="Reader", university_domain="bench.edu", university_badge="BENCH", is_verified=True
+    )
+    db.add(member)
+    db.flush()
+
+    started = datetime.utcnow() - timedelta(days=1)
+    db.execute(insert(Room), [
+        {"name": f"room-{n}", "description": "A study room", "subject": "Physics", "created_by": member.id,
+         "member_count": 1, "last_activity_at": started}
+        for n in range(rows)
+    ])
+    room_ids = db.execute(select(Room.id).order_by(Room.id)).scalars().all()
+    db.execute(insert(RoomMember), [{"room_id": room_id, "user_id": member.id} for room_id in room_ids])
+    db.execute(insert(Message), [
+        {"content": f"message number {n} about the physics assignment", "message_type": "text",
+         "user_id": member.id, "room_id": room_ids[0], "room_seq": n + 1,
+         "created_at": started + timedelta(seconds=n)}
+        for n in range(rows)
+    ])
+
+    bench_quiz = Quiz(
+        title="Bench quiz", subject="Physics", difficulty="medium", time_limit=60,
+        total_questions=rows, total_points=rows, created_by=member.id
+    )
+    bench_quiz.questions = [
+        QuizQuestion(
+            question_text=f"Question {n}?", question_type="mcq", options=["a", "b", "c", "d"],
+            correct_answer="a", points=1, order_index=n
+        )
+        for n in range(rows)
+    ]
+    db.add(bench_quiz)
+    db.commit()
+    return {"user_id": member.id, "room_id": room_ids[0], "quiz_id": bench_quiz.id}
+
+async def fastapi_encode(response_model, content) -> bytes:
+    """What FastAPI does with a returned value and a response_model"""
+    field = create_response_field(name="response", type_=response_model)
+    encoded = await serialize_response(field=field, response_content=content, is_coroutine=True)
+    return JSONResponse(encoded).body
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_serialization.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+    ids = seed(db, args.rows)
+    loop = asyncio.new_event_loop()
+
+    def rooms_orm():
+        rooms = db.query(Room).join(RoomMember, RoomMember.room_id == Room.id).filter(
+            RoomMember.user_id == ids["user_id"], Room.is_active == True
+        ).all()
+        return [RoomService.to_dict(room) for room in rooms]
+
+    def messages_orm():
+        messages = db.execute(
+            select(Message).where(Message.room_id == ids["room_id"]).order_by(Message.created_at, Message.id)
+        ).scalars().all()
+        return [MessageService.to_dict(message) for message in messages]
+
+    def messages_views():
+        rows = db.execute(
+            select(*MESSAGE_VIEW_COLUMNS).where(Message.room_id == ids["room_id"]).order_by(Message.created_at, Message.id)
+        ).all()
+        return [MessageView(*row, []) for row in rows]
+
+    quiz_entity = db.query(Quiz).options(selectinload(Quiz.questions)).filter(Quiz.id == ids["quiz_id"]).one()
+
+    def quiz_pydantic():
+        public = dict(QuizService.to_dict(quiz_entity), questions=[
+            {
+                "id": question.id, "question_text": question.question_text,
+                "question_type": question.question_type, "options": question.options,
+                "points": question.points, "order_index": question.order_index
+            }
+            for question in quiz_entity.questions
+        ])
+        return QuizPublic.model_validate(public).model_dump_json().encode()
+
+    cases = [
+        ("rooms", List[RoomResponse], rooms_orm, lambda: RoomService.get_user_rooms(db, ids["user_id"])),
+        ("messages", List[MessageResponse], messages_orm, messages_views),
+    ]
+
+    print(f"{args.rows} rows per response, median of {args.repeat} runs (ms)")
+    print(f"{'response':<10}{'path':<10}{'load':>9}{'encode':>9}{'total':>9}{'speedup':>9}")
+    for name, response_model, load_old, load_new in cases:
+        # Expire between runs so every load really reads the rows, as a new session would
+        old_content, new_content = load_old(), load_new()
+        old_load = timed(lambda: (db.expire_all(), load_old()), args.repeat)
+        old_encode = timed(lambda: loop.run_until_complete(fastapi_encode(response_model, old_content)), args.repeat)
+        new_load = timed(lambda: (db.expire_all(), load_new()), args.repeat)
+        new_encode = timed(lambda: FastJSONResponse(new_content).body, args.repeat)
+        assert len(FastJSONResponse(new_content).body) > 0
+        old_total, new_total = old_load + old_encode, new_load + new_encode
+        print(f"{name:<10}{'pydantic':<10}{old_load:>9.2f}{old_encode:>9.2f}{old_total:>9.2f}")
+        print(f"{'':<10}{'views':<10}{new_load:>9.2f}{new_encode:>9.2f}{new_total:>9.2f}{old_total / new_total:>8.1f}x")
+
+    # The quiz is loaded once and cached, so only building the body matters
+    old_quiz = timed(quiz_pydantic, args.repeat)
+    new_quiz = timed(lambda: QuizService.build_payload(quiz_entity), args.repeat)
+    print(f"{'quiz':<10}{'pydantic':<10}{'':>9}{old_quiz:>9.2f}{old_quiz:>9.2f}")
+    print(f"{'':<10}{'views':<10}{'':>9}{new_quiz:>9.2f}{new_quiz:>9.2f}{old_quiz / new_quiz:>8.1f}x")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks/bench_services.py
+"""Micro-benchmarks of the AuthService, RoomService and MessageService calls
+behind the hot endpoints, run against a seeded university dataset.
+
+Each case runs --iterations times (bcrypt logins --slow-iterations times)
+after a short warm-up, and reports mean/p50/p95/p99 per call. Results are
+compared with benchmarks/baselines/services.json when it was recorded on
+the same dataset. The exit status is 1 if any case's p50 or p95 is over
+--tolerance above its baseline, so CI can catch a regression.
+
+Without --database-url a temporary SQLite database is seeded at --scale.
+A database seeded with seed_dataset can be reused by passing its URL and
+the same --scale.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_services --scale 0.01
+    python -m benchmarks.bench_services --scale 0.01 --save-baseline
+    python -m benchmarks.bench_services --database-url postgresql://... --scale 1
+"""
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import sessionmaker
+
+from app.models.room import Room, RoomMember
+from app.models.user import User
+from app.services.auth_service import AuthService
+from app.services.message_service import MessageService
+from app.services.room_service import RoomService, directory_cache
+from benchmarks.regression import compare, save_baseline, summarize
+from benchmarks.seed_dataset import BENCH_PASSWORD, seed
+
+def pick_subjects(db) -> dict:
+    """The busiest member, their busiest room and a (room, user) pair that can join"""
+    user_id = db.execute(
+        select(RoomMember.user_id).group_by(RoomMember.user_id)
+        .order_by(func.count().desc(), RoomMember.user_id).limit(1)
+    ).scalar_one()
+    # Plain values: attributes of an expired instance would reload on every access
+    user = db.execute(
+        select(User.id, User.username, User.email, User.university_domain).where(User.id == user_id)
+    ).one()
+    room_id = db.execute(
+        select(RoomMember.room_id).where(RoomMember.user_id == user_id)
+        .join(Room, Room.id == RoomMember.room_id)
+        .order_by(Room.message_seq.desc()).limit(1)
+    ).scalar_one()
+    # Any public room with a free seat, and someone its university admits who is not in it yet
+    joinable = None
+    rooms = db.execute(
+        select(Room.id, Room.university_domain)
+        .where(Room.room_type == "public", Room.is_active == True, Room.member_count < Room.max_members)
+        .order_by(Room.id)
+    ).all()
+    for room in rooms:
+        joiner = select(User.id).where(~User.id.in_(select(RoomMember.user_id).where(RoomMember.room_id == room.id)))
+        if room.university_domain is not None:
+            joiner = joiner.where(User.university_domain == room.university_domain)
+        joiner_id = db.execute(joiner.order_by(User.id).limit(1)).scalar()
+        if joiner_id is not None:
+            joinable = (room.id, joiner_id)
+            break
+    db.commit()
+    return {"user": user, "room_id": room_id, "joinable": joinable}
+
+def build_cases(db, subjects: dict) -> dict:
+    """Case name -> (callable, is_slow)"""
+    user, room_id = subjects["user"], subjects["room_id"]
+    loop = asyncio.new_event_loop()
+
+    def join_and_leave():
+        joinable_room_id, joiner_id = subjects["joinable"]
+        RoomService.join_room(db, joinable_room_id, joiner_id)
+        RoomService.leave_room(db, joinable_room_id, joiner_id)
+
+    def public_rooms_cold():
+        directory_cache.clear()
+        RoomService.get_public_rooms(db, user.university_domain)
+
+    cases = {
+        "auth.authenticate_user": (
+            lambda: loop.run_until_complete(AuthService.authenticate_user(db, user.username, BENCH_PASSWORD)), True
+        ),
+        "auth.get_user_by_username": (lambda: AuthService.get_user_by_username(db, user.username), False),
+        "auth.get_user_by_id": (lambda: AuthService.get_user_by_id(db, user.id), False),
+        "auth.is_university_email": (lambda: AuthService.is_university_email(user.email), False),
+        "rooms.get_user_rooms": (lambda: RoomService.get_user_rooms(db, user.id), False),
+        "rooms.is_member": (lambda: RoomService.is_member(db, room_id, user.id), False),
+        "rooms.get_unread_counts": (lambda: RoomService.get_unread_counts(db, user.id), False),
+        "rooms.get_public_rooms_cold": (public_rooms_cold, False),
+        "rooms.get_public_rooms_cached": (lambda: RoomService.get_public_rooms(db, user.university_domain, page=2), False),
+        "rooms.mark_read": (lambda: RoomService.mark_read(db, room_id, user.id), False),
+        "messages.get_message_history": (
+            lambda: MessageService.get_message_history(db, room_id, viewer_id=user.id), False
+        ),
+        "messages.search_messages": (lambda: MessageService.search_messages(db, user.id, "exam deadline"), False),
+    }
+    if subjects["joinable"] is not None:
+        cases["rooms.join_room+leave_room"] = (join_and_leave, False)
+    return cases
+
+def run_case(db, func, iterations: int) -> dict:
+    for _ in range(min(5, iterations)):
+        func()
+        # Each call sees fresh rows, as a request with its own session would
+        db.expire_all()
+    latencies = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - started)
+        db.expire_all()
+    return summarize(latencies)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--iterations", type=int, default=500)
+    parser.add_argument("--slow-iterations", type=int, default=10)
+    parser.add_argument("--only", default=None, help="run cases whose name contains this text")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    database_url = args.database_url
+    if database_url is None:
+        path = os.path.join(tempfile.mkdtemp(), "bench_services.db")
+        database_url = f"sqlite:///{path}"
+        print(f"seeding {database_url} at scale {args.scale}")
+        seed(database_url, args.scale, quiet=True)
+
+    engine = create_engine(database_url)
+    db = sessionmaker(bind=engine)()
+    cases = build_cases(db, pick_subjects(db))
+
+    results = {}
+    print(f"{'case':<34}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, (func, is_slow) in cases.items():
+        if args.only and args.only not in name:
+            continue
+        results[name] = run_case(db, func, args.slow_iterations if is_slow else args.iterations)
+        row = results[name]
+        print(f"{name:<34}{row['mean_ms']:>10.3f}{row['p50_ms']:>10.3f}{row['p95_ms']:>10.3f}{row['p99_ms']:>10.3f}")
+    db.close()
+    engine.dispose()
+
+    meta = {"dialect": engine.dialect.name, "scale": args.scale}
+    if args.save_baseline:
+        print(f"baseline written to {save_baseline('services', meta, results)}")
+        return
+
+    regressions = compare("services", meta, results, {"p50_ms": 0.05, "p95_ms": 0.2}, tolerance=args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+# benchmarks/bench_startup.py
+"""Worker cold start: time and memory from a fresh interpreter to a served request.
+
+Each run starts a new Python process that imports app.main, runs the
+lifespan startup (the same path uvicorn takes) and serves GET /health?ready=true
+in-process. Phases, medians over --runs:
+
+  import         import app.main (routers, services, models)
+  startup        lifespan startup: database check, background services
+  first_request  the readiness probe, the first connection checkout
+  cold_start     process spawn to the response, as seen from outside
+
+plus the peak RSS of the worker and which optional dependencies it got
+through startup without importing. The schema is created beforehand with
+scripts.manage_db, as a deploy would. The exit status is 1 if a phase's
+p50 or the peak RSS is over --tolerance above benchmarks/baselines/startup.json.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.bench_startup --runs 10 [--save-baseline]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.regression import compare, save_baseline, summarize
+
+# Loaded on first use (a login, an email, a Redis backend, a thumbnail), never at startup
+DEFERRED = ("jose", "passlib", "celery", "redis", "smtplib", "PIL")
+
+PROBE = """
+import json, resource, sys, time
+# The probe's own client, imported before the clock starts
+import asyncio, httpx
+started = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+async def serve():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://startup") as client:
+            response = await client.get("/health", params={"ready": "true"})
+        served = time.perf_counter()
+        print(json.dumps({
+            "status": response.status_code,
+            "import": imported - started,
+            "startup": ready - imported,
+            "first_request": served - ready,
+            "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            "modules": sorted({name.split(".")[0] for name in sys.modules}),
+        }), flush=True)
+
+asyncio.run(serve())
+"""
+
+def worker_env(database_url: str) -> dict:
+    env = dict(os.environ, DATABASE_URL=database_url, PYTHONDONTWRITEBYTECODE="1")
+    # One process on its own: nothing to share through Redis
+    for name in ("BROKER_BACKEND", "LEADERBOARD_BACKEND", "PRESENCE_BACKEND", "RATE_LIMIT_BACKEND"):
+        env.setdefault(name, "memory")
+    return env
+
+def cold_start(env: dict) -> dict:
+    """One fresh worker; returns its phases and cold_start (seconds)"""
+    spawned = time.perf_counter()
+    process = subprocess.Popen([sys.executable, "-c", PROBE], env=env, stdout=subprocess.PIPE, text=True)
+    line = process.stdout.readline()
+    answered = time.perf_counter()
+    process.wait()
+    if not line:
+        raise RuntimeError(f"worker exited with status {process.returncode} before serving a request")
+    sample = json.loads(line)
+    if sample["status"] != 200:
+        raise RuntimeError(f"readiness probe answered {sample['status']}")
+    sample["cold_start"] = answered - spawned
+    return sample
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), "bench_startup.db")
+    env = worker_env(f"sqlite:///{path}")
+    subprocess.run([sys.executable, "-m", "scripts.manage_db", "create"], env=env, check=True, stdout=subprocess.DEVNULL)
+
+    # The first run also warms the OS file cache and writes nothing else
+    cold_start(env)
+    samples = [cold_start(env) for _ in range(args.runs)]
+
+    phases = ("import", "startup", "first_request", "cold_start")
+    results = {phase: summarize([sample[phase] for sample in samples]) for phase in phases}
+    memory = {"peak_rss": {"max_mb": round(max(sample["rss_mb"] for sample in samples), 1)}}
+    loaded = set(samples[-1]["modules"])
+
+    print(f"{args.runs} cold starts (ms)")
+    print(f"{'phase':<15}{'mean':>9}{'p50':>9}{'p95':>9}")
+    for phase in phases:
+        row = results[phase]
+        print(f"{phase:<15}{row['mean_ms']:>9.1f}{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}")
+    print(f"peak RSS {memory['peak_rss']['max_mb']} MB, {len(loaded)} top-level packages loaded")
+    print("deferred: " + ", ".join(
+        f"{name} {'LOADED' if name in loaded else 'not loaded'}" for name in DEFERRED
+    ))
+
+    meta = {"dialect": "sqlite", "python": platform.python_version()}
+    if args.save_baseline:
+        print(f"baseline written to {save_baseline('startup', meta, dict(results, **memory))}")
+        return
+
+    regressions = compare("startup", meta, results, {"p50_ms": 20}, tolerance=args.tolerance)
+    regressions += compare("startup", meta, memory, {"max_mb": 5}, tolerance=args.tolerance)
+    regressions += [f"{name} is imported at startup again" for name in DEFERRED if name in loaded]
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# benchmarks/check_query_counts.py
+"""Query-count regression check for service methods.
+
+Runs each hot service method against a throwaway SQLite database and
+fails (exit code 1) if it issues more SQL statements than its budget.
+Budgets are exact so that improvements are noticed and locked in too:
+lower the number here when a method gets cheaper.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.check_query_counts
+"""
+import os
+import sys
+import tempfile
+
+from sqlalchemy import create_engine, func
+from sqlalchemy.orm import sessionmaker
+
+from app.utils.database import Base
+from app.utils.query_counter import QueryCounter
+from app.models import user, room, message, quiz, notification, email_outbox  # noqa: F401
+from app.models.room import RoomMember
+from app.models.user import User
+from app.schemas.message import MessageCreate
+from app.schemas.quiz import QuizCreate, QuizQuestionCreate
+from app.schemas.room import RoomCreate
+from app.services.message_service import MessageService
+from app.services.quiz_service import QuizService, quiz_payloads
+from app.services.room_service import RoomService
+
+def make_user(db, name: str, domain: str = "bench.edu") -> int:
+    new_user = User(
+        username=name, email=f"{name}@{domain}", password_hash="x", first_name=name,
+        last_name="Bench", university_domain=domain, university_badge="BENCH", is_verified=True
+    )
+    db.add(new_user)
+    db.commit()
+    return new_user.id
+
+def main() -> int:
+    path = os.path.join(tempfile.mkdtemp(), "query_counts.db")
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    db = sessionmaker(bind=engine)()
+
+    admin_id = make_user(db, "admin")
+    member_ids = [make_user(db, f"member{i}") for i in range(50)]
+    outsider_id = make_user(db, "outsider", "other.edu")
+
+    big_room = RoomService.create_room(db, RoomCreate(name="big", max_members=5000), admin_id).id
+    db.bulk_save_objects([RoomMember(room_id=big_room, user_id=uid) for uid in member_ids[1:]])
+    db.commit()
+    RoomService.sync_member_counts(db)
+
+    joiner_id = member_ids[0]
+    reader_id = member_ids[1]
+    side_room = RoomService.create_room(db, RoomCreate(name="side"), reader_id).id
+    batch = [
+        MessageService.build_row(room_id, uid, MessageCreate(content="hello"))
+        for room_id, uid in [(big_room, admin_id), (side_room, reader_id)] * 5
+    ]
+    quiz_id = QuizService.create_quiz(db, QuizCreate(title="bench", questions=[
+        QuizQuestionCreate(question_text=f"q{i}", options=["a", "b"], correct_answer="a") for i in range(20)
+    ]), admin_id).id
+    quiz_payloads.clear()
+
+    checks = [
+        # (name, call, expected statements)
+        ("create_room", lambda: RoomService.create_room(db, RoomCreate(name="fresh"), admin_id), 4),
+        ("join_room", lambda: RoomService.join_room(db, big_room, joiner_id), 2),
+        ("join_room (already member)", lambda: RoomService.join_room(db, big_room, joiner_id), 2),
+        ("join_room (other university)", lambda: RoomService.join_room(db, big_room, outsider_id), 2),
+        ("is_member", lambda: RoomService.is_member(db, big_room, joiner_id), 1),
+        ("get_user_rooms", lambda: RoomService.get_user_rooms(db, admin_id), 1),
+        # SQLite cannot guarantee RETURNING order for a multi-row INSERT, so
+        # SQLAlchemy sends the 10 rows one by one there (one statement on PostgreSQL)
+        # (plus one executemany into the search index)
+        ("insert_messages (10 rows, 2 rooms)", lambda: (MessageService.insert_messages(db, batch), db.commit()), 5 + 10),
+        ("insert_messages (reply)", lambda: (MessageService.insert_messages(db, [
+            MessageService.build_row(big_room, admin_id, MessageCreate(content="re", parent_id=1))
+        ]), db.commit()), 8),
+        ("get_thread", lambda: MessageService.get_thread(db, 1, admin_id), 2),
+        # The page reaches the room's oldest message, so the archive is checked too
+        ("get_message_history", lambda: MessageService.get_message_history(db, big_room, viewer_id=admin_id), 3),
+        ("toggle_reaction (add)", lambda: MessageService.toggle_reaction(db, 1, admin_id, "+1"), 4),
+        ("toggle_reaction (remove)", lambda: MessageService.toggle_reaction(db, 1, admin_id, "+1"), 4),
+        ("toggle_reaction (other user)", lambda: MessageService.toggle_reaction(db, 1, reader_id, "+1"), 4),
+        ("search_messages", lambda: MessageService.search_messages(db, reader_id, "hello"), 1),
+        ("get_unread_counts", lambda: RoomService.get_unread_counts(db, reader_id), 1),
+        ("mark_read (message)", lambda: RoomService.mark_read(db, big_room, reader_id, 1), 1),
+        ("mark_read (latest)", lambda: RoomService.mark_read(db, big_room, reader_id), 1),
+        ("leave_room (member)", lambda: RoomService.leave_room(db, big_room, joiner_id), 2),
+        ("leave_room (last admin, successor)", lambda: RoomService.leave_room(db, big_room, admin_id), 4),
+        ("get_public_payload (miss)", lambda: QuizService.get_public_payload(db, quiz_id), 2),
+        ("get_public_payload (cached)", lambda: QuizService.get_public_payload(db, quiz_id), 0),
+    ]
+
+    failures = 0
+    for name, call, expected in checks:
+        db.expire_all()
+        with QueryCounter(engine) as queries:
+            try:
+                call()
+            except ValueError:
+                pass
+        status = "ok" if queries.count == expected else "FAIL"
+        failures += status == "FAIL"
+        print(f"{status:>4}  {name:<38} {queries.count} statements (budget {expected})")
+        if status == "FAIL":
+            for statement in queries.statements:
+                print(f"        {' '.join(statement.split())[:140]}")
+
+    # The maintained counter must agree with the membership rows
+    maintained = {room_id: count for room_id, count in db.query(room.Room.id, room.Room.member_count)}
+    actual = dict(db.query(RoomMember.room_id, func.count(RoomMember.id)).group_by(RoomMember.room_id).all())
+    for room_id, count in maintained.items():
+        if count != actual.get(room_id, 0):
+            failures += 1
+            print(f"FAIL  room {room_id} member_count={count} but has {actual.get(room_id, 0)} members")
+
+    # ...and so must the unread counters with the messages table
+    unread = {row.room_id: row.unread_count for row in RoomService.get_unread_counts(db, reader_id)}
+    for room_id, count in unread.items():
+        last_read = db.query(RoomMember.last_read_seq).filter_by(room_id=room_id, user_id=reader_id).scalar()
+        newer = db.query(func.count(message.Message.id)).filter(
+            message.Message.room_id == room_id, message.Message.room_seq > last_read
+        ).scalar()
+        if count != newer:
+            failures += 1
+            print(f"FAIL  room {room_id} unread_count={count} but {newer} messages are unread")
+
+    # ...and so must the thread badges with the replies
+    badges = {row.id: row.reply_count for row in db.query(message.Message).filter(message.Message.reply_count != 0)}
+    MessageService.sync_threads(db)
+    rebuilt = {row.id: row.reply_count for row in db.query(message.Message).filter(message.Message.reply_count != 0)}
+    if badges != rebuilt:
+        failures += 1
+        print(f"FAIL  reply counts {badges} but replies say {rebuilt}")
+
+    # ...and so must the reaction counters with the reaction rows
+    counted = {(row.message_id, row.emoji): row.count for row in db.query(message.MessageReactionCount)}
+    reacted = {
+        (message_id, emoji): count for message_id, emoji, count in db.query(
+            message.MessageReaction.message_id, message.MessageReaction.emoji, func.count(message.MessageReaction.id)
+        ).group_by(message.MessageReaction.message_id, message.MessageReaction.emoji)
+    }
+    if counted != reacted:
+        failures += 1
+        print(f"FAIL  reaction counters {counted} but reactions {reacted}")
+
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
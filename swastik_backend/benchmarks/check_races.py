@@ -0,0 +1,158 @@
+# benchmarks/check_races.py
+"""Regression checks for races between concurrent requests.
+
+Each check sets up the interleaving that used to go wrong against a
+throwaway SQLite database and prints ok/FAIL with what it saw. Exit code
+1 if any check fails.
+
+  forward_poll   a message stamped before a poller's cursor but committed
+                 after it was issued still reaches the poller
+  duplicate_register
+                 two registrations for the same username, or the same
+                 email, both pass the up-front check while hashing; the
+                 loser gets the usual 400 message, not an IntegrityError
+  left_member    a message queued just before its author left the room is
+                 rejected when the batch is written, not stored
+
+Usage (from swastik_backend/):
+    python -m benchmarks.check_races
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.utils.database import create_tables
+from app.models.message import Message
+from app.models.room import RoomMember
+from app.models.user import User
+from app.schemas.auth import UserCreate
+from app.schemas.message import MessageCreate
+from app.schemas.room import RoomCreate
+from app.services.auth_service import AuthService
+from app.services.message_service import MessageBatchWriter, MessageService, NotRoomMember
+from app.services.room_service import RoomService
+
+def make_user(db, name: str) -> int:
+    new_user = User(
+        username=name, email=f"{name}@bench.edu", password_hash="x", first_name=name,
+        last_name="Bench", university_domain="bench.edu", university_badge="BENCH", is_verified=True
+    )
+    db.add(new_user)
+    db.commit()
+    return new_user.id
+
+def post(db, room_id: int, user_id: int, content: str, **columns) -> dict:
+    row = dict(MessageService.build_row(room_id, user_id, MessageCreate(content=content)), **columns)
+    stored = MessageService.insert_messages(db, [row])[0]
+    db.commit()
+    return stored
+
+def forward_poll(Session) -> list:
+    """Problems seen by a poller paging forward while a slow writer commits"""
+    with Session() as db:
+        user_id = make_user(db, "poller")
+        room_id = RoomService.create_room(db, RoomCreate(name="polled"), user_id).id
+        first = post(db, room_id, user_id, "first")
+        post(db, room_id, user_id, "second")
+
+        # Page back to the oldest message, then forward to the newest: the
+        # poller now holds a cursor past "second"
+        older = MessageService.get_message_history(db, room_id, 1)["older_cursor"]
+        cursor = MessageService.get_message_history(db, room_id, 1, before=older)["newer_cursor"]
+        page = MessageService.get_message_history(db, room_id, 10, after=cursor)
+        seen = [m.content for m in page["messages"]]
+        cursor = page["newer_cursor"]
+
+        # A writer whose transaction started before "first" was stamped
+        # commits only now: its created_at is older than the cursor
+        stamped = db.get(Message, first["id"]).created_at - timedelta(seconds=1)
+        post(db, room_id, user_id, "late", created_at=stamped)
+
+        page = MessageService.get_message_history(db, room_id, 10, after=cursor)
+        late = [m.content for m in page["messages"]]
+
+    problems = []
+    if seen != ["second"]:
+        problems.append(f"first forward page {seen}, expected ['second']")
+    if late != ["late"]:
+        problems.append(f"poll after the late commit got {late}, expected ['late']")
+    if page["newer_cursor"] is None:
+        problems.append("no newer_cursor to keep polling from")
+    return problems
+
+async def register_both(Session, first: UserCreate, second: UserCreate) -> list:
+    async def register(user_data: UserCreate):
+        with Session() as db:
+            return await AuthService.register_user(db, user_data)
+    return await asyncio.gather(register(first), register(second), return_exceptions=True)
+
+def duplicate_register(Session) -> list:
+    """Problems seen when the same username or email registers twice at once"""
+    def signup(username: str, email: str) -> UserCreate:
+        return UserCreate(username=username, email=email, password="correct horse", first_name="Dup", last_name="Bench")
+
+    cases = [
+        ("username", "Username already taken", signup("twin", "twin1@bench.edu"), signup("twin", "twin2@bench.edu")),
+        ("email", "Email already registered", signup("alias1", "alias@bench.edu"), signup("alias2", "alias@bench.edu")),
+    ]
+    problems = []
+    for what, expected, first, second in cases:
+        results = asyncio.run(register_both(Session, first, second))
+        created = [r for r in results if isinstance(r, dict)]
+        refused = [str(r) for r in results if isinstance(r, ValueError)]
+        if len(created) != 1 or refused != [expected]:
+            problems.append(f"same {what}: got {[r if isinstance(r, dict) else repr(r) for r in results]}")
+    return problems
+
+def left_member(Session) -> list:
+    """Problems seen when the writer flushes a message from someone who just left"""
+    with Session() as db:
+        owner_id = make_user(db, "owner")
+        leaver_id = make_user(db, "leaver")
+        room_id = RoomService.create_room(db, RoomCreate(name="left"), owner_id).id
+        RoomService.join_room(db, room_id, leaver_id)
+        queued = [
+            MessageService.build_row(room_id, owner_id, MessageCreate(content="stays")),
+            MessageService.build_row(room_id, leaver_id, MessageCreate(content="sent while leaving")),
+        ]
+        RoomService.leave_room(db, room_id, leaver_id)
+
+    results = MessageBatchWriter(Session)._write(queued)
+    with Session() as db:
+        stored = [m.content for m in db.query(Message).filter(Message.room_id == room_id)]
+
+    problems = []
+    if not isinstance(results[1], NotRoomMember):
+        problems.append(f"message from a former member resolved to {results[1]!r}")
+    if stored != ["stays"]:
+        problems.append(f"room holds {stored}, expected ['stays']")
+    return problems
+
+CHECKS = [
+    ("forward_poll", forward_poll),
+    ("duplicate_register", duplicate_register),
+    ("left_member", left_member),
+]
+
+def main() -> int:
+    path = os.path.join(tempfile.mkdtemp(), "races.db")
+    engine = create_engine(f"sqlite:///{path}")
+    create_tables(engine)
+    Session = sessionmaker(bind=engine)
+
+    failures = 0
+    for name, check in CHECKS:
+        problems = check(Session)
+        failures += bool(problems)
+        print(f"{'FAIL' if problems else 'ok':>4}  {name}")
+        for problem in problems:
+            print(f"        {problem}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,316 @@
+# benchmarks/load_test.py
+"""In-process load test: virtual users drive the real app over ASGI.
+
+--users virtual users, all members of the --rooms busiest rooms of a
+seeded dataset, loop for --duration seconds over a weighted mix of the
+hot endpoints: history, send, room list, unread counts, search, the
+directory, read cursors, reactions, /auth/me and the occasional bcrypt
+login. --sockets WebSocket clients listen on the same rooms and time how
+long each sent message takes to reach them.
+
+Requests go through httpx's ASGI transport and sockets through a minimal
+ASGI WebSocket client. There is no network or server process, so the
+numbers are the app's own cost: routing, validation, services and
+database. Rate limiting is switched off, and the broker, presence and
+leaderboards use their in-memory backends unless the environment says
+otherwise.
+
+Reported per endpoint: requests/s and p50/p95/p99 latency, plus errors.
+These are compared with benchmarks/baselines/load.json when it was
+recorded with the same dataset and load shape. The exit status is 1 when
+p95 rises or throughput drops by more than --tolerance.
+
+Usage (from swastik_backend/):
+    python -m benchmarks.load_test --scale 0.01 --users 50 --sockets 20 --duration 20
+    python -m benchmarks.load_test --scale 0.01 --save-baseline
+    python -m benchmarks.load_test --database-url postgresql://... --scale 1 --users 200
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from benchmarks.regression import compare, save_baseline, summarize
+
+LOAD_MARKER = "load-test"
+
+# Endpoint label -> weight in the mix
+MIX = {
+    "GET /rooms/{room_id}/messages": 30,
+    "POST /rooms/{room_id}/messages": 15,
+    "GET /rooms": 10,
+    "GET /rooms/unread": 10,
+    "GET /messages/search": 8,
+    "GET /rooms/public": 8,
+    "POST /rooms/{room_id}/read": 8,
+    "POST /messages/{message_id}/reactions": 5,
+    "GET /auth/me": 5,
+    "POST /auth/login": 1,
+}
+
+class ASGIWebSocket:
+    """Just enough of a WebSocket client to talk to an ASGI app in-process"""
+
+    def __init__(self, app, path: str, query_string: str = ""):
+        self.app = app
+        self.scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query_string.encode(),
+            "headers": [(b"host", b"loadtest")],
+            "client": ("127.0.0.1", 50000),
+            "server": ("loadtest", 80),
+            "subprotocols": [],
+        }
+        self._inbound: asyncio.Queue = asyncio.Queue()
+        self._outbound: asyncio.Queue = asyncio.Queue()
+        self._task = None
+
+    async def connect(self) -> None:
+        self._task = asyncio.create_task(self.app(self.scope, self._inbound.get, self._outbound.put))
+        await self._inbound.put({"type": "websocket.connect"})
+        reply = await self._outbound.get()
+        if reply["type"] != "websocket.accept":
+            raise ConnectionError(f"socket {self.scope['path']} refused: {reply}")
+
+    async def receive_json(self):
+        frame = await self._outbound.get()
+        if frame["type"] == "websocket.close":
+            raise ConnectionError("socket closed by the server")
+        return json.loads(frame.get("text") or frame.get("bytes"))
+
+    async def close(self) -> None:
+        await self._inbound.put({"type": "websocket.disconnect", "code": 1000})
+        try:
+            await asyncio.wait_for(self._task, 5)
+        except (asyncio.TimeoutError, Exception):
+            self._task.cancel()
+
+class Recorder:
+    """Latencies and failures per endpoint label"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+        self.deliveries: List[float] = []
+
+    def results(self, elapsed: float) -> Dict[str, dict]:
+        results = {}
+        for label in sorted(self.latencies):
+            row = summarize(self.latencies[label])
+            row["rps"] = round(len(self.latencies[label]) / elapsed, 1)
+            row["errors"] = self.errors[label]
+            results[label] = row
+        if self.deliveries:
+            row = summarize(self.deliveries)
+            row["rps"] = round(len(self.deliveries) / elapsed, 1)
+            row["errors"] = 0
+            results["WS delivery"] = row
+        return results
+
+def pick_virtual_users(database_url: str, users: int, rooms: int) -> List[dict]:
+    """Members of the busiest rooms, each with the room they will hammer"""
+    from sqlalchemy import create_engine, select
+    from app.models.room import Room, RoomMember
+    from app.models.user import User
+
+    engine = create_engine(database_url)
+    with engine.connect() as connection:
+        hot_rooms = connection.execute(
+            select(Room.id).order_by(Room.message_seq.desc()).limit(rooms)
+        ).scalars().all()
+        rows = connection.execute(
+            select(RoomMember.room_id, User.id, User.username)
+            .join(User, User.id == RoomMember.user_id)
+            .where(RoomMember.room_id.in_(hot_rooms))
+            .order_by(RoomMember.room_id, User.id)
+        ).all()
+    engine.dispose()
+
+    # Round-robin over the rooms so each gets a share of the users
+    by_room = defaultdict(list)
+    for room_id, user_id, username in rows:
+        by_room[room_id].append({"room_id": room_id, "user_id": user_id, "username": username})
+    picked = []
+    while len(picked) < users and any(by_room.values()):
+        for room_id in hot_rooms:
+            if by_room[room_id] and len(picked) < users:
+                picked.append(by_room[room_id].pop(0))
+    return picked
+
+async def virtual_user(client, vu: dict, recorder: Recorder, deadline: float, rng: random.Random) -> None:
+    headers = {"Authorization": f"Bearer {vu['token']}"}
+    room_id = vu["room_id"]
+    labels, weights = list(MIX), list(MIX.values())
+    seen_messages: List[int] = []
+
+    while time.perf_counter() < deadline:
+        label = rng.choices(labels, weights)[0]
+        if label == "POST /messages/{message_id}/reactions" and not seen_messages:
+            label = "GET /rooms/{room_id}/messages"
+
+        started = time.perf_counter()
+        if label == "GET /rooms/{room_id}/messages":
+            response = await client.get(f"/rooms/{room_id}/messages", headers=headers)
+            if response.status_code == 200:
+                seen_messages = [message["id"] for message in response.json()["messages"]][:20]
+        elif label == "POST /rooms/{room_id}/messages":
+            response = await client.post(
+                f"/rooms/{room_id}/messages", headers=headers,
+                json={"content": f"{LOAD_MARKER} {time.perf_counter()!r}"}
+            )
+        elif label == "GET /rooms":
+            response = await client.get("/rooms", headers=headers)
+        elif label == "GET /rooms/unread":
+            response = await client.get("/rooms/unread", headers=headers)
+        elif label == "GET /messages/search":
+            response = await client.get("/messages/search", headers=headers, params={"q": rng.choice(("exam", "lab notes", "deadline"))})
+        elif label == "GET /rooms/public":
+            response = await client.get("/rooms/public", headers=headers, params={"page": rng.randint(1, 3)})
+        elif label == "POST /rooms/{room_id}/read":
+            response = await client.post(f"/rooms/{room_id}/read", headers=headers, json={})
+        elif label == "POST /messages/{message_id}/reactions":
+            response = await client.post(
+                f"/messages/{rng.choice(seen_messages)}/reactions", headers=headers,
+                json={"emoji": rng.choice(("👍", "🔥", "😂"))}
+            )
+        elif label == "GET /auth/me":
+            response = await client.get("/auth/me", headers=headers)
+        else:
+            response = await client.post("/auth/login", data={"username": vu["username"], "password": vu["password"]})
+
+        recorder.latencies[label].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            recorder.errors[label] += 1
+
+async def socket_listener(socket: ASGIWebSocket, recorder: Recorder) -> None:
+    """Time delivery of every load-test message the socket receives"""
+    try:
+        while True:
+            event = await socket.receive_json()
+            if event.get("type") != "message":
+                continue
+            content = event["data"].get("content", "")
+            if content.startswith(LOAD_MARKER):
+                recorder.deliveries.append(time.perf_counter() - float(content.split()[1]))
+    except (asyncio.CancelledError, ConnectionError):
+        pass
+
+def report(results: Dict[str, dict], elapsed: float) -> None:
+    print(f"{'endpoint':<40}{'count':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for label, row in results.items():
+        print(
+            f"{label:<40}{row['count']:>8}{row['rps']:>9.1f}{row['p50_ms']:>9.2f}"
+            f"{row['p95_ms']:>9.2f}{row['p99_ms']:>9.2f}{row['errors']:>8}"
+        )
+    requests = sum(row["count"] for label, row in results.items() if label != "WS delivery")
+    print(f"{requests} requests in {elapsed:.1f}s: {requests / elapsed:.0f} req/s overall")
+
+async def run(args, database_url: str) -> Dict[str, dict]:
+    import httpx
+    from app.main import app
+    from app.utils.security import create_access_token
+    from benchmarks.seed_dataset import BENCH_PASSWORD
+
+    # Tokens are issued directly; logins are part of the mix, not the setup
+    vus = pick_virtual_users(database_url, args.users, args.rooms)
+    for vu in vus:
+        vu["token"] = create_access_token({"sub": vu["username"]})
+        vu["password"] = BENCH_PASSWORD
+
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    async with app.router.lifespan_context(app):
+        sockets = []
+        for index in range(args.sockets):
+            vu = vus[index % len(vus)]
+            socket = ASGIWebSocket(app, f"/ws/rooms/{vu['room_id']}", f"token={vu['token']}")
+            await socket.connect()
+            sockets.append(socket)
+        listeners = [asyncio.create_task(socket_listener(socket, recorder)) for socket in sockets]
+
+        transport = httpx.ASGITransport(app=app, client=("127.0.0.1", 50000))
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            started = time.perf_counter()
+            deadline = started + args.duration
+            await asyncio.gather(*(
+                virtual_user(client, vu, recorder, deadline, random.Random(rng.random())) for vu in vus
+            ))
+            # Let the last broadcasts arrive before the sockets go
+            await asyncio.sleep(1)
+            elapsed = time.perf_counter() - started - 1
+
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*listeners, return_exceptions=True)
+        for socket in sockets:
+            await socket.close()
+
+    results = recorder.results(elapsed)
+    report(results, elapsed)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None)
+    parser.add_argument("--scale", type=float, default=0.01)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--rooms", type=int, default=5)
+    parser.add_argument("--sockets", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args()
+
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load_test.db')}"
+
+    # Before anything imports the app: its configuration is read at import time
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+    os.environ["RATE_LIMIT_ENABLED"] = "false"
+    for backend in ("BROKER_BACKEND", "PRESENCE_BACKEND", "LEADERBOARD_BACKEND", "RATE_LIMIT_BACKEND"):
+        os.environ.setdefault(backend, "memory")
+
+    if args.database_url is None:
+        from benchmarks.seed_dataset import seed
+
+        print(f"seeding {database_url} at scale {args.scale}")
+        seed(database_url, args.scale, quiet=True)
+
+    results = asyncio.run(run(args, database_url))
+
+    meta = {
+        "dialect": database_url.split(":", 1)[0].split("+", 1)[0],
+        "scale": args.scale,
+        "users": args.users,
+        "rooms": args.rooms,
+        "sockets": args.sockets,
+    }
+    if args.save_baseline:
+        print(f"baseline written to {save_baseline('load', meta, results)}")
+        return
+
+    regressions = compare(
+        "load", meta, results, {"p95_ms": 1.0}, higher_is_better={"rps": 1.0}, tolerance=args.tolerance
+    )
+    errors = sum(row["errors"] for row in results.values())
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if errors:
+        print(f"{errors} requests failed")
+    if regressions or errors:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/regression.py
+"""Percentiles and stored baselines shared by bench_services and load_test.
+
+A baseline is a JSON file under benchmarks/baselines/ holding the dataset
+it was measured on ("meta") and one entry of metrics per benchmark case.
+Comparisons are only made against a baseline with the same meta, since
+numbers from a different scale or database say nothing about a regression.
+"""
+import json
+import math
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BASELINE_DIR = Path(__file__).parent / "baselines"
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of unsorted samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))]
+
+def summarize(latencies: List[float]) -> dict:
+    """Latency samples (seconds) as milliseconds: mean and tail percentiles"""
+    return {
+        "count": len(latencies),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 4) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 4),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+    }
+
+def load_baseline(name: str) -> Optional[dict]:
+    path = BASELINE_DIR / f"{name}.json"
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
+
+def save_baseline(name: str, meta: dict, results: Dict[str, dict]) -> Path:
+    BASELINE_DIR.mkdir(exist_ok=True)
+    path = BASELINE_DIR / f"{name}.json"
+    path.write_text(json.dumps({"meta": meta, "results": results}, indent=2, sort_keys=True) + "\n")
+    return path
+
+def compare(
+    name: str,
+    meta: dict,
+    results: Dict[str, dict],
+    lower_is_better: Dict[str, float],
+    higher_is_better: Optional[Dict[str, float]] = None,
+    tolerance: float = 0.25
+) -> List[str]:
+    """Regressions against the stored baseline, as printable lines.
+
+    `lower_is_better` and `higher_is_better` map a metric to the absolute
+    slack it gets on top of `tolerance`, so sub-millisecond noise on very
+    fast cases does not count as a regression.
+    """
+    baseline = load_baseline(name)
+    if baseline is None:
+        print(f"no baseline at {BASELINE_DIR / name}.json; run with --save-baseline to record one")
+        return []
+    if baseline["meta"] != meta:
+        print(f"baseline {name}.json was recorded on {baseline['meta']}, not {meta}; skipping comparison")
+        return []
+
+    regressions = []
+    for case, current in results.items():
+        previous = baseline["results"].get(case)
+        if previous is None:
+            continue
+        for metric, slack in lower_is_better.items():
+            if current[metric] > previous[metric] * (1 + tolerance) + slack:
+                regressions.append(f"{case}: {metric} {previous[metric]} -> {current[metric]}")
+        for metric, slack in (higher_is_better or {}).items():
+            if current[metric] < previous[metric] * (1 - tolerance) - slack:
+                regressions.append(f"{case}: {metric} {previous[metric]} -> {current[metric]}")
+    return regressions
@@ -0,0 +1,97 @@
+# scripts/fake_smtp_server.py
+"""Local SMTP sink for exercising the email outbox.
+
+Usage (from swastik_backend/):
+    python -m scripts.fake_smtp_server --port 1025 [--delay 2] [--fail-rate 0.3]
+
+Then run the API with EMAIL_HOST=localhost EMAIL_PORT=1025 EMAIL_USE_TLS=False
+EMAIL_USERNAME= so the dispatcher delivers here. --delay slows every reply
+and --fail-rate answers that share of messages with a temporary 451 error,
+which the outbox retries with backoff.
+"""
+import argparse
+import asyncio
+import random
+
+class FakeSMTPServer:
+    def __init__(self, delay: float = 0.0, fail_rate: float = 0.0, quiet: bool = False):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.quiet = quiet
+        self.received = 0
+        self.rejected = 0
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        async def reply(line: str) -> None:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+
+        await reply("220 fake-smtp ready")
+        recipients = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors="replace").strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb in ("EHLO", "HELO"):
+                    await reply("250 fake-smtp")
+                elif verb == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif verb == "RCPT":
+                    recipients.append(command.split(":", 1)[-1].strip())
+                    await reply("250 OK")
+                elif verb == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    body = []
+                    while True:
+                        data_line = await reader.readline()
+                        if not data_line or data_line in (b".\r\n", b".\n"):
+                            break
+                        body.append(data_line)
+                    if random.random() < self.fail_rate:
+                        self.rejected += 1
+                        await reply("451 Temporary failure, try again later")
+                    else:
+                        self.received += 1
+                        subject = next((l.decode(errors="replace").strip() for l in body if l.lower().startswith(b"subject:")), "")
+                        if not self.quiet:
+                            print(f"[{self.received}] to={','.join(recipients)} {subject}")
+                        await reply("250 OK queued")
+                elif verb in ("RSET", "NOOP"):
+                    await reply("250 OK")
+                elif verb == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        finally:
+            writer.close()
+
+async def serve(host: str, port: int, server: FakeSMTPServer) -> None:
+    listener = await asyncio.start_server(server.handle, host, port)
+    print(f"Fake SMTP server listening on {host}:{port}")
+    async with listener:
+        await listener.serve_forever()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1025)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before every reply")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of messages answered with 451")
+    parser.add_argument("--quiet", action="store_true")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, FakeSMTPServer(args.delay, args.fail_rate, args.quiet)))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# scripts/manage_db.py
+"""Schema management for DATABASE_URL; the API no longer touches the schema.
+
+Usage (from swastik_backend/):
+    python -m scripts.manage_db create     # create missing tables and the search index
+    python -m scripts.manage_db check      # exit 1 if any model's table or column is missing
+    python -m scripts.manage_db backfill   # recompute member counts and reply threads
+    python -m scripts.manage_db compact    # purge deleted messages, archive old threads
+
+Run `create` once per deploy, before starting the API workers: it only adds
+what is missing, so it is safe to repeat. Workers start without it and
+report the gap in their startup log and on /health?ready=true.
+
+`create` adds tables, not columns. A database created before a model gained
+a column (messages.room_seq, rooms.member_count, ...) fails `check` and
+`create` with the columns to add; add them with ALTER TABLE, or create the
+database afresh, then run `backfill`.
+"""
+import argparse
+import sys
+
+from app.utils.database import SessionLocal, create_tables, missing_columns, missing_tables
+
+def create() -> int:
+    missing = missing_tables()
+    create_tables()
+    print(f"Created {len(missing)} tables" + (f": {', '.join(missing)}" if missing else ""))
+    return report_columns()
+
+def report_columns() -> int:
+    columns = missing_columns()
+    if columns:
+        print(f"Missing columns (add with ALTER TABLE, then run backfill): {', '.join(columns)}")
+        return 1
+    return 0
+
+def check() -> int:
+    missing = missing_tables()
+    if missing:
+        print(f"Missing tables: {', '.join(missing)}")
+    if report_columns() or missing:
+        return 1
+    print("Schema is up to date")
+    return 0
+
+def backfill() -> int:
+    from app.services.message_service import MessageService
+    from app.services.room_service import RoomService
+
+    with SessionLocal() as db:
+        RoomService.sync_member_counts(db)
+        MessageService.sync_threads(db)
+    print("Recomputed room member counts and message threads")
+    return 0
+
+def compact() -> int:
+    from app.services.archive_service import compact_messages
+
+    result = compact_messages()
+    print(f"Purged {result['purged']} deleted messages and archived {result['archived']} messages")
+    return 0
+
+COMMANDS = {"create": create, "check": check, "backfill": backfill, "compact": compact}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    args = parser.parse_args()
+    sys.exit(COMMANDS[args.command]())
+
+if __name__ == "__main__":
+    main()